@@ -1,7 +1,7 @@
 from fastapi import APIRouter
 
 from crewai_saas.api.api_v1.endpoints import test_items
-from crewai_saas.api.api_v1.endpoints import crews, profiles, agents, tasks, tools, llms, employed_crews
+from crewai_saas.api.api_v1.endpoints import crews, profiles, agents, tasks, tools, llms, employed_crews, system
 
 api_router = APIRouter()
 api_router.include_router(test_items.router, prefix="/test_items", tags=["test_items"])
@@ -11,4 +11,5 @@ api_router.include_router(tasks.router, prefix="/tasks", tags=["tasks"])
 api_router.include_router(tools.router, prefix="/tools", tags=["tools"])
 api_router.include_router(profiles.router, prefix="/profiles", tags=["profiles"])
 api_router.include_router(llms.router, prefix="/llms", tags=["llms"])
-api_router.include_router(employed_crews.router, prefix="/employed_crews", tags=["employed_crews"])
\ No newline at end of file
+api_router.include_router(employed_crews.router, prefix="/employed_crews", tags=["employed_crews"])
+api_router.include_router(system.router, prefix="/system", tags=["system"])
@@ -3,9 +3,11 @@ from typing import Annotated
 from starlette.responses import JSONResponse
 
 from crewai_saas.api.deps import CurrentUser, SessionDep
-from crewai_saas.core.enum import CrewStatus
+from crewai_saas.core.enum import CrewStatus, KnowledgeIndexStatus
 from crewai_saas.crud import agent, tool, task, crew, storage, knowledge
 from crewai_saas.model import Agent, AgentCreate, AgentUpdate, Tool, AgentWithTool, KnowledgeCreate
+from crewai_saas.service import crewai
+from crewai_saas.service.knowledge_ingest import knowledge_ingest
 
 router = APIRouter()
 
@@ -17,11 +19,7 @@ async def create_agent(agent_in: AgentCreate, session: SessionDep) -> Agent:
 async def read_agents_by_crew_id(crew_id: Annotated[int, Path(title="The ID of the Crew to get")],
                                  session: SessionDep) -> list[AgentWithTool]:
     agents = await agent.get_all_active_by_crew_id(session, crew_id)
-    ret = [
-        AgentWithTool(**it.dict(), tools=await tool.get_all_by_ids(session, it.tool_ids))
-        for it in agents
-    ]
-    return ret
+    return crewai.attach_tools(agents, await crewai.load_agent_tools(session, agents))
 
 @router.get("/by-task-id/{task_id}")
 async def read_agents_by_task_id(task_id: Annotated[int, Path(title="The ID of the Task to get")],
@@ -45,21 +43,32 @@ async def delete_agent(agent_id: Annotated[int, Path(title="The ID of the it to
 async def create_agent_rag(
         agent_id: Annotated[int, Path(title="The ID of the it to get")],
         session: SessionDep, file: UploadFile = File(...)) -> Response:
-    # Read the file content
-    file_content = await file.read()
+    # Stream the upload to a temp file while hashing it, instead of reading it into memory
+    staged = await knowledge_ingest.stage(file)
+    if staged.kind is None:
+        staged.discard()
+        return JSONResponse(status_code=400, content={"detail": f"Unsupported file type: {file.filename}"})
 
-    # Upload the file to Supabase storage
-    file_url = await storage.upload_file(session, file_content, file.content_type)
+    try:
+        # Upload the file to Supabase storage from disk
+        with open(staged.local_path, "rb") as staged_file:
+            file_url = await storage.upload_file(session, staged_file, file.content_type)
 
-    # Here you would typically update your agent with the new file URL
-    knowledge_in = KnowledgeCreate(
-        agent_id=agent_id,
-        file_path=file_url
-    )
-    knowledge_item = await knowledge.create(session, knowledge_in)
+        knowledge_in = KnowledgeCreate(
+            agent_id=agent_id,
+            file_path=file_url,
+            index_status=KnowledgeIndexStatus.PENDING,
+            content_hash=staged.content_hash,
+        )
+        knowledge_item = await knowledge.create(session, knowledge_in)
+    except Exception:
+        staged.discard()
+        raise
+
+    # Parse, chunk and embed in the background; the row's index_status reports progress
+    knowledge_ingest.submit(staged, file_url)
 
     return JSONResponse(
         status_code=200,
-        content=knowledge_item
+        content=knowledge_item.model_dump(mode="json")
     )
-
@@ -8,7 +8,8 @@ from crewai_saas.api.deps import CurrentUser, SessionDep
 from crewai_saas.core.enum import CrewStatus
 from crewai_saas.core.google_auth_utils import GoogleAuthUtils
 from crewai_saas.crud import crew, employed_crew, api_key, task, profile, published_crew, published_agent, published_task, knowledge
-from crewai_saas.service import crewai, crewAiService
+from crewai_saas.service import crewai, crewAiService, publish
+from crewai_saas.service.crew_definition import crew_definitions
 
 from crewai_saas.model import Crew, CrewCreate, CrewUpdate, CrewWithAll, PublishedCrewCreate, PublishedAgentCreate, PublishedTaskCreate, KnowledgeCreate
 
@@ -119,43 +120,19 @@ async def delete_crew(crew_id: Annotated[int, Path(title="The ID of the Crew to
     validation_result = await validate(session, get_crew.profile_id, user_email)
     if isinstance(validation_result, JSONResponse):
         return validation_result
-    return await crew.soft_delete(session, id=crew_id)
+    deleted = await crew.soft_delete(session, id=crew_id)
+    crew_definitions.forget_crew(crew_id)
+    return deleted
 
 
 
 @router.post("/{crew_id}/publish")
 async def publish_crew(crew_id: Annotated[int, Path(title="The ID of the Crew to get")],
                       session: SessionDep) -> Response:
-    get_crew = await crew.get_active(session, id=crew_id)
     # validation_result = await validate(session, get_crew.profile_id, user_email)
     # if isinstance(validation_result, JSONResponse):
     #     return validation_result
-    get_agents = await crud.agent.get_all_active_by_crew_id(session, crew_id=crew_id)
-    publish_crew_entity = await published_crew.create(session, obj_in=PublishedCrewCreate(**get_crew.dict(), crew_id=crew_id))
-
-    agent_dict = {}
-    for agent_entity in get_agents:
-        published_agent_entity = await published_agent.create(session, obj_in=PublishedAgentCreate(**agent_entity.dict(), published_crew_id=publish_crew_entity.id))
-        knowledge_entities = await knowledge.get_all_active_by_agent_id(session, agent_id=agent_entity.id)
-        for knowledge_entity in knowledge_entities:
-            knowledge_in = KnowledgeCreate(
-                published_agent_id=published_agent_entity.id,
-                file_path=knowledge_entity.file_path
-            )
-            await knowledge.create(session, knowledge_in)
-
-        agent_dict[agent_entity.id] = published_agent_entity
-
-    task_dict = {}
-    for task_id in get_crew.task_ids:
-        task_entity = await crud.task.get_active(session, id=task_id)
-        if task_entity:
-            context_task_ids = []
-            if task_entity.context_task_ids:
-                context_task_ids = [task_dict[task_id].id for task_id in task_entity.context_task_ids]
-            task_dict[task_entity.id] = await published_task.create(session, obj_in=PublishedTaskCreate(**task_entity.dict(), published_agent_id=agent_dict[task_entity.agent_id].id, published_crew_id=publish_crew_entity.id, context_published_task_ids=context_task_ids))
-    await published_crew.set_published_task_ids(session, published_crew_id=publish_crew_entity.id, published_task_ids=[task_dict[task_id].id for task_id in get_crew.task_ids])
-    # await crew.update_status(session, crew_id=crew_id, status=CrewStatus.PUBLIC)
-    await crew.update_has_published(session, crew_id=crew_id, has_published=True)
-
-    return await crewai.make_response(session=session, crew_id=crew_id)
\ No newline at end of file
+    try:
+        return await publish.publish_crew(session, crew_id=crew_id)
+    except publish.PublishError as e:
+        return JSONResponse(status_code=400, content={"detail": str(e)})
\ No newline at end of file
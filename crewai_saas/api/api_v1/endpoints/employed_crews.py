@@ -6,25 +6,40 @@ from fastapi.responses import StreamingResponse
 import asyncio
 import json
 
-from typing import Annotated
+from typing import Annotated, Optional
 from fastapi import FastAPI, Path, Query, Request, Response
 from datetime import datetime
 
 from starlette.responses import JSONResponse
 
 from crewai_saas.api.api_v1.endpoints.profiles import validate
+from crewai_saas.api import deps
 from crewai_saas.api.deps import CurrentUser, SessionDep
 from crewai_saas import crud
+from crewai_saas.core.chat_event_hub import ChatEvent, ChatEventHub, chat_event_hub
 from crewai_saas.core.google_auth_utils import GoogleAuthUtils
 from crewai_saas.model import *
 from crewai_saas.service import crewai, crewAiService
+from crewai_saas.service.conversation_history import conversation_history
+from crewai_saas.service.run_scheduler import RunJob, RunQueueFullError, run_scheduler
 from crewai_saas.tool import function_map
-from crewai_saas.core.enum import CycleStatus, MessageRole, CrewStatus
+from crewai_saas.core.enum import CycleStatus, MessageRole, MessageType, CrewStatus
 
 router = APIRouter()
 logging.basicConfig(level=logging.DEBUG, filename='app.log', filemode='a',
                     format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
+
+
+async def load_cycles_with_messages(session: SessionDep, cycles: list[Cycle]) -> list[CycleWithMessage]:
+    """Fetch the messages of every cycle in one query and group them under their cycle."""
+    messages = await crud.message.get_all_by_cycle_ids(session, cycle_ids=[cycle.id for cycle in cycles])
+    messages_by_cycle_id = {cycle.id: [] for cycle in cycles}
+    for message in messages:
+        messages_by_cycle_id[message.cycle_id].append(MessageSimple(**message.dict()))
+    return [CycleWithMessage(**cycle.dict(), messages=messages_by_cycle_id[cycle.id]) for cycle in cycles]
+
+
 @router.get("/test")
 async def test(session: SessionDep) -> Response:
     news = function_map["search_news"].invoke("NVDA")
@@ -66,7 +81,7 @@ async def read_employed_crews(profile_id: Annotated[int, Path(title="The ID of t
 @router.get("/by-profile")
 async def read_employed_crews_by_profile(session: SessionDep
                               , profile_email: str = Depends(GoogleAuthUtils.get_current_user_email)) -> list[EmployedCrewWithCrew]:
-    profile = await crud.profile.get_active_by_email(session, email=profile_email)
+    profile = await crud.profile.get_active_by_email_cached(session, email=profile_email)
 
     employed_crews = await crud.employed_crew.get_all_active_employed_crews_by_owner(session, profile_id=profile.id)
 
@@ -84,13 +99,13 @@ async def read_employed_crews_by_profile(session: SessionDep
 @router.get("/by-crew-id/{crew_id}")
 async def read_employed_crews_by_crew_id(crew_id: Annotated[int, Path(title="The ID of the Crew to get")],
                                          session: SessionDep, profile_email: str = Depends(GoogleAuthUtils.get_current_user_email)) -> list[EmployedCrew]:
-    profile_entity = await crud.profile.get_active_by_email(session, email=profile_email)
+    profile_entity = await crud.profile.get_active_by_email_cached(session, email=profile_email)
     return await crud.employed_crew.get_all_active_by_crew_id_and_profile_id(session, crew_id=crew_id, profile_id=profile_entity.id)
 
 @router.get("/is_owned/by-crew-id/{crew_id}")
 async def read_owned_employed_crews_by_crew_id(crew_id: Annotated[int, Path(title="The ID of the Crew to get")],
                                          session: SessionDep, profile_email: str = Depends(GoogleAuthUtils.get_current_user_email)) -> EmployedCrew:
-    profile_entity = await crud.profile.get_active_by_email(session, email=profile_email)
+    profile_entity = await crud.profile.get_active_by_email_cached(session, email=profile_email)
     return await crud.employed_crew.get_active_is_owned_by_crew_id_and_profile_id(session, crew_id=crew_id, profile_id=profile_entity.id)
 
 
@@ -183,14 +198,7 @@ async def read_chat_info(chat_id: Annotated[int, Path(title="The ID of the Chat
     else:
         cycles = await crud.cycle.get_all_finished_and_started_by_chat_id(session, chat_id=chat_id)
         is_owner = False
-    cycle_with_messages = []
-    for cycle in cycles:
-        messages = await crud.message.get_all_by_cycle_id(session, cycle_id=cycle.id)
-        message_dtos = [
-            MessageSimple(**message.dict())
-            for message in messages
-        ]
-        cycle_with_messages.append(CycleWithMessage(**cycle.dict(), messages=message_dtos))
+    cycle_with_messages = await load_cycles_with_messages(session, cycles)
     chat_with_all = ChatWithCycleList(**chat.dict(), cycles=cycle_with_messages, is_owner=is_owner)
     return chat_with_all
 
@@ -203,6 +211,7 @@ async def delete_chat(chat_id: Annotated[int, Path(title="The ID of the Chat to
     validation_result = await validate(session, get_employed_crew.profile_id, profile_email)
     if isinstance(validation_result, JSONResponse):
         return validation_result
+    conversation_history.invalidate(chat_id)
     return await crud.chat.soft_delete(session, id=chat_id)
 
 @router.get("/{employed_crew_id}/chats/{chat_id}/cycles")
@@ -219,15 +228,10 @@ async def read_cycles(employed_crew_id: Annotated[int, Path(title="The ID of the
     else:
         cycles = await crud.cycle.get_all_finished_and_started_by_chat_id(session, chat_id=chat_id)
         is_owner = False
-    cycle_with_messages = []
-    for cycle in cycles:
-        logger.info(f"cycle.id : {cycle.id}")
-        messages = await crud.message.get_all_by_cycle_id(session, cycle_id=cycle.id)
-        message_dtos = [
-            MessageSimple(**message.dict())
-            for message in messages
-        ]
-        cycle_with_messages.append((CycleWithMessage(**cycle.dict(), messages=message_dtos)).dict())
+    cycle_with_messages = [
+        cycle_with_message.dict()
+        for cycle_with_message in await load_cycles_with_messages(session, cycles)
+    ]
     response_data = {
         "cycles": cycle_with_messages,
         "is_owned": is_owner
@@ -241,51 +245,227 @@ async def get_cycles_data(session: SessionDep, chat_id: int, is_owner: bool):
     else:
         cycles = await crud.cycle.get_all_finished_and_started_by_chat_id(session, chat_id=chat_id)
 
-    cycle_with_messages = []
-    for cycle in cycles:
-        messages = await crud.message.get_all_by_cycle_id(session, cycle_id=cycle.id)
-        message_dtos = [MessageSimple(**message.dict()) for message in messages]
-        cycle_with_messages.append(CycleWithMessage(**cycle.dict(), messages=message_dtos).dict())
-
-    return cycle_with_messages
+    return [
+        cycle_with_message.dict()
+        for cycle_with_message in await load_cycles_with_messages(session, cycles)
+    ]
 
 
-def has_changes(current_data: list[dict], previous_data: list[dict]) -> bool:
-    if len(current_data) != len(previous_data):
-        return True
-    for current_cycle, previous_cycle in zip(current_data, previous_data):
-        if len(current_cycle['messages']) != len(previous_cycle['messages']):
-            return True
-    return False
+SSE_KEEPALIVE_SECONDS = 15
+SSE_POLL_ACTIVE_SECONDS = 0.25
+SSE_POLL_IDLE_MIN_SECONDS = 1
+SSE_POLL_IDLE_MAX_SECONDS = 10
+NON_OWNER_VISIBLE_CYCLE_STATUSES = {CycleStatus.FINISHED.value, CycleStatus.STARTED.value}
+VISIBLE_MESSAGE_ROLES = {MessageRole.USER.value, MessageRole.ASSISTANT.value}
+VISIBLE_MESSAGE_TYPES = {MessageType.TASK.value, None}
+
+
+def format_sse(data: dict, event_id: Optional[str] = None, event: Optional[str] = None) -> str:
+    lines = []
+    if event_id:
+        lines.append(f"id: {event_id}")
+    if event:
+        lines.append(f"event: {event}")
+    lines.append(f"data: {json.dumps(data)}")
+    return "\n".join(lines) + "\n\n"
+
+
+class CycleStreamState:
+    """
+    Tracks what one SSE client has already been sent, so only deltas go out.
+
+    Deltas come from the event hub when the run executes in this process and from
+    cursor-based polling (ids greater than the highest already seen) otherwise.
+    """
+
+    def __init__(self, is_owner: bool):
+        self.is_owner = is_owner
+        self.cycle_statuses: dict[int, str] = {}
+        self.seen_message_ids: set[int] = set()
+        self.last_cycle_id = 0
+        self.last_message_id = 0
+        self.idle_poll_seconds = SSE_POLL_IDLE_MIN_SECONDS
+
+    def load_snapshot(self, cycles_data: list[dict]):
+        for cycle_data in cycles_data:
+            self._track_cycle(cycle_data["id"], cycle_data["status"])
+            for message in cycle_data["messages"]:
+                self._track_message(message["id"])
+
+    def load_resume_point(self, cycles: list[Cycle], last_message_id: int):
+        """
+        Seed a resumed stream from the current rows: the visible cycles and both cursors, so
+        polling continues after them instead of re-sending the chat from id 0.
+        """
+        for cycle in cycles:
+            self._track_cycle(cycle.id, cycle.status)
+        self.last_message_id = max(self.last_message_id, last_message_id)
+
+    def replay_payload(self, event: ChatEvent) -> Optional[dict]:
+        """
+        Payload of an event the client missed. The resume point already holds the latest
+        status of each cycle, so a replayed status change is sent even when it matches.
+        """
+        if event.type != ChatEventHub.CYCLE:
+            return self.to_payload(event)
+        cycle_data = event.data
+        if not (self.is_owner or cycle_data["status"] in NON_OWNER_VISIBLE_CYCLE_STATUSES
+                or cycle_data["id"] in self.cycle_statuses):
+            return None
+        self._track_cycle(cycle_data["id"], cycle_data["status"])
+        return Cycle(**cycle_data).dict()
+
+    def has_started_cycle(self) -> bool:
+        return CycleStatus.STARTED.value in self.cycle_statuses.values()
+
+    def started_cycle_ids(self) -> list[int]:
+        return [cycle_id for cycle_id, status in self.cycle_statuses.items() if status == CycleStatus.STARTED.value]
+
+    def next_poll_seconds(self) -> float:
+        return SSE_POLL_ACTIVE_SECONDS if self.has_started_cycle() else self.idle_poll_seconds
+
+    def back_off(self, changed: bool):
+        if changed:
+            self.idle_poll_seconds = SSE_POLL_IDLE_MIN_SECONDS
+        else:
+            self.idle_poll_seconds = min(self.idle_poll_seconds * 2, SSE_POLL_IDLE_MAX_SECONDS)
+
+    def to_payload(self, event: ChatEvent) -> Optional[dict]:
+        if event.type == ChatEventHub.CYCLE:
+            return self.cycle_payload(event.data)
+        if event.type == ChatEventHub.MESSAGE:
+            return self.message_payload(event.data)
+        return None
+
+    def cycle_payload(self, cycle_data: dict) -> Optional[dict]:
+        cycle_id = cycle_data["id"]
+        if not (self.is_owner or cycle_data["status"] in NON_OWNER_VISIBLE_CYCLE_STATUSES
+                or cycle_id in self.cycle_statuses):
+            return None
+        if self.cycle_statuses.get(cycle_id) == cycle_data["status"]:
+            return None
+        self._track_cycle(cycle_id, cycle_data["status"])
+        return Cycle(**cycle_data).dict()
+
+    def message_payload(self, message_data: dict) -> Optional[dict]:
+        if message_data["role"] not in VISIBLE_MESSAGE_ROLES or message_data["type"] not in VISIBLE_MESSAGE_TYPES:
+            return None
+        if message_data["id"] in self.seen_message_ids:
+            return None
+        if not self.is_owner and message_data["cycle_id"] not in self.cycle_statuses:
+            return None
+        self._track_message(message_data["id"])
+        return {**MessageSimple(**message_data).dict(), "cycle_id": message_data["cycle_id"]}
+
+    def _track_cycle(self, cycle_id: int, status: str):
+        self.cycle_statuses[cycle_id] = status
+        self.last_cycle_id = max(self.last_cycle_id, cycle_id)
+
+    def _track_message(self, message_id: int):
+        self.seen_message_ids.add(message_id)
+        self.last_message_id = max(self.last_message_id, message_id)
+
+
+async def poll_cycle_deltas(session: SessionDep, chat_id: int, state: CycleStreamState) -> list[tuple[str, dict]]:
+    """Fetch only rows newer than the state's cursors plus the status of cycles still running."""
+    started_cycle_ids = state.started_cycle_ids()
+    if state.is_owner:
+        new_cycles = await crud.cycle.get_all_by_chat_id_after(session, chat_id=chat_id, last_cycle_id=state.last_cycle_id)
+    else:
+        new_cycles = await crud.cycle.get_all_finished_and_started_by_chat_id_after(
+            session, chat_id=chat_id, last_cycle_id=state.last_cycle_id)
+    refreshed_cycles = await crud.cycle.get_all_by_ids(session, cycle_ids=started_cycle_ids)
+    new_messages = await crud.message.get_all_by_chat_id_after(
+        session, chat_id=chat_id, last_message_id=state.last_message_id)
+
+    deltas = []
+    for cycle in sorted(refreshed_cycles + new_cycles, key=lambda cycle: cycle.id):
+        payload = state.cycle_payload(cycle.dict())
+        if payload is not None:
+            deltas.append((ChatEventHub.CYCLE, payload))
+    for message in new_messages:
+        payload = state.message_payload(message.dict())
+        if payload is not None:
+            deltas.append((ChatEventHub.MESSAGE, payload))
+    return deltas
+
+
+async def load_resume_point(session: SessionDep, chat_id: int, state: CycleStreamState):
+    if state.is_owner:
+        cycles = await crud.cycle.get_all_by_chat_id(session, chat_id=chat_id)
+    else:
+        cycles = await crud.cycle.get_all_finished_and_started_by_chat_id(session, chat_id=chat_id)
+    last_message_id = await crud.message.get_last_id_by_chat_id(session, chat_id=chat_id)
+    state.load_resume_point(cycles, last_message_id)
 
 
-async def generate_events(session: SessionDep, employed_crew_id: int, chat_id: int):
-    get_employed_crew = await crud.employed_crew.get_active(session, id=employed_crew_id)
+async def generate_events(employed_crew_id: int, chat_id: int, last_event_id: Optional[str] = None):
+    # the body runs after the request's dependencies have exited, so the stream takes a pooled
+    # client from db_pool for each read instead of holding one for its whole lifetime
+    async with deps.db_pool.connection() as session:
+        get_employed_crew = await crud.employed_crew.get_active(session, id=employed_crew_id)
     is_owner = get_employed_crew.is_owner
-
-    previous_data = None
-    while True:
-        current_data = await get_cycles_data(session, chat_id, is_owner)
-
-        if previous_data is None or has_changes(current_data, previous_data):
-            response_data = {
-                "cycles": current_data,
-                "is_owner": is_owner
-            }
-            yield f"data: {json.dumps(response_data)}\n\n"
-            previous_data = current_data
-
-        await asyncio.sleep(1)  # 1초마다 확인
+    state = CycleStreamState(is_owner)
+
+    # subscribe before reading the snapshot so nothing published in between is lost
+    subscription = chat_event_hub.subscribe(chat_id)
+    try:
+        replay = chat_event_hub.replay(chat_id, last_event_id) if last_event_id else None
+        if replay is None:
+            snapshot_event_id = chat_event_hub.current_event_id()
+            async with deps.db_pool.connection() as session:
+                current_data = await get_cycles_data(session, chat_id, is_owner)
+            state.load_snapshot(current_data)
+            yield format_sse({"cycles": current_data, "is_owner": is_owner}, event_id=snapshot_event_id)
+        else:
+            async with deps.db_pool.connection() as session:
+                await load_resume_point(session, chat_id, state)
+            for event in replay:
+                payload = state.replay_payload(event)
+                if payload is not None:
+                    yield format_sse(payload, event_id=event.id, event=event.type)
+
+        loop = asyncio.get_running_loop()
+        last_sent_at = loop.time()
+        while True:
+            try:
+                event = await asyncio.wait_for(subscription.queue.get(), timeout=state.next_poll_seconds())
+            except asyncio.TimeoutError:
+                event = None
+
+            if event is not None:
+                payload = state.to_payload(event)
+                if payload is not None:
+                    last_sent_at = loop.time()
+                    yield format_sse(payload, event_id=event.id, event=event.type)
+                continue
+
+            # no push within the poll interval: poll unless the run is executing here and pushes itself
+            if not chat_event_hub.has_local_run(chat_id):
+                async with deps.db_pool.connection() as session:
+                    deltas = await poll_cycle_deltas(session, chat_id, state)
+                state.back_off(changed=bool(deltas))
+                for event_type, payload in deltas:
+                    last_sent_at = loop.time()
+                    yield format_sse(payload, event=event_type)
+
+            if loop.time() - last_sent_at >= SSE_KEEPALIVE_SECONDS:
+                last_sent_at = loop.time()
+                yield ": keep-alive\n\n"
+    finally:
+        chat_event_hub.unsubscribe(subscription)
 
 
 @router.get("/{employed_crew_id}/chats/{chat_id}/cycles/sse")
 async def read_cycles_sse(
         employed_crew_id: Annotated[int, Path(title="The ID of the Employed Crew to get")],
         chat_id: Annotated[int, Path(title="The ID of the Chat to get")],
-        session: SessionDep
+        request: Request
 ):
-    return StreamingResponse(generate_events(session, employed_crew_id, chat_id),
-                             media_type="text/event-stream")
+    last_event_id = request.headers.get("last-event-id")
+    return StreamingResponse(generate_events(employed_crew_id, chat_id, last_event_id),
+                             media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
 
 @router.get("/{employed_crew_id}/chats/{chat_id}/cycles/{cycle_id}")
 async def read_cycle_by_id(employed_crew_id: Annotated[int, Path(title="The ID of the Employed Crew to get")],
@@ -297,11 +477,8 @@ async def read_cycle_by_id(employed_crew_id: Annotated[int, Path(title="The ID o
     if isinstance(validation_result, JSONResponse):
         return validation_result
     cycle = await crud.cycle.get(session, id=cycle_id)
-    messages = await crud.message.get_all_by_cycle_id(session, cycle_id=cycle.id)
-    message_dtos = [
-        MessageSimple(**message.dict()) for message in messages
-    ]
-    return CycleWithMessage(**cycle.dict(), messages=message_dtos)
+    cycle_with_messages = await load_cycles_with_messages(session, [cycle])
+    return cycle_with_messages[0]
 
 
 @router.post("/{employed_crew_id}/chats/{chat_id}/messages")
@@ -339,10 +516,15 @@ async def kick_off_crew(employed_crew_id: Annotated[int, Path(title="The ID of t
     # if isinstance(validation_result, JSONResponse):
     #     return validation_result
     new_cycle = await crud.cycle.create(session, obj_in=CycleCreate(chat_id=chat_id))
-    result = await crewAiService.CrewAiStartService(session).start(employed_crew_id=employed_crew_id, chat_id=chat_id, cycle_id=new_cycle.id)
-    # await crud.cycle.update_status(session, cycle_id=new_cycle.id, status=CycleStatus.FINISHED)
-    # return Response(content="Success")
-    return result
+    try:
+        run_scheduler.submit(RunJob(employed_crew_id=employed_crew_id, chat_id=chat_id, cycle_id=new_cycle.id,
+                                    tenant_id=get_employed_crew.profile_id))
+    except RunQueueFullError as e:
+        logger.warning(f"Kick-off rejected: {e}, cycle_id: {new_cycle.id}")
+        await crud.cycle.update_status(session, cycle_id=new_cycle.id, status=CycleStatus.ERROR)
+        return JSONResponse(status_code=503, content={"message": "Too many crews are running. Try again later."})
+    # progress is delivered through /cycles/sse
+    return JSONResponse(status_code=202, content={"cycle_id": new_cycle.id, "status": CycleStatus.STARTED.value})
 
 @router.post("/{employed_crew_id}/chats/{chat_id}/stop")
 async def stop_crew(employed_crew_id: Annotated[int, Path(title="The ID of the Employed Crew to get")],
@@ -356,5 +538,5 @@ async def stop_crew(employed_crew_id: Annotated[int, Path(title="The ID of the E
     logging.info(f"Stopping cycle: {cycle.id}")
     if cycle.status == CycleStatus.FINISHED:
         return Response(content="Cycle already finished")
-    result = await crewAiService.CrewAiStartService(session).stop(cycle_id=cycle.id)
+    result = await crewAiService.stop_cycle(session, cycle_id=cycle.id)
     return JSONResponse(content=result)
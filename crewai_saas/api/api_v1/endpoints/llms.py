@@ -1,17 +1,16 @@
-from fastapi import APIRouter
+from typing import Optional
+
+from fastapi import APIRouter, Header, Response
 
 
 from crewai_saas.api.deps import CurrentUser, SessionDep
-from crewai_saas.crud import llm, llm_provider
+from crewai_saas.api.responses import etag_response
+from crewai_saas.crud import catalog
 from crewai_saas.model import Llm, LlmProvider, LlmProviderWithLlms
 
 router = APIRouter()
 
-@router.get("/")
-async def read_llms(session: SessionDep) -> list[LlmProviderWithLlms]:
-    llm_providers = await llm_provider.get_all(session)
-    ret = [
-        LlmProviderWithLlms(**it.dict(), llms=await llm.get_all_by_provider_id(session, provider_id=it.id))
-        for it in llm_providers
-    ]
-    return ret
+@router.get("/", response_model=list[LlmProviderWithLlms])
+async def read_llms(session: SessionDep, if_none_match: Optional[str] = Header(None)) -> Response:
+    entry = await catalog.get(session, catalog.LLMS)
+    return etag_response(entry.body, entry.etag, if_none_match)
@@ -1,25 +1,25 @@
 import logging
 
 from fastapi import APIRouter, HTTPException
-from typing import Annotated
-from fastapi import  Path, Depends
+from typing import Annotated, Optional
+from fastapi import  Path, Depends, Header, Response
 from starlette.responses import JSONResponse
-from crewai_saas.core.google_auth_utils import GoogleAuthUtils
 
-from crewai_saas.api.deps import SessionDep
-from crewai_saas.crud import profile, country, api_key
+from crewai_saas.api.deps import Identity, IdentityDep, SessionDep
+from crewai_saas.api.responses import etag_response
+from crewai_saas.crud import profile, country, api_key, catalog
 from crewai_saas.model import Profile, ProfileCreate, ProfileUpdate, Country, ApiKey, ApiKeyCreate, ApiKeyUpdate
 
 router = APIRouter()
 
-@router.get("/countries")
-async def read_countries(session: SessionDep) -> list[Country]:
-    return await country.get_all(session)
+@router.get("/countries", response_model=list[Country])
+async def read_countries(session: SessionDep, if_none_match: Optional[str] = Header(None)) -> Response:
+    entry = await catalog.get(session, catalog.COUNTRIES)
+    return etag_response(entry.body, entry.etag, if_none_match)
 
 @router.get("/profile_info")
-async def read_profile_by_token(session: SessionDep,
-                         profile_email: str = Depends(GoogleAuthUtils.get_current_user_email)) -> Profile | None:
-    return await profile.get_active_by_email(session, email=profile_email)
+async def read_profile_by_token(identity: IdentityDep) -> Profile | None:
+    return identity.profile
 
 
 @router.get("/{profile_id}")
@@ -40,8 +40,8 @@ async def create_profile(profile_in: ProfileCreate, session: SessionDep) -> Prof
 async def update_profile(profile_id: Annotated[int, Path(title="The ID of the Profile to get")],
                       profile_in: ProfileUpdate,
                       session: SessionDep,
-                      profile_email: str = Depends(GoogleAuthUtils.get_current_user_email)) -> Profile:
-    validation_result = await validate(session, profile_id, profile_email)
+                      identity: IdentityDep) -> Profile:
+    validation_result = await validate_identity(identity, profile_id)
     if isinstance(validation_result, JSONResponse):
         return validation_result
     return await profile.update(session, obj_in=profile_in, id=profile_id)
@@ -50,8 +50,8 @@ async def update_profile(profile_id: Annotated[int, Path(title="The ID of the Pr
 @router.delete("/{profile_id}")
 async def delete_profile(profile_id: Annotated[int, Path(title="The ID of the Profile to get")],
                       session: SessionDep,
-                      profile_email: str = Depends(GoogleAuthUtils.get_current_user_email)) -> Profile:
-    validation_result = await validate(session, profile_id, profile_email)
+                      identity: IdentityDep) -> Profile:
+    validation_result = await validate_identity(identity, profile_id)
     if isinstance(validation_result, JSONResponse):
         return validation_result
     return await profile.soft_delete(session, id=profile_id)
@@ -62,8 +62,8 @@ async def delete_profile(profile_id: Annotated[int, Path(title="The ID of the Pr
 @router.post("/{profile_id}/api-keys")
 async def create_api_key(profile_id: Annotated[int, Path(title="The ID of the Profile to get")],
                          api_key_in: ApiKeyCreate, session: SessionDep,
-                         profile_email: str = Depends(GoogleAuthUtils.get_current_user_email)) -> ApiKey:
-    validation_result = await validate(session, profile_id, profile_email)
+                         identity: IdentityDep) -> ApiKey:
+    validation_result = await validate_identity(identity, profile_id)
     if isinstance(validation_result, JSONResponse):
         return validation_result
     created_api_key = await api_key.create(session, obj_in=api_key_in)
@@ -74,8 +74,8 @@ async def create_api_key(profile_id: Annotated[int, Path(title="The ID of the Pr
 @router.get("/{profile_id}/api-keys")
 async def read_api_keys(profile_id: Annotated[int, Path(title="The ID of the Profile to get")],
                         session: SessionDep,
-                        profile_email: str = Depends(GoogleAuthUtils.get_current_user_email)) -> list[ApiKey]:
-    validation_result = await validate(session, profile_id, profile_email)
+                        identity: IdentityDep) -> list[ApiKey]:
+    validation_result = await validate_identity(identity, profile_id)
     if isinstance(validation_result, JSONResponse):
         return validation_result
     return await api_key.get_multi_by_owner(session, profile_id)
@@ -90,8 +90,8 @@ async def read_api_keys_by_provider(profile_id: Annotated[int, Path(title="The I
 async def update_api_key(profile_id: Annotated[int, Path(title="The ID of the Profile to get")],
                          api_key_id: Annotated[int, Path(title="The ID of the ApiKey to get")],
                          api_key_in: ApiKeyUpdate, session: SessionDep,
-                         profile_email: str = Depends(GoogleAuthUtils.get_current_user_email)) -> ApiKey:
-    validation_result = await validate(session, profile_id, profile_email)
+                         identity: IdentityDep) -> ApiKey:
+    validation_result = await validate_identity(identity, profile_id)
     if isinstance(validation_result, JSONResponse):
         return validation_result
     return await api_key.update(session, obj_in=api_key_in, id=api_key_id)
@@ -102,17 +102,21 @@ async def update_api_key(profile_id: Annotated[int, Path(title="The ID of the Pr
 async def delete_api_key(profile_id: Annotated[int, Path(title="The ID of the Profile to get")],
                          api_key_id: Annotated[int, Path(title="The ID of the ApiKey to get")],
                          session: SessionDep,
-                         profile_email: str = Depends(GoogleAuthUtils.get_current_user_email)) -> ApiKey:
-
-    await validate(session, profile_id, profile_email)
-    validation_result = await validate(session, profile_id, profile_email)
+                         identity: IdentityDep) -> ApiKey:
+    validation_result = await validate_identity(identity, profile_id)
     if isinstance(validation_result, JSONResponse):
         return validation_result
     return await api_key.delete(session, id=api_key_id)
 
 async def validate(session, profile_id: int, profile_email: str):
+    return await _validation_result(profile.validate_profile(session, profile_id, profile_email), profile_id, profile_email)
+
+async def validate_identity(identity: Identity, profile_id: int):
+    return await _validation_result(identity.validate(profile_id), profile_id, identity.email)
+
+async def _validation_result(validation, profile_id: int, profile_email: str):
     try:
-        await profile.validate_profile(session, profile_id, profile_email)
+        await validation
     except HTTPException as e:
         logging.warning(f"Validation failed: {e}, profile_id: {profile_id}, profile_email: {profile_email}")
         return JSONResponse(status_code=e.status_code, content={"detail": e.detail})
@@ -122,4 +126,4 @@ async def validate(session, profile_id: int, profile_email: str):
     return True
 
 async def get_profile_by_token(session: SessionDep, profile_email: str):
-    return await profile.get_active_by_email(session, email=profile_email)
\ No newline at end of file
+    return await profile.get_active_by_email_cached(session, email=profile_email)
\ No newline at end of file
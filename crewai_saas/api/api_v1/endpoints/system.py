@@ -0,0 +1,53 @@
+from typing import Optional
+
+from fastapi import APIRouter
+
+from crewai_saas import crud
+from crewai_saas.api import deps
+from crewai_saas.core.chat_event_hub import chat_event_hub
+from crewai_saas.core.google_auth_utils import token_claims
+from crewai_saas.service.callback_loop import callback_loop
+from crewai_saas.service.cancellation import cancellation_registry
+from crewai_saas.service.conversation_history import conversation_history
+from crewai_saas.service.crew_definition import crew_definitions
+from crewai_saas.service.knowledge_ingest import knowledge_ingest
+from crewai_saas.service.llm_cache import llm_response_cache
+from crewai_saas.service.llm_registry import llm_registry
+from crewai_saas.service.message_sink import message_sink
+from crewai_saas.service.run_scheduler import run_scheduler
+from crewai_saas.tool.http_client import http_client
+from crewai_saas.tool.knowledge_index import knowledge_index_store
+from crewai_saas.tool.sec_filings import sec_filing_cache
+from crewai_saas.tool.stock_data import stock_data
+
+router = APIRouter()
+
+
+@router.get("/metrics")
+async def read_metrics(admin: deps.SystemAdmin) -> dict:
+    return {
+        "db_pool": deps.db_pool.stats() if deps.db_pool else None,
+        "chat_events": chat_event_hub.stats(),
+        "run_scheduler": run_scheduler.stats(),
+        "callback_loop": callback_loop.metrics(),
+        "message_sink": message_sink.stats(),
+        "cancellation": cancellation_registry.stats(),
+        "conversation_history": conversation_history.stats(),
+        "crew_definitions": crew_definitions.stats(),
+        "token_claims": token_claims.stats(),
+        "profile_cache": crud.profile.cache.stats(),
+        "catalog": crud.catalog.stats(),
+        "llm_registry": llm_registry.stats(),
+        "llm_cache": llm_response_cache.stats(),
+        "knowledge_index": knowledge_index_store.stats(),
+        "knowledge_ingest": knowledge_ingest.stats(),
+        "sec_filings": sec_filing_cache.stats(),
+        "tool_http": http_client.stats(),
+        "stock_data": stock_data.stats(),
+    }
+
+
+@router.post("/catalog/invalidate")
+async def invalidate_catalog(admin: deps.SystemAdmin, name: Optional[str] = None) -> dict:
+    crud.catalog.invalidate(name)
+    return {"invalidated": name or "all"}
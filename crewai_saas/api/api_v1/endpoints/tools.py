@@ -1,11 +1,15 @@
-from fastapi import APIRouter
+from typing import Optional
+
+from fastapi import APIRouter, Header, Response
 
 from crewai_saas.api.deps import CurrentUser, SessionDep
-from crewai_saas.crud import tool
+from crewai_saas.api.responses import etag_response
+from crewai_saas.crud import catalog
 from crewai_saas.model import Tool
 
 router = APIRouter()
 
-@router.get("/tools")
-async def read_tools(session: SessionDep) -> list[Tool]:
-    return await tool.get_all_active(session)
\ No newline at end of file
+@router.get("/tools", response_model=list[Tool])
+async def read_tools(session: SessionDep, if_none_match: Optional[str] = Header(None)) -> Response:
+    entry = await catalog.get(session, catalog.TOOLS)
+    return etag_response(entry.body, entry.etag, if_none_match)
\ No newline at end of file
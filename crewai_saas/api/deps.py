@@ -1,14 +1,21 @@
 
+import asyncio
 import logging
-from typing import Annotated
+from dataclasses import dataclass
+from typing import Annotated, Optional
 
-from fastapi import Depends, HTTPException
+from fastapi import Depends, Header, HTTPException
 from fastapi.security import OAuth2PasswordBearer
 from supabase._async.client import AsyncClient, create_client, ClientOptions
+from crewai_saas import crud
 from crewai_saas.core.config import settings
+from crewai_saas.core.google_auth_utils import GoogleAuthUtils
+from crewai_saas.core.supabase_pool import SupabaseClientPool
+from crewai_saas.model import Profile
 from crewai_saas.model.auth import UserIn
 
 super_client: AsyncClient | None = None
+db_pool: SupabaseClientPool | None = None
 
 
 async def init_super_client() -> None:
@@ -24,6 +31,32 @@ async def init_super_client() -> None:
     )
 
 
+async def init_db_pool() -> None:
+    """shared supabase client pool, opened at life span event"""
+    global db_pool
+
+    logging.info("Initializing supabase client pool")
+
+    db_pool = SupabaseClientPool(
+        settings.SUPABASE_URL,
+        settings.SUPABASE_KEY,
+        size=settings.SUPABASE_POOL_SIZE,
+        timeout=settings.SUPABASE_CLIENT_TIMEOUT,
+        acquire_timeout=settings.SUPABASE_POOL_ACQUIRE_TIMEOUT,
+        max_keepalive_connections=settings.SUPABASE_MAX_KEEPALIVE_CONNECTIONS,
+        keepalive_expiry=settings.SUPABASE_KEEPALIVE_EXPIRY,
+    )
+    await db_pool.open()
+
+
+async def close_db_pool() -> None:
+    global db_pool
+
+    if db_pool:
+        await db_pool.close()
+        db_pool = None
+
+
 reusable_oauth2 = OAuth2PasswordBearer(
     tokenUrl="please login by supabase-js to get token"
 )
@@ -44,16 +77,15 @@ async def get_current_user(access_token: AccessTokenDep) -> UserIn:
 CurrentUser = Annotated[UserIn, Depends(get_current_user)]
 
 async def get_db() -> AsyncClient:
-    client: AsyncClient | None = None
+    if not db_pool:
+        raise HTTPException(status_code=500, detail="Database pool not initialized")
+
     try:
-        client = await create_client(
-            settings.SUPABASE_URL,
-            settings.SUPABASE_KEY,
-            options=ClientOptions(
-                postgrest_client_timeout=10, storage_client_timeout=10
-            ),
-        )
+        client = await db_pool.acquire()
+    except asyncio.TimeoutError:
+        raise HTTPException(status_code=503, detail="Database pool exhausted")
 
+    try:
         yield client
 
     except Exception as e:
@@ -61,5 +93,46 @@ async def get_db() -> AsyncClient:
         raise HTTPException(
             status_code=400, detail="Unknown error occurred"
         )
-
-SessionDep = Annotated[AsyncClient, Depends(get_db)]
\ No newline at end of file
+    finally:
+        db_pool.release(client)
+
+SessionDep = Annotated[AsyncClient, Depends(get_db)]
+
+@dataclass
+class Identity:
+    """the caller's token email and profile, resolved once per request"""
+    session: AsyncClient
+    email: str
+    profile: Optional[Profile]
+
+    async def validate(self, profile_id: int) -> Profile:
+        """Raise 404/403 unless the caller owns profile_id; the success path needs no query."""
+        if self.profile is not None and self.profile.id == profile_id:
+            return self.profile
+        return await crud.profile.validate_profile(self.session, profile_id, self.email)
+
+
+async def get_identity(session: SessionDep,
+                       profile_email: str = Depends(GoogleAuthUtils.get_current_user_email)) -> Identity:
+    profile = await crud.profile.get_active_by_email_cached(session, email=profile_email)
+    return Identity(session=session, email=profile_email, profile=profile)
+
+IdentityDep = Annotated[Identity, Depends(get_identity)]
+
+
+async def get_system_admin(authorization: Optional[str] = Header(None)) -> str:
+    """
+    Operational endpoints expose internals, so the caller's Google ID token is verified
+    against Google's signing keys (not just decoded) and its verified email must be one of
+    SYSTEM_ADMIN_EMAILS.
+    """
+    token_type, _, token = (authorization or "").partition(" ")
+    if token_type.lower() != "bearer" or not token:
+        raise HTTPException(status_code=403, detail="Authorization header missing")
+    # a key refetch blocks on HTTP, so keep it off the event loop
+    claims = await asyncio.to_thread(GoogleAuthUtils.decode_google_id_token, token)
+    if not claims or not claims.get("email_verified") or claims.get("email") not in settings.SYSTEM_ADMIN_EMAILS:
+        raise HTTPException(status_code=403, detail="Not allowed")
+    return claims["email"]
+
+SystemAdmin = Annotated[str, Depends(get_system_admin)]
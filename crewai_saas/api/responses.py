@@ -0,0 +1,11 @@
+from typing import Optional
+
+from starlette.responses import Response
+
+
+def etag_response(body: bytes, etag: str, if_none_match: Optional[str]) -> Response:
+    """JSON body with its ETag, or an empty 304 when the client already has that version"""
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if if_none_match and etag in [tag.strip() for tag in if_none_match.split(",")]:
+        return Response(status_code=304, headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
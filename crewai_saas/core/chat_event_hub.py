@@ -0,0 +1,165 @@
+"""
+in-process pub/sub hub for chat updates (new messages, cycle status changes)
+"""
+
+import asyncio
+import itertools
+import logging
+import threading
+import uuid
+from collections import OrderedDict, deque
+from dataclasses import dataclass, field
+from typing import Any, Optional
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class ChatEvent:
+    seq: int
+    chat_id: int
+    type: str
+    data: dict[str, Any]
+    epoch: str
+
+    @property
+    def id(self) -> str:
+        return f"{self.epoch}-{self.seq}"
+
+
+@dataclass(eq=False)
+class ChatSubscription:
+    chat_id: int
+    loop: asyncio.AbstractEventLoop
+    queue: asyncio.Queue = field(default_factory=asyncio.Queue)
+
+
+@dataclass
+class _ChatHistory:
+    events: deque
+    evicted_seq: int = 0
+
+
+class ChatEventHub:
+    """
+    Keeps a short per-chat history so SSE clients can resume with Last-Event-ID.
+
+    publish() may be called from any thread or event loop; events are handed to each
+    subscriber on the loop that created the subscription.
+    """
+
+    MESSAGE = "message_created"
+    CYCLE = "cycle_updated"
+
+    def __init__(self, history_size: int = 256, max_chats: int = 1024):
+        self.history_size = history_size
+        self.max_chats = max_chats
+        self.epoch = uuid.uuid4().hex[:8]
+        self._seq = itertools.count(1)
+        self._last_seq = 0
+        self._lock = threading.Lock()
+        self._histories: OrderedDict[int, _ChatHistory] = OrderedDict()
+        self._subscribers: dict[int, set[ChatSubscription]] = {}
+        self._evicted_chat_seq = 0
+        self._local_runs: dict[int, int] = {}
+        self._published_total = 0
+
+    def publish(self, chat_id: int, type: str, data: dict[str, Any]) -> ChatEvent:
+        with self._lock:
+            seq = next(self._seq)
+            self._last_seq = seq
+            event = ChatEvent(seq=seq, chat_id=chat_id, type=type, data=data, epoch=self.epoch)
+            history = self._histories.get(chat_id)
+            if history is None:
+                history = _ChatHistory(events=deque())
+                self._histories[chat_id] = history
+                if len(self._histories) > self.max_chats:
+                    _, evicted = self._histories.popitem(last=False)
+                    self._evicted_chat_seq = max(self._evicted_chat_seq, evicted.events[-1].seq)
+            else:
+                self._histories.move_to_end(chat_id)
+            history.events.append(event)
+            if len(history.events) > self.history_size:
+                history.evicted_seq = history.events.popleft().seq
+            subscribers = list(self._subscribers.get(chat_id, ()))
+            self._published_total += 1
+
+        for subscription in subscribers:
+            try:
+                subscription.loop.call_soon_threadsafe(subscription.queue.put_nowait, event)
+            except RuntimeError:
+                # subscriber loop already closed; it will be dropped on unsubscribe
+                logger.warning(f"Dropping event for closed subscriber. chat_id: {chat_id}")
+        return event
+
+    def publish_message(self, message: Any) -> None:
+        self.publish(message.chat_id, self.MESSAGE, message.dict())
+
+    def publish_cycle(self, cycle: Any) -> None:
+        if cycle.chat_id is None:
+            return
+        self.publish(cycle.chat_id, self.CYCLE, cycle.dict())
+
+    def subscribe(self, chat_id: int) -> ChatSubscription:
+        subscription = ChatSubscription(chat_id=chat_id, loop=asyncio.get_running_loop())
+        with self._lock:
+            self._subscribers.setdefault(chat_id, set()).add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: ChatSubscription) -> None:
+        with self._lock:
+            subscribers = self._subscribers.get(subscription.chat_id)
+            if subscribers is None:
+                return
+            subscribers.discard(subscription)
+            if not subscribers:
+                del self._subscribers[subscription.chat_id]
+
+    def register_run(self, chat_id: int) -> None:
+        """Mark a crew run for the chat as executing in this process, so its updates arrive by push."""
+        with self._lock:
+            self._local_runs[chat_id] = self._local_runs.get(chat_id, 0) + 1
+
+    def unregister_run(self, chat_id: int) -> None:
+        with self._lock:
+            remaining = self._local_runs.get(chat_id, 0) - 1
+            if remaining > 0:
+                self._local_runs[chat_id] = remaining
+            else:
+                self._local_runs.pop(chat_id, None)
+
+    def has_local_run(self, chat_id: int) -> bool:
+        with self._lock:
+            return chat_id in self._local_runs
+
+    def current_event_id(self) -> str:
+        with self._lock:
+            return f"{self.epoch}-{self._last_seq}"
+
+    def replay(self, chat_id: int, last_event_id: str) -> Optional[list[ChatEvent]]:
+        """Events of the chat after last_event_id, or None when they can no longer be replayed."""
+        epoch, _, seq = last_event_id.partition("-")
+        if epoch != self.epoch or not seq.isdigit():
+            return None
+        last_seq = int(seq)
+        with self._lock:
+            if last_seq > self._last_seq:
+                return None
+            history = self._histories.get(chat_id)
+            if history is None:
+                return None if last_seq < self._evicted_chat_seq else []
+            if last_seq < history.evicted_seq:
+                return None
+            return [event for event in history.events if event.seq > last_seq]
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "chats": len(self._histories),
+                "subscribers": sum(len(subscribers) for subscribers in self._subscribers.values()),
+                "local_runs": sum(self._local_runs.values()),
+                "published_total": self._published_total,
+            }
+
+
+chat_event_hub = ChatEventHub()
@@ -27,7 +27,83 @@ class Settings(BaseSettings):
     SERVER_HOST: AnyHttpUrl = "https://localhost"
     SERVER_PORT: int = 8000
 
+    SUPABASE_POOL_SIZE: int = 10
+    SUPABASE_POOL_ACQUIRE_TIMEOUT: float = 5.0
+    SUPABASE_CLIENT_TIMEOUT: int = 10
+    SUPABASE_MAX_KEEPALIVE_CONNECTIONS: int = 20
+    SUPABASE_KEEPALIVE_EXPIRY: float = 60.0
+    # rows per request for reads that can grow past PostgREST's max-rows (1000 by default)
+    SUPABASE_PAGE_SIZE: int = 1000
+
+    RUN_WORKERS: int = 4
+    RUN_PER_TENANT_LIMIT: int = 2
+    RUN_QUEUE_SIZE: int = 100
+
+    MESSAGE_SINK_BATCH_SIZE: int = 50
+    MESSAGE_SINK_FLUSH_INTERVAL: float = 0.2
+    MESSAGE_SINK_TOUCH_INTERVAL: float = 5.0
+    MESSAGE_SINK_RETRIES: int = 3
+    MESSAGE_SINK_RETRY_BACKOFF: float = 0.2
+
+    CANCELLATION_POLL_INTERVAL: float = 2.0
+
+    HISTORY_TOKEN_BUDGET: int = 4000
+    HISTORY_CACHE_CHATS: int = 1024
+
+    CREW_DEFINITION_CACHE_SIZE: int = 256
+    CREW_DEFINITION_LATEST_TTL: float = 30.0
+
+    PROFILE_CACHE_SIZE: int = 4096
+    PROFILE_CACHE_TTL: float = 30.0
+
+    API_KEY_CACHE_SIZE: int = 1024
+    API_KEY_CACHE_TTL: float = 300.0
+
+    CATALOG_TTL: float = 600.0
+
+    LLM_CACHE_BACKEND: str = "memory"  # memory | sqlite | none
+    LLM_CACHE_SIZE: int = 4096
+    LLM_CACHE_TTL: float = 86400.0
+    LLM_CACHE_SQLITE_PATH: str = "llm_cache.sqlite3"
+    LLM_CACHE_CREW_TTLS: dict[int, float] = {}  # crew id -> ttl; crews not listed are not cached
+    LLM_CLIENT_CACHE_SIZE: int = 64
+    LLM_CLIENT_TTL: float = 3600.0
+
+    USAGE_AVERAGE_ALPHA: float = 0.2
+
+    KNOWLEDGE_INDEX_DIR: str = "knowledge_index"
+    KNOWLEDGE_EMBEDDING_MODEL: str = "text-embedding-3-small"
+    KNOWLEDGE_CHUNK_SIZE: int = 1000
+    KNOWLEDGE_CHUNK_OVERLAP: int = 150
+    KNOWLEDGE_TOP_K: int = 4
+    KNOWLEDGE_INGEST_CONCURRENCY: int = 2
+    KNOWLEDGE_UPLOAD_CHUNK_SIZE: int = 1024 * 1024
+
+    TOOL_HTTP_TIMEOUT: float = 15.0
+    TOOL_HTTP_POOL_SIZE: int = 20
+    TOOL_HTTP_RETRIES: int = 2
+    TOOL_HTTP_BACKOFF: float = 0.5
+    TOOL_RESULT_CACHE_SIZE: int = 1024
+    TOOL_RESULT_CACHE_TTL: float = 300.0
+
+    SEC_FILING_CACHE_DIR: str = "sec_filings"
+    SEC_EMBEDDING_MODEL: str = "text-embedding-3-small"
+    SEC_EMBEDDING_BATCH_SIZE: int = 256
+    SEC_EMBEDDING_WORKERS: int = 4
+    SEC_FILING_LOOKUP_TTL: float = 3600.0
+    SEC_OPEN_FILINGS: int = 16
+
+    STOCK_DATA_BACKEND: str = "yfinance"  # yfinance | fixtures | record
+    STOCK_FIXTURES_DIR: str = "stock_fixtures"
+    STOCK_DATA_CACHE_SIZE: int = 512
+    STOCK_PRICE_TTL: float = 300.0
+    STOCK_STATEMENT_TTL: float = 86400.0
+    STOCK_INSIDER_TTL: float = 3600.0
+    STOCK_NEWS_TTL: float = 600.0
+
     BACKEND_CORS_ORIGINS: list[AnyHttpUrl] = []
+    # token emails allowed to use the /system endpoints; empty means nobody
+    SYSTEM_ADMIN_EMAILS: list[str] = []
 
     PROJECT_NAME: str = "fastapi supabase template"
 
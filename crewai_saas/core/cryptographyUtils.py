@@ -3,11 +3,18 @@ import os
 
 from cryptography.fernet import Fernet
 
-from cryptography.fernet import Fernet
-import os
-
 
 class CryptographyUtils:
+    """
+    Fernet encryption for stored secrets.
+
+    Values are stored as "v2:" followed by the Fernet token, which is already url-safe
+    base64. Rows written before the version prefix hold base64 of the token and are
+    still readable; migrate() rewrites them to v2 without decrypting.
+    """
+
+    VERSION_PREFIX = "v2:"
+
     def __init__(self):
         api_encryption_key = os.getenv("API_ENCRYPTION_KEY")
         if not api_encryption_key:
@@ -16,11 +23,27 @@ class CryptographyUtils:
         self.cipher_suite = Fernet(api_encryption_key)
 
     def encrypt(self, value: str) -> str:
-        byte_value =  self.cipher_suite.encrypt(value.encode())
-        return base64.b64encode(byte_value).decode('utf-8')
+        return self.VERSION_PREFIX + self.cipher_suite.encrypt(value.encode()).decode()
 
     def decrypt(self, value: str) -> str:
-        decoded_value = base64.b64decode(value).decode('utf-8')
-        return self.cipher_suite.decrypt(decoded_value).decode()
+        return self.cipher_suite.decrypt(self._token(value)).decode()
+
+    def decrypt_many(self, values: list[str]) -> list[str]:
+        decrypt = self.cipher_suite.decrypt
+        return [decrypt(self._token(value)).decode() for value in values]
+
+    def is_legacy(self, value: str) -> bool:
+        return not value.startswith(self.VERSION_PREFIX)
+
+    def migrate(self, value: str) -> str:
+        """v2 form of a stored value; the token itself is kept as is."""
+        if not self.is_legacy(value):
+            return value
+        return self.VERSION_PREFIX + base64.b64decode(value).decode()
+
+    def _token(self, value: str) -> bytes:
+        if value.startswith(self.VERSION_PREFIX):
+            return value[len(self.VERSION_PREFIX):].encode()
+        return base64.b64decode(value)
 
-utils = CryptographyUtils()
\ No newline at end of file
+utils = CryptographyUtils()
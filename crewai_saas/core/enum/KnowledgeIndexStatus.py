@@ -0,0 +1,8 @@
+from enum import Enum
+
+
+class KnowledgeIndexStatus(Enum):
+    PENDING = "PENDING"
+    INDEXING = "INDEXING"
+    READY = "READY"
+    FAILED = "FAILED"
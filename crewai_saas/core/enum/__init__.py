@@ -1,4 +1,5 @@
 from .CrewStatus import CrewStatus
 from .CycleStatus import CycleStatus
+from .KnowledgeIndexStatus import KnowledgeIndexStatus
 from .MessageRole import MessageRole
 from .MessageType import MessageType
\ No newline at end of file
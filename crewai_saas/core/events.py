@@ -8,7 +8,15 @@ from contextlib import asynccontextmanager
 
 from fastapi import FastAPI
 
-from crewai_saas.api.deps import init_super_client
+from crewai_saas import crud
+from crewai_saas.api import deps
+from crewai_saas.api.deps import init_super_client, init_db_pool, close_db_pool
+from crewai_saas.service.callback_loop import callback_loop
+from crewai_saas.service.cancellation import cancellation_registry
+from crewai_saas.service.knowledge_ingest import knowledge_ingest
+from crewai_saas.service.llm_cache import llm_response_cache
+from crewai_saas.service.message_sink import message_sink
+from crewai_saas.service.run_scheduler import run_scheduler
 
 
 @asynccontextmanager
@@ -16,6 +24,22 @@ async def lifespan(app: FastAPI) -> AsyncGenerator[None, None]:
     """life span events"""
     try:
         await init_super_client()
+        await init_db_pool()
+        async with deps.db_pool.connection() as session:
+            await crud.catalog.warm(session)
+        llm_response_cache.open()
+        callback_loop.start()
+        message_sink.start()
+        await cancellation_registry.start(deps.db_pool)
+        await run_scheduler.start(deps.db_pool)
+        await knowledge_ingest.start(deps.db_pool)
         yield
     finally:
-        logging.info("lifespan shutdown")
\ No newline at end of file
+        logging.info("lifespan shutdown")
+        await knowledge_ingest.stop()
+        await run_scheduler.stop()
+        await cancellation_registry.stop()
+        message_sink.stop()
+        callback_loop.stop()
+        llm_response_cache.close()
+        await close_db_pool()
\ No newline at end of file
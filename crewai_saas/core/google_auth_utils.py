@@ -1,60 +1,133 @@
+import hashlib
+import logging
 import os
+import re
+import threading
+import time
 import requests
 import jwt
 from fastapi import HTTPException, Header
-from typing import Optional
+from typing import Any, Optional
 from dotenv import load_dotenv
 
-load_dotenv()
+from crewai_saas.core.cache import TTLCache
 
+load_dotenv()
 
-class GoogleAuthUtils:
-    GOOGLE_PUBLIC_KEYS_URL = "https://www.googleapis.com/oauth2/v3/certs"
-    GOOGLE_CLIENT_ID = os.getenv("GOOGLE_CLIENT_ID")
 
-    @staticmethod
-    def get_google_public_keys():
-        response = requests.get(GoogleAuthUtils.GOOGLE_PUBLIC_KEYS_URL)
+logger = logging.getLogger(__name__)
+
+
+class GoogleJwksCache:
+    """
+    Google's signing keys, parsed once and kept by kid.
+
+    The key set is cached for the max-age Google sends in Cache-Control. Once
+    refresh_margin of that lifetime is left, the next lookup refreshes it on a background
+    thread and keeps serving the current keys meanwhile. An unknown kid triggers one
+    blocking refetch, at most once per min_refetch_interval, to pick up rotated keys.
+    """
+
+    DEFAULT_MAX_AGE = 3600.0
+
+    def __init__(self, url: str, *, refresh_margin: float = 0.1, min_refetch_interval: float = 60.0,
+                 timeout: float = 5.0):
+        self.url = url
+        self.refresh_margin = refresh_margin
+        self.min_refetch_interval = min_refetch_interval
+        self.timeout = timeout
+        self._keys: dict[str, Any] = {}
+        self._expires_at = 0.0
+        self._refresh_at = 0.0
+        self._fetched_at = 0.0
+        self._lock = threading.Lock()
+        self._fetch_lock = threading.Lock()
+        self._refreshing = False
+
+    def get_key(self, kid: str) -> Optional[Any]:
+        now = time.monotonic()
+        with self._lock:
+            key = self._keys.get(kid)
+            expired = now >= self._expires_at
+            refresh_due = now >= self._refresh_at and not self._refreshing
+            if key is not None and not expired and refresh_due:
+                self._refreshing = True
+        if key is not None and not expired:
+            if refresh_due:
+                threading.Thread(target=self._refresh_in_background, name="google-jwks-refresh", daemon=True).start()
+            return key
+
+        # missing, expired or an unknown kid: fetch now unless another request just did
+        with self._fetch_lock:
+            with self._lock:
+                key = self._keys.get(kid)
+                if key is not None and time.monotonic() < self._expires_at:
+                    return key
+                recently_fetched = time.monotonic() - self._fetched_at < self.min_refetch_interval
+                if recently_fetched and time.monotonic() < self._expires_at:
+                    return None
+            self.refresh()
+        with self._lock:
+            return self._keys.get(kid)
+
+    def refresh(self) -> None:
+        response = requests.get(self.url, timeout=self.timeout)
         response.raise_for_status()
-        return response.json()
+        keys = {jwk["kid"]: jwt.algorithms.RSAAlgorithm.from_jwk(jwk) for jwk in response.json()["keys"]}
+        max_age = self._parse_max_age(response.headers.get("Cache-Control")) or self.DEFAULT_MAX_AGE
+        now = time.monotonic()
+        with self._lock:
+            self._keys = keys
+            self._fetched_at = now
+            self._expires_at = now + max_age
+            self._refresh_at = now + max_age * (1 - self.refresh_margin)
+        logger.info(f"Google JWKS refreshed. kids: {list(keys)}, max_age: {max_age}")
+
+    def _refresh_in_background(self) -> None:
+        try:
+            with self._fetch_lock:
+                self.refresh()
+        except Exception as e:
+            logger.warning(f"Google JWKS background refresh failed: {e}")
+        finally:
+            with self._lock:
+                self._refreshing = False
 
     @staticmethod
-    def load_jwk(jwk):
+    def _parse_max_age(cache_control: Optional[str]) -> Optional[float]:
+        if not cache_control:
+            return None
+        match = re.search(r"max-age=(\d+)", cache_control)
+        return float(match.group(1)) if match else None
+
 
-        rsa_key = jwt.algorithms.RSAAlgorithm.from_jwk(jwk)
-        return rsa_key
+class GoogleAuthUtils:
+    GOOGLE_PUBLIC_KEYS_URL = "https://www.googleapis.com/oauth2/v3/certs"
+    GOOGLE_CLIENT_ID = os.getenv("GOOGLE_CLIENT_ID")
+    jwks = GoogleJwksCache(GOOGLE_PUBLIC_KEYS_URL)
 
     @staticmethod
     def decode_google_id_token(id_token: str):
         try:
-            public_keys = GoogleAuthUtils.get_google_public_keys()
-            print(f"Public Keys: {public_keys}")
-
             headers = jwt.get_unverified_header(id_token)
-            print(f"Token Headers: {headers}")
             kid = headers.get('kid')
             if not kid:
                 raise HTTPException(status_code=403, detail="Invalid token: Key ID not found in token header")
-            print(f"Key ID: {kid}")
 
-            public_key_data = next((key for key in public_keys['keys'] if key['kid'] == kid), None)
-            if public_key_data is None:
+            public_key = GoogleAuthUtils.jwks.get_key(kid)
+            if public_key is None:
                 raise HTTPException(status_code=403, detail="Invalid token: Public key not found for Key ID")
-            print(f"Public Key Data: {public_key_data}")
-
-            public_key = GoogleAuthUtils.load_jwk(public_key_data)
-            print(f"Public Key: {public_key}")
 
-            payload = jwt.decode(id_token, public_key, algorithms=['RS256'], audience=GoogleAuthUtils.GOOGLE_CLIENT_ID)
-            print(f"Payload: {payload}")
-            return payload
+            return jwt.decode(id_token, public_key, algorithms=['RS256'], audience=GoogleAuthUtils.GOOGLE_CLIENT_ID)
         except jwt.ExpiredSignatureError:
             raise HTTPException(status_code=403, detail="Token has expired")
         except jwt.InvalidTokenError as e:
-            print(f"JWT Decode Error: {e}")
+            logger.info(f"JWT Decode Error: {e}")
             raise HTTPException(status_code=403, detail=f"Invalid token: Token decoding failed with error {e}")
+        except HTTPException:
+            raise
         except Exception as e:
-            print(f"General Error: {e}")
+            logger.error(f"General Error: {e}")
             raise HTTPException(status_code=500, detail=f"Internal server error: {str(e)}")
 
     @staticmethod
@@ -75,16 +148,31 @@ class GoogleAuthUtils:
             raise HTTPException(status_code=500, detail=f"Internal server error: {str(e)}")
 
 
-def extract_email_from_jwt(token: str) -> str:
-    try:
-        payload = jwt.decode(token, options={"verify_signature": False})
-        print(f"Payload: {payload}")
+# decoded claims by sha256 of the token, kept until the token's exp
+TOKEN_CLAIMS_MAX_TTL = 3600.0
+token_claims: TTLCache[dict] = TTLCache(maxsize=4096, ttl=TOKEN_CLAIMS_MAX_TTL)
+
 
-        email = payload.get("email")
-        print(f"Email: {email}")
-        if not email:
-            raise ValueError("Email not found in token")
+def decode_token_claims(token: str) -> dict:
+    key = hashlib.sha256(token.encode()).hexdigest()
+    claims = token_claims.get(key)
+    if claims is not None:
+        return claims
 
-        return email
+    try:
+        claims = jwt.decode(token, options={"verify_signature": False})
     except jwt.DecodeError as e:
-        raise ValueError(f"Invalid token: {e}")
\ No newline at end of file
+        raise ValueError(f"Invalid token: {e}")
+
+    exp = claims.get("exp")
+    ttl = min(exp - time.time(), TOKEN_CLAIMS_MAX_TTL) if isinstance(exp, (int, float)) else TOKEN_CLAIMS_MAX_TTL
+    if ttl > 0:
+        token_claims.set(key, claims, ttl=ttl)
+    return claims
+
+
+def extract_email_from_jwt(token: str) -> str:
+    email = decode_token_claims(token).get("email")
+    if not email:
+        raise ValueError("Email not found in token")
+    return email
@@ -0,0 +1,127 @@
+"""
+process-wide pool of Supabase clients shared by every request
+"""
+
+import asyncio
+import logging
+from contextlib import asynccontextmanager
+from typing import AsyncIterator
+
+import httpx
+from supabase._async.client import AsyncClient, create_client, ClientOptions
+
+logger = logging.getLogger(__name__)
+
+
+class PoolClosedError(Exception):
+    """raised when a client is requested from a pool that has been shut down"""
+
+
+class SupabaseClientPool:
+    """
+    Fixed-size pool of long-lived AsyncClients.
+
+    Every client keeps its PostgREST httpx session (HTTP/2, keep-alive) open for the
+    lifetime of the pool, so requests reuse warm connections instead of paying for
+    client construction and TLS handshakes each time.
+    """
+
+    def __init__(self, url: str, key: str, *, size: int = 10, timeout: int = 10,
+                 acquire_timeout: float = 5.0, max_keepalive_connections: int = 20,
+                 keepalive_expiry: float = 60.0):
+        self.url = url
+        self.key = key
+        self.size = size
+        self.timeout = timeout
+        self.acquire_timeout = acquire_timeout
+        self.max_keepalive_connections = max_keepalive_connections
+        self.keepalive_expiry = keepalive_expiry
+
+        self._clients: list[AsyncClient] = []
+        self._idle: asyncio.Queue[AsyncClient] = asyncio.Queue()
+        self._closed = True
+        self._acquired_total = 0
+        self._released_total = 0
+        self._wait_timeouts = 0
+
+    async def open(self) -> None:
+        for _ in range(self.size):
+            client = await self._create_client()
+            self._clients.append(client)
+            self._idle.put_nowait(client)
+        self._closed = False
+        logger.info(f"Supabase client pool opened. size: {self.size}")
+
+    async def close(self) -> None:
+        self._closed = True
+        for client in self._clients:
+            try:
+                await client.postgrest.aclose()
+                if client._storage is not None:
+                    await client._storage.aclose()
+            except Exception as e:
+                logger.warning(f"Error closing pooled client: {e}")
+        self._clients.clear()
+        self._idle = asyncio.Queue()
+        logger.info(f"Supabase client pool closed. stats: {self.stats()}")
+
+    async def _create_client(self) -> AsyncClient:
+        client = await create_client(
+            self.url,
+            self.key,
+            options=ClientOptions(postgrest_client_timeout=self.timeout, storage_client_timeout=self.timeout),
+        )
+        # postgrest builds its session with httpx defaults; swap it for one with pool limits tuned for reuse
+        postgrest = client.postgrest
+        default_session = postgrest.session
+        postgrest.session = httpx.AsyncClient(
+            base_url=default_session.base_url,
+            headers=default_session.headers,
+            timeout=default_session.timeout,
+            follow_redirects=True,
+            http2=True,
+            limits=httpx.Limits(
+                max_keepalive_connections=self.max_keepalive_connections,
+                keepalive_expiry=self.keepalive_expiry,
+            ),
+        )
+        await default_session.aclose()
+        return client
+
+    async def acquire(self) -> AsyncClient:
+        if self._closed:
+            raise PoolClosedError("Supabase client pool is not open")
+        try:
+            client = await asyncio.wait_for(self._idle.get(), timeout=self.acquire_timeout)
+        except asyncio.TimeoutError:
+            self._wait_timeouts += 1
+            logger.error(f"Timed out waiting for a pooled Supabase client. stats: {self.stats()}")
+            raise
+        self._acquired_total += 1
+        return client
+
+    def release(self, client: AsyncClient) -> None:
+        self._released_total += 1
+        if self._closed:
+            return
+        self._idle.put_nowait(client)
+
+    @asynccontextmanager
+    async def connection(self) -> AsyncIterator[AsyncClient]:
+        client = await self.acquire()
+        try:
+            yield client
+        finally:
+            self.release(client)
+
+    def stats(self) -> dict:
+        checked_in = self._idle.qsize()
+        return {
+            "size": self.size,
+            "checked_in": checked_in,
+            "checked_out": len(self._clients) - checked_in,
+            "acquired_total": self._acquired_total,
+            "released_total": self._released_total,
+            "wait_timeouts": self._wait_timeouts,
+            "closed": self._closed,
+        }
@@ -6,3 +6,4 @@ from .crud_employed_crew import employed_crew, chat, message, cycle
 from .crud_published_crew import published_crew, published_agent, published_task
 from .crud_storage import storage
 from .crud_knowledge import knowledge
+from .crud_catalog import catalog
@@ -0,0 +1,113 @@
+"""
+read-through cache for catalog tables that almost never change (llms, tools, countries)
+"""
+
+import asyncio
+import hashlib
+import json
+import logging
+import time
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Optional
+
+from fastapi.encoders import jsonable_encoder
+from supabase._async.client import AsyncClient
+
+from crewai_saas.core.config import settings
+from crewai_saas.crud.crud_crew import tool
+from crewai_saas.crud.crud_llm import llm, llm_provider
+from crewai_saas.crud.crud_profile import country
+from crewai_saas.model import LlmProviderWithLlms
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class CatalogEntry:
+    value: Any
+    body: bytes
+    etag: str
+    expires_at: float
+
+
+async def _load_llms(db: AsyncClient) -> list[LlmProviderWithLlms]:
+    providers, llms = await asyncio.gather(llm_provider.get_all(db), llm.get_all(db))
+    llms_by_provider: dict[int, list] = {}
+    for item in llms:
+        llms_by_provider.setdefault(item.llm_provider_id, []).append(item)
+    return [LlmProviderWithLlms(**provider.dict(), llms=llms_by_provider.get(provider.id, [])) for provider in providers]
+
+
+class Catalog:
+    """
+    Each catalog table is loaded once and served from memory until ttl passes or it is
+    invalidated. Entries carry the serialized JSON body and its ETag so the endpoints can
+    answer without touching the database or re-encoding.
+    """
+
+    LLMS = "llms"
+    TOOLS = "tools"
+    COUNTRIES = "countries"
+
+    def __init__(self, ttl: float):
+        self.ttl = ttl
+        self._loaders: dict[str, Callable[[AsyncClient], Awaitable[Any]]] = {
+            self.LLMS: _load_llms,
+            self.TOOLS: tool.get_all_active,
+            self.COUNTRIES: country.get_all,
+        }
+        self._entries: dict[str, CatalogEntry] = {}
+        self._locks: dict[str, asyncio.Lock] = {}
+        self._hits = 0
+        self._loads = 0
+
+    async def get(self, db: AsyncClient, name: str) -> CatalogEntry:
+        entry = self._entries.get(name)
+        if entry is not None and entry.expires_at > time.monotonic():
+            self._hits += 1
+            return entry
+
+        # one load per table at a time; concurrent callers wait for it
+        lock = self._locks.setdefault(name, asyncio.Lock())
+        async with lock:
+            entry = self._entries.get(name)
+            if entry is not None and entry.expires_at > time.monotonic():
+                self._hits += 1
+                return entry
+            return await self._load(db, name)
+
+    async def _load(self, db: AsyncClient, name: str) -> CatalogEntry:
+        value = await self._loaders[name](db)
+        body = json.dumps(jsonable_encoder(value), separators=(",", ":")).encode()
+        entry = CatalogEntry(
+            value=value,
+            body=body,
+            etag=f'"{hashlib.sha256(body).hexdigest()[:32]}"',
+            expires_at=time.monotonic() + self.ttl,
+        )
+        self._entries[name] = entry
+        self._loads += 1
+        return entry
+
+    def invalidate(self, name: Optional[str] = None) -> None:
+        if name is None:
+            self._entries.clear()
+        else:
+            self._entries.pop(name, None)
+
+    async def warm(self, db: AsyncClient) -> None:
+        results = await asyncio.gather(*(self._load(db, name) for name in self._loaders), return_exceptions=True)
+        for name, result in zip(self._loaders, results):
+            if isinstance(result, Exception):
+                logger.warning(f"Catalog warm-up failed. name: {name}, error: {result}")
+
+    def stats(self) -> dict:
+        now = time.monotonic()
+        return {
+            "entries": {name: round(entry.expires_at - now, 1) for name, entry in self._entries.items()},
+            "hits": self._hits,
+            "loads": self._loads,
+        }
+
+
+catalog = Catalog(ttl=settings.CATALOG_TTL)
@@ -1,6 +1,6 @@
 from supabase._async.client import AsyncClient
 
-from typing import List
+from typing import List, Optional
 from crewai_saas.core.enum import CrewStatus
 from crewai_saas.crud.base import CRUDBase, UpdateSchemaType
 from crewai_saas.model import Crew, Task, Agent, Tool, TaskContext, CrewCreate, CrewUpdate, TaskCreate, TaskUpdate, AgentCreate, AgentUpdate, TaskContextCreate, TaskContextUpdate, ToolCreate, ToolUpdate
@@ -82,6 +82,15 @@ class CRUDCrew(CRUDBase[Crew, CrewCreate, CrewUpdate]):
         _, updated = data
         return self.model(**updated[0])
 
+    async def compare_and_set_average_token_usage(self, db: AsyncClient, *, crew_id: int, expected: Optional[int],
+                                                  average_token_usage: int) -> bool:
+        """Update only if the stored average is still expected; False when another run wrote first."""
+        query = db.table(self.model.table_name).update({"average_token_usage": average_token_usage}).eq("id", crew_id)
+        query = query.is_("average_token_usage", "null") if expected is None else query.eq("average_token_usage", expected)
+        data, _ = await query.execute()
+        _, updated = data
+        return bool(updated)
+
 
 class CRUDTask(CRUDBase[Task, TaskCreate, TaskUpdate]):
     async def create(self, db: AsyncClient, *, obj_in: TaskCreate) -> Task:
@@ -2,6 +2,8 @@ from typing import Optional, List
 
 from supabase._async.client import AsyncClient
 
+from crewai_saas.core.chat_event_hub import chat_event_hub
+from crewai_saas.core.config import settings
 from crewai_saas.crud.base import CRUDBase, ReadBase
 from crewai_saas.model import EmployedCrew, EmployedCrewCreate, EmployedCrewUpdate, Chat, ChatCreate, ChatUpdate, MessageCreate, Message, MessageUpdate, CycleCreate, Cycle, CycleUpdate
 from crewai_saas.core.enum.CycleStatus import CycleStatus
@@ -44,9 +46,23 @@ class CRUDMessage(CRUDBase[Message, MessageCreate, MessageUpdate]):
     async def create(self, db: AsyncClient, *, obj_in: MessageCreate) -> Message:
         data, count = await db.table(self.model.table_name).insert(obj_in.dict()).execute()
         _, got = data
-        chat_data = await chat.update_time(db, chat_id=obj_in.chat_id)
+        await self.touch(db, chat_id=obj_in.chat_id)
+        created = self.model(**got[0])
+        chat_event_hub.publish_message(created)
+        return created
+
+    async def create_many(self, db: AsyncClient, *, objs_in: list[MessageCreate]) -> list[Message]:
+        """Bulk insert in the given order; the caller is responsible for touching the chats."""
+        data, count = await db.table(self.model.table_name).insert([obj_in.dict() for obj_in in objs_in]).execute()
+        _, got = data
+        created = [self.model(**item) for item in got]
+        for message in created:
+            chat_event_hub.publish_message(message)
+        return created
+
+    async def touch(self, db: AsyncClient, *, chat_id: int) -> None:
+        chat_data = await chat.update_time(db, chat_id=chat_id)
         await db.table("employed_crew").update({"updated_at": "now()"}).eq("id", chat_data.employed_crew_id).execute()
-        return self.model(**got[0])
 
     async def get_all_by_chat_id(self, db: AsyncClient, *, chat_id: int) -> list[Message]:
         data, count = await db.table(self.model.table_name).select("*").eq("chat_id", chat_id).order("id", desc=True).execute()
@@ -65,13 +81,69 @@ class CRUDMessage(CRUDBase[Message, MessageCreate, MessageUpdate]):
         _, got = data
         return [self.model(**item) for item in got]
 
+    async def get_all_by_chat_id_after(self, db: AsyncClient, *, chat_id: int, last_message_id: int) -> list[Message]:
+        data, count = await db.table(self.model.table_name) \
+            .select("*") \
+            .eq("chat_id", chat_id) \
+            .gt("id", last_message_id) \
+            .or_("type.eq.task,type.is.null") \
+            .in_("role", ["user", "assistant"]) \
+            .order("id", desc=False) \
+            .execute()
+
+        _, got = data
+        return [self.model(**item) for item in got]
+
+    async def get_last_id_by_chat_id(self, db: AsyncClient, *, chat_id: int) -> int:
+        data, count = await db.table(self.model.table_name).select("id").eq("chat_id", chat_id).order("id", desc=True).limit(1).execute()
+        _, got = data
+        return got[0]["id"] if got else 0
+
+    async def get_all_by_cycle_ids(self, db: AsyncClient, *, cycle_ids: list[int]) -> list[Message]:
+        """Read in pages, since PostgREST silently truncates a single select at max-rows."""
+        if not cycle_ids:
+            return []
+        page_size = settings.SUPABASE_PAGE_SIZE
+        messages = []
+        while True:
+            data, count = await db.table(self.model.table_name) \
+                .select("*") \
+                .in_("cycle_id", cycle_ids) \
+                .or_("type.eq.task,type.is.null") \
+                .in_("role", ["user", "assistant"]) \
+                .order("id", desc=False) \
+                .range(len(messages), len(messages) + page_size - 1) \
+                .execute()
+
+            _, got = data
+            messages.extend(self.model(**item) for item in got)
+            if len(got) < page_size:
+                return messages
+
 class CRUDCycle(CRUDBase[Cycle, CycleCreate, CycleUpdate]):
 
+    async def create(self, db: AsyncClient, *, obj_in: CycleCreate) -> Cycle:
+        created = await super().create(db, obj_in=obj_in)
+        chat_event_hub.publish_cycle(created)
+        return created
+
+    async def update(self, db: AsyncClient, *, obj_in: CycleUpdate, id: int) -> Cycle:
+        updated = await super().update(db, obj_in=obj_in, id=id)
+        chat_event_hub.publish_cycle(updated)
+        return updated
+
     async def get_all_by_chat_id(self, db: AsyncClient, *, chat_id: int) -> list[Cycle]:
         data, count = await db.table(self.model.table_name).select("*").eq("chat_id", chat_id).order("id", desc=True).execute()
         _, got = data
         return [self.model(**item) for item in got]
 
+    async def get_all_by_ids(self, db: AsyncClient, *, cycle_ids: list[int]) -> List[Cycle]:
+        if not cycle_ids:
+            return []
+        data, count = await db.table(self.model.table_name).select("*").in_("id", cycle_ids).execute()
+        _, got = data
+        return [self.model(**item) for item in got]
+
     async def get_all_by_chat_id_after(self, db: AsyncClient, *, chat_id: int, last_cycle_id: int) -> List[Cycle]:
         data, count = await db.table(self.model.table_name)\
             .select("*")\
@@ -87,6 +159,17 @@ class CRUDCycle(CRUDBase[Cycle, CycleCreate, CycleUpdate]):
         _, got = data
         return [self.model(**item) for item in got]
 
+    async def get_finished_ids_by_chat_id_after(self, db: AsyncClient, *, chat_id: int, last_cycle_id: int) -> list[int]:
+        data, count = await db.table(self.model.table_name) \
+            .select("id") \
+            .eq("chat_id", chat_id) \
+            .eq("status", CycleStatus.FINISHED.value) \
+            .gt("id", last_cycle_id) \
+            .order("id", desc=False) \
+            .execute()
+        _, got = data
+        return [item["id"] for item in got]
+
     async def get_all_finished_and_started_by_chat_id(self, db: AsyncClient, *, chat_id: int) -> list[Cycle]:
         data, count = await db.table(self.model.table_name).select("*").eq("chat_id", chat_id).in_("status", [CycleStatus.FINISHED.value, CycleStatus.STARTED.value]).order("id", desc=False).execute()
         _, got = data
@@ -117,7 +200,9 @@ class CRUDCycle(CRUDBase[Cycle, CycleCreate, CycleUpdate]):
     async def update_status(self, db: AsyncClient, *, cycle_id: int, status: CycleStatus) -> Cycle:
         data, count = await db.table(self.model.table_name).update({"status": status.value}).eq("id", cycle_id).execute()
         _, got = data
-        return self.model(**got[0])
+        updated = self.model(**got[0])
+        chat_event_hub.publish_cycle(updated)
+        return updated
 
 
     async def update_execution_id(self, db: AsyncClient, *, cycle_id: int, execution_id: str) -> Cycle:
@@ -1,5 +1,6 @@
 from supabase._async.client import AsyncClient
 
+from crewai_saas.core.enum import KnowledgeIndexStatus
 from crewai_saas.crud.base import CRUDBase, UpdateSchemaType, CRDBase
 from crewai_saas.model import Knowledge, KnowledgeCreate
 
@@ -26,6 +27,37 @@ class CRDKnowledge(CRDBase[Knowledge, KnowledgeCreate]):
                                                                                                           False)
         return await self._execute_multi_query(query)
 
+    async def create_many(self, db: AsyncClient, *, objs_in: list[KnowledgeCreate]) -> list[Knowledge]:
+        if not objs_in:
+            return []
+        query = db.table(self.model.table_name).insert([obj_in.dict() for obj_in in objs_in])
+        return await self._execute_multi_query(query)
+
+    async def delete_all_by_published_agent_ids(self, db: AsyncClient, *, published_agent_ids: list[int]) -> None:
+        if not published_agent_ids:
+            return
+        await db.table(self.model.table_name).delete().in_("published_agent_id", published_agent_ids).execute()
+
+    async def get_all_active_by_agent_ids(self, db: AsyncClient, *, agent_ids: list[int]) -> list[Knowledge]:
+        if not agent_ids:
+            return []
+        query = db.table(self.model.table_name).select("*").in_("agent_id", agent_ids).eq("is_deleted", False)
+        return await self._execute_multi_query(query)
+
+    async def get_all_active_by_published_agent_ids(self, db: AsyncClient, *, published_agent_ids: list[int]) -> list[Knowledge]:
+        if not published_agent_ids:
+            return []
+        query = db.table(self.model.table_name).select("*").in_("published_agent_id", published_agent_ids).eq("is_deleted", False)
+        return await self._execute_multi_query(query)
+
+    async def update_index_status_by_file_path(self, db: AsyncClient, *, file_path: str,
+                                               index_status: KnowledgeIndexStatus,
+                                               content_hash: str | None = None) -> None:
+        """Update every row pointing at file_path, so published copies follow the original."""
+        update_data = {"index_status": index_status.value}
+        if content_hash is not None:
+            update_data["content_hash"] = content_hash
+        await db.table(self.model.table_name).update(update_data).eq("file_path", file_path).execute()
 
     async def get_all_active(self, db: AsyncClient) -> list[Knowledge]:
         return await super().get_all_active(db)
@@ -1,12 +1,23 @@
+import hashlib
+import logging
 from typing import List
 from fastapi import HTTPException
 from supabase._async.client import AsyncClient
 
+from crewai_saas.core.cache import TTLCache
+from crewai_saas.core.config import settings
 from crewai_saas.core.cryptographyUtils import utils
 from crewai_saas.crud.base import CRUDBase, ReadBase
 from crewai_saas.model import *
 
 class CRUDProfile(CRUDBase[Profile, ProfileCreate, ProfileUpdate]):
+    def __init__(self, model: type[Profile]):
+        super().__init__(model)
+        # active profiles by email; short-lived, dropped whenever the profile is written
+        self.cache: TTLCache[Profile] = TTLCache(maxsize=settings.PROFILE_CACHE_SIZE, ttl=settings.PROFILE_CACHE_TTL)
+        # profile id -> email of its cache entry, bounded like the cache itself
+        self._cached_emails: TTLCache[str] = TTLCache(maxsize=settings.PROFILE_CACHE_SIZE, ttl=settings.PROFILE_CACHE_TTL)
+
     async def create(self, db: AsyncClient, *, obj_in: ProfileCreate) -> Profile:
         existing_profile = await self.get_active_by_email(db, email=obj_in.email)
 
@@ -27,6 +38,35 @@ class CRUDProfile(CRUDBase[Profile, ProfileCreate, ProfileUpdate]):
     async def get_active_by_email(self, db: AsyncClient, *, email: str) -> Profile | None:
         return await super().get_active_by_email(db, email=email)
 
+    async def get_active_by_email_cached(self, db: AsyncClient, *, email: str) -> Profile | None:
+        cached = self.cache.get(email)
+        if cached is not None:
+            # keep the id entry as recently used as the profile, so invalidate() can still find it
+            self._cached_emails.get(cached.id)
+            return cached
+        got = await super().get_active_by_email(db, email=email)
+        if got is not None:
+            self.cache.set(email, got)
+            self._cached_emails.set(got.id, email)
+        return got
+
+    def invalidate(self, profile_id: int) -> None:
+        email = self._cached_emails.pop(profile_id)
+        if email is not None:
+            self.cache.pop(email)
+
+    async def update(self, db: AsyncClient, *, obj_in: ProfileUpdate, id: int) -> Profile:
+        try:
+            return await super().update(db, obj_in=obj_in, id=id)
+        finally:
+            self.invalidate(id)
+
+    async def soft_delete(self, db: AsyncClient, *, id: int) -> Profile:
+        try:
+            return await super().soft_delete(db, id=id)
+        finally:
+            self.invalidate(id)
+
     async def get_all(self, db: AsyncClient) -> list[Profile]:
         return await super().get_all(db)
 
@@ -37,16 +77,20 @@ class CRUDProfile(CRUDBase[Profile, ProfileCreate, ProfileUpdate]):
         return await super().get_multi_by_owner(db, profile_id=profile_id)
 
     async def delete(self, db: AsyncClient, *, id: int) -> Profile:
-        return await super().delete(db, id=id)
+        try:
+            return await super().delete(db, id=id)
+        finally:
+            self.invalidate(id)
 
     async def validate_profile(self, db: AsyncClient, profile_id: int, profile_email: str) -> Profile:
+        get_profile_by_email = await self.get_active_by_email_cached(db, email=profile_email)
+        if get_profile_by_email is not None and get_profile_by_email.id == profile_id:
+            return get_profile_by_email
+        # only the failure path needs the target profile, to tell 404 from 403
         get_profile = await super().get_active(db, id=profile_id)
-        get_profile_by_email = await super().get_active_by_email(db, email=profile_email)
         if get_profile is None or get_profile_by_email is None:
             raise HTTPException(status_code=404, detail="Profile not found.")
-        if get_profile.email != profile_email:
-            raise HTTPException(status_code=403, detail="Profile ID does not match the token information.")
-        return get_profile
+        raise HTTPException(status_code=403, detail="Profile ID does not match the token information.")
 
 
 class ReadCountry(ReadBase[Country]):
@@ -60,49 +104,74 @@ class ReadCountry(ReadBase[Country]):
         return await super().get_multi_by_owner(db, profile_id=profile_id)
 
 class CRUDApiKey(CRUDBase[ApiKey, ApiKeyCreate, ApiKeyUpdate]):
+    def __init__(self, model: type[ApiKey]):
+        super().__init__(model)
+        # plaintext by (id, sha256 of the stored ciphertext); a rewritten key never hits a stale entry
+        self.secrets: TTLCache[str] = TTLCache(maxsize=settings.API_KEY_CACHE_SIZE, ttl=settings.API_KEY_CACHE_TTL)
+
     async def create(self, db: AsyncClient, *, obj_in: ApiKeyCreate) -> ApiKey:
         obj_in.value = utils.encrypt(obj_in.value)
         return await super().create(db, obj_in=obj_in)
 
+    async def update(self, db: AsyncClient, *, obj_in: ApiKeyUpdate, id: int) -> ApiKey:
+        if obj_in.value:
+            obj_in = obj_in.model_copy(update={"value": utils.encrypt(obj_in.value)})
+        return await super().update(db, obj_in=obj_in, id=id)
+
     async def get(self, db: AsyncClient, *, id: int) -> ApiKey | None:
-        api_key = await super().get(db, id=id)
-        decrypted_api_key = utils.decrypt(api_key.value)
-        api_key.value = decrypted_api_key
-        return api_key
+        query = db.table(self.model.table_name).select("*").eq("id", id)
+        got = await self._execute_decrypted_query(db, query)
+        return got[0] if got else None
+
     async def get_active(self, db: AsyncClient, *, id: int) -> ApiKey | None:
-        api_key = await super().get_active(db, id=id)
-        decrypted_api_key = utils.decrypt(api_key.value)
-        api_key.value = decrypted_api_key
-        return api_key
+        query = db.table(self.model.table_name).select("*").eq("id", id).eq("is_deleted", False)
+        got = await self._execute_decrypted_query(db, query)
+        return got[0] if got else None
 
     async def get_all(self, db: AsyncClient) -> list[ApiKey]:
-        api_keys = await super().get_all(db)
-        return [
-            ApiKey(**{**api_key.dict(), 'value': utils.decrypt(api_key.value)})
-            for api_key in api_keys
-        ]
+        query = db.table(self.model.table_name).select("*")
+        return await self._execute_decrypted_query(db, query)
 
     async def get_all_active(self, db: AsyncClient) -> list[ApiKey]:
-        api_keys= await super().get_all_active(db)
-        return [
-            ApiKey(**{**api_key.dict(), 'value': utils.decrypt(api_key.value)})
-            for api_key in api_keys
-        ]
+        query = db.table(self.model.table_name).select("*").eq("is_deleted", False)
+        return await self._execute_decrypted_query(db, query)
 
     async def get_multi_by_owner(self, db: AsyncClient, profile_id: int) -> List[ApiKey]:
-        api_keys = await super().get_multi_by_owner(db, profile_id=profile_id)
-
-        return [
-            ApiKey(**{**api_key.dict(), 'value': utils.decrypt(api_key.value)})
-            for api_key in api_keys
-        ]
+        query = db.table(self.model.table_name).select("*").eq("profile_id", profile_id)
+        return await self._execute_decrypted_query(db, query)
 
     async def get_all_active_by_owner(self, db: AsyncClient, profile_id: int) -> list[ApiKey]:
-        api_keys = await super().get_all_active_by_owner(db, profile_id=profile_id)
-        return [
-            ApiKey(**{**api_key.dict(), 'value': utils.decrypt(api_key.value)})
-            for api_key in api_keys
-        ]
+        query = db.table(self.model.table_name).select("*").eq("profile_id", profile_id).eq("is_deleted", False)
+        return await self._execute_decrypted_query(db, query)
+
+    async def _execute_decrypted_query(self, db: AsyncClient, query) -> list[ApiKey]:
+        data, _ = await query.execute()
+        _, got = data
+        return await self.decrypt_rows(db, got)
+
+    async def decrypt_rows(self, db: AsyncClient, rows: list[dict]) -> list[ApiKey]:
+        """Models with plaintext values, decrypting only the rows missing from the secret cache."""
+        cache_keys = [(row["id"], hashlib.sha256((row["value"] or "").encode()).hexdigest()) for row in rows]
+        plaintexts = [self.secrets.get(cache_key) for cache_key in cache_keys]
+        missing = [i for i, plaintext in enumerate(plaintexts) if plaintext is None and rows[i]["value"]]
+        if missing:
+            for i, plaintext in zip(missing, utils.decrypt_many([rows[i]["value"] for i in missing])):
+                plaintexts[i] = plaintext
+                self.secrets.set(cache_keys[i], plaintext)
+
+        legacy = [row for row in rows if row["value"] and utils.is_legacy(row["value"])]
+        if legacy:
+            await self._migrate(db, legacy)
+
+        return [self.model(**{**row, "value": plaintext or row["value"]}) for row, plaintext in zip(rows, plaintexts)]
+
+    async def _migrate(self, db: AsyncClient, rows: list[dict]) -> None:
+        # drop the extra base64 layer in place; the Fernet token itself is unchanged
+        for row in rows:
+            try:
+                await db.table(self.model.table_name).update({"value": utils.migrate(row["value"])}).eq("id", row["id"]).eq("value", row["value"]).execute()
+            except Exception as e:
+                logging.warning(f"API key migration failed. id: {row['id']}, error: {e}")
 
     async def get_active_by_llm_provider_id(self, db: AsyncClient, *, llm_provider_id: int) -> ApiKey | None:
         return await db.table(self.model.table_name).select("*").eq("llm_provider_id", llm_provider_id).execute()
@@ -113,13 +182,9 @@ class CRUDApiKey(CRUDBase[ApiKey, ApiKeyCreate, ApiKeyUpdate]):
         return [self.model(**item) for item in got][0]
 
     async def get_by_profile_id_and_llm_provider_id(self, db: AsyncClient, *, profile_id: int, llm_provider_id: int) -> ApiKey | None:
-        data, count = await db.table(self.model.table_name).select("*").eq("profile_id", profile_id).eq("llm_provider_id", llm_provider_id).execute()
-        _, got = data
-        if not got:
-            return None
-
-        decrypted_api_key = utils.decrypt(self.model(**got[0]).value)
-        return self.model(**got[0]).copy(update={"value": decrypted_api_key})
+        query = db.table(self.model.table_name).select("*").eq("profile_id", profile_id).eq("llm_provider_id", llm_provider_id)
+        got = await self._execute_decrypted_query(db, query)
+        return got[0] if got else None
 
     async def delete(self, db: AsyncClient, *, id: int) -> ApiKey:
         return await super().delete(db, id=id)
@@ -128,14 +193,9 @@ class CRUDApiKey(CRUDBase[ApiKey, ApiKeyCreate, ApiKeyUpdate]):
         provider_id_response = await db.table("llm").select("llm_provider_id").eq("id", llm_id).execute()
         provider_id = provider_id_response.data[0]["llm_provider_id"]
 
-        data, count = await db.table(self.model.table_name).select("*").eq("profile_id", profile_id).eq("llm_provider_id",
-                                                                                                  provider_id).execute()
-        _, got = data
-        if not got:
-            return None
-
-        decrypted_api_key = utils.decrypt(self.model(**got[0]).value)
-        return self.model(**got[0]).copy(update={"value": decrypted_api_key})
+        query = db.table(self.model.table_name).select("*").eq("profile_id", profile_id).eq("llm_provider_id", provider_id)
+        got = await self._execute_decrypted_query(db, query)
+        return got[0] if got else None
 
 
 
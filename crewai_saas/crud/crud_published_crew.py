@@ -15,16 +15,46 @@ class CRDPublishedCrew(CRDBase[PublishedCrew, PublishedCrewCreate]):
         _, updated = data
         return self.model(**updated[0])
 
+    async def publish(self, db: AsyncClient, *, published_crew_id: int, published_task_ids: list[int]) -> PublishedCrew:
+        """Make a snapshot inserted with is_deleted=True visible, together with its task order."""
+        data, _ = await db.table(self.model.table_name).update({"is_deleted": False, "published_task_ids": published_task_ids}).eq("id", published_crew_id).execute()
+        _, updated = data
+        return self.model(**updated[0])
+
 class CRDPublishedTask(CRDBase[PublishedTask, PublishedTaskCreate]):
     async def get_all_active_by_published_crew_id(self, db: AsyncClient, *, published_crew_id: int) -> list[PublishedTask]:
         query = db.table(self.model.table_name).select("*").eq("published_crew_id", published_crew_id).eq("is_deleted", False)
         return await self._execute_multi_query(query)
 
+    async def create_many(self, db: AsyncClient, *, objs_in: list[PublishedTaskCreate]) -> list[PublishedTask]:
+        if not objs_in:
+            return []
+        query = db.table(self.model.table_name).insert([obj_in.dict() for obj_in in objs_in])
+        return await self._execute_multi_query(query)
+
+    async def upsert_many(self, db: AsyncClient, *, objs: list[PublishedTask]) -> list[PublishedTask]:
+        if not objs:
+            return []
+        query = db.table(self.model.table_name).upsert([obj.dict() for obj in objs])
+        return await self._execute_multi_query(query)
+
+    async def delete_all_by_published_crew_id(self, db: AsyncClient, *, published_crew_id: int) -> None:
+        await db.table(self.model.table_name).delete().eq("published_crew_id", published_crew_id).execute()
+
 class CRDPublishedAgent(CRDBase[PublishedAgent, PublishedAgentCreate]):
     async def get_all_active_by_published_crew_id(self, db: AsyncClient, *, published_crew_id: int) -> list[PublishedAgent]:
         query = db.table(self.model.table_name).select("*").eq("published_crew_id", published_crew_id).eq("is_deleted", False)
         return await self._execute_multi_query(query)
 
+    async def create_many(self, db: AsyncClient, *, objs_in: list[PublishedAgentCreate]) -> list[PublishedAgent]:
+        if not objs_in:
+            return []
+        query = db.table(self.model.table_name).insert([obj_in.dict() for obj_in in objs_in])
+        return await self._execute_multi_query(query)
+
+    async def delete_all_by_published_crew_id(self, db: AsyncClient, *, published_crew_id: int) -> None:
+        await db.table(self.model.table_name).delete().eq("published_crew_id", published_crew_id).execute()
+
 
 published_crew = CRDPublishedCrew(PublishedCrew)
 published_task = CRDPublishedTask(PublishedTask)
@@ -63,6 +63,9 @@ class MessageCreate(CreateBase):
     chat_id: int
     agent_id: Optional[int] = None
     type: Optional[MessageType] = None
+    cost: Optional[float] = 0
+    input_token: Optional[int] = None
+    output_token: Optional[int] = None
     class Config:
         use_enum_values = True
         arbitrary_types_allowed = True
@@ -1,6 +1,7 @@
 from typing import ClassVar
 from typing import Optional
 
+from crewai_saas.core.enum import KnowledgeIndexStatus
 from crewai_saas.model.base import CreateBase, InDBBase, ResponseBase
 
 
@@ -8,17 +9,32 @@ class KnowledgeCreate(CreateBase):
     agent_id: Optional[int] = None
     published_agent_id: Optional[int] = None
     file_path: Optional[str]
+    index_status: Optional[KnowledgeIndexStatus] = None
+    content_hash: Optional[str] = None
+
+    class Config:
+        use_enum_values = True
 
 class Knowledge(ResponseBase):
     agent_id: Optional[int]
     published_agent_id: Optional[int]
     file_path: Optional[str]
     is_deleted: bool
+    index_status: Optional[KnowledgeIndexStatus] = None
+    content_hash: Optional[str] = None
 
     table_name: ClassVar[str] = "knowledge"
 
+    class Config:
+        use_enum_values = True
+
 class KnowledgeInDB(InDBBase):
     agent_id: Optional[int]
     published_agent_id: Optional[int]
     file_path: Optional[str]
     is_deleted: bool
+    index_status: Optional[KnowledgeIndexStatus]
+    content_hash: Optional[str]
+
+    class Config:
+        use_enum_values = True
@@ -25,6 +25,7 @@ class PublishedCrewCreate(CreateBase):
     profile_id: Optional[int]
     image: Optional[str] = None
     detail: Optional[str] = None
+    is_deleted: bool = False
     class Config:
         use_enum_values = True
         arbitrary_types_allowed = True
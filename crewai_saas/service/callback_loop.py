@@ -0,0 +1,114 @@
+import asyncio
+import logging
+import threading
+import time
+from concurrent.futures import Future
+from typing import Any, Coroutine, Optional
+
+from supabase._async.client import AsyncClient, create_client, ClientOptions
+
+from crewai_saas.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class CallbackLoop:
+    """
+    One long-lived event loop thread shared by every crew run.
+
+    Crew step/task callbacks fire on the crew worker threads; they hand their coroutines
+    to this loop instead of each run owning a thread and loop of its own. httpx clients
+    are bound to the loop that uses them, so the loop keeps a Supabase client of its own.
+    """
+
+    def __init__(self):
+        self.loop: Optional[asyncio.AbstractEventLoop] = None
+        self.session: Optional[AsyncClient] = None
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        self._pending = 0
+        self._completed_total = 0
+        self._failed_total = 0
+        self._wait_seconds_total = 0.0
+        self._run_seconds_total = 0.0
+        self._max_wait_seconds = 0.0
+
+    def start(self) -> None:
+        self.loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._run_forever, name="crew-callback-loop", daemon=True)
+        self._thread.start()
+        self.session = asyncio.run_coroutine_threadsafe(self._create_session(), self.loop).result()
+        logger.info("Callback loop started")
+
+    def stop(self) -> None:
+        if self.loop is None:
+            return
+        if self.session is not None:
+            asyncio.run_coroutine_threadsafe(self.session.postgrest.aclose(), self.loop).result()
+            self.session = None
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self._thread.join()
+        self.loop.close()
+        self.loop = None
+        self._thread = None
+        logger.info(f"Callback loop stopped. metrics: {self.metrics()}")
+
+    def _run_forever(self) -> None:
+        asyncio.set_event_loop(self.loop)
+        self.loop.run_forever()
+
+    async def _create_session(self) -> AsyncClient:
+        return await create_client(
+            settings.SUPABASE_URL,
+            settings.SUPABASE_KEY,
+            options=ClientOptions(postgrest_client_timeout=settings.SUPABASE_CLIENT_TIMEOUT,
+                                  storage_client_timeout=settings.SUPABASE_CLIENT_TIMEOUT),
+        )
+
+    def submit(self, coro: Coroutine) -> Future:
+        """Schedule coro on the callback loop from any thread."""
+        if self.loop is None:
+            coro.close()
+            raise RuntimeError("Callback loop is not running")
+        with self._lock:
+            self._pending += 1
+        return asyncio.run_coroutine_threadsafe(self._measure(coro, time.monotonic()), self.loop)
+
+    def run(self, coro: Coroutine) -> Any:
+        """Schedule coro on the callback loop and block the calling thread until it finishes."""
+        return self.submit(coro).result()
+
+    async def _measure(self, coro: Coroutine, submitted_at: float) -> Any:
+        started_at = time.monotonic()
+        failed = False
+        try:
+            return await coro
+        except BaseException:
+            failed = True
+            raise
+        finally:
+            finished_at = time.monotonic()
+            wait_seconds = started_at - submitted_at
+            with self._lock:
+                self._pending -= 1
+                self._completed_total += 1
+                self._failed_total += failed
+                self._wait_seconds_total += wait_seconds
+                self._run_seconds_total += finished_at - started_at
+                self._max_wait_seconds = max(self._max_wait_seconds, wait_seconds)
+
+    def metrics(self) -> dict:
+        with self._lock:
+            completed = self._completed_total or 1
+            return {
+                "running": self.loop is not None,
+                "queue_depth": self._pending,
+                "completed_total": self._completed_total,
+                "failed_total": self._failed_total,
+                "avg_wait_ms": round(self._wait_seconds_total / completed * 1000, 2),
+                "max_wait_ms": round(self._max_wait_seconds * 1000, 2),
+                "avg_run_ms": round(self._run_seconds_total / completed * 1000, 2),
+            }
+
+
+callback_loop = CallbackLoop()
@@ -0,0 +1,102 @@
+import asyncio
+import logging
+import threading
+from typing import Optional
+
+from crewai_saas import crud
+from crewai_saas.core.config import settings
+from crewai_saas.core.enum import CycleStatus
+from crewai_saas.core.supabase_pool import SupabaseClientPool
+
+logger = logging.getLogger(__name__)
+
+
+class CycleStoppedError(Exception):
+    def __init__(self, cycle_id: int):
+        super().__init__(f"Cycle stopped! cycle_id: {cycle_id}")
+        self.cycle_id = cycle_id
+
+
+class CancellationRegistry:
+    """
+    Stop flags for the cycles running in this process, keyed by cycle id.
+
+    A stop handled by this process sets the flag directly. Stops handled by another
+    replica are picked up by a background task that reads the status of every active
+    cycle in one query per poll_interval.
+    """
+
+    def __init__(self, poll_interval: float):
+        self.poll_interval = poll_interval
+        self._tokens: dict[int, threading.Event] = {}
+        self._lock = threading.Lock()
+        self._pool: Optional[SupabaseClientPool] = None
+        self._poller: Optional[asyncio.Task] = None
+        self._polls_total = 0
+        self._remote_stops_total = 0
+
+    def register(self, cycle_id: int) -> threading.Event:
+        with self._lock:
+            return self._tokens.setdefault(cycle_id, threading.Event())
+
+    def unregister(self, cycle_id: int) -> None:
+        with self._lock:
+            self._tokens.pop(cycle_id, None)
+
+    def cancel(self, cycle_id: int) -> bool:
+        with self._lock:
+            token = self._tokens.get(cycle_id)
+        if token is None:
+            return False
+        token.set()
+        return True
+
+    def is_cancelled(self, cycle_id: int) -> bool:
+        token = self._tokens.get(cycle_id)
+        return token is not None and token.is_set()
+
+    async def start(self, pool: SupabaseClientPool) -> None:
+        self._pool = pool
+        self._poller = asyncio.create_task(self._poll_forever(), name="cancellation-poller")
+
+    async def stop(self) -> None:
+        if self._poller is None:
+            return
+        self._poller.cancel()
+        await asyncio.gather(self._poller, return_exceptions=True)
+        self._poller = None
+
+    async def _poll_forever(self) -> None:
+        while True:
+            await asyncio.sleep(self.poll_interval)
+            try:
+                await self.poll()
+            except Exception as e:
+                logger.warning(f"Cancellation poll failed: {e}")
+
+    async def poll(self) -> None:
+        with self._lock:
+            cycle_ids = [cycle_id for cycle_id, token in self._tokens.items() if not token.is_set()]
+        if not cycle_ids:
+            return
+        async with self._pool.connection() as session:
+            cycles = await crud.cycle.get_all_by_ids(session, cycle_ids=cycle_ids)
+        self._polls_total += 1
+        for cycle in cycles:
+            if cycle.status == CycleStatus.STOPPED.value and self.cancel(cycle.id):
+                self._remote_stops_total += 1
+                logger.info(f"Cycle stopped by another replica. cycle_id: {cycle.id}")
+
+    def stats(self) -> dict:
+        with self._lock:
+            active = len(self._tokens)
+            cancelled = sum(token.is_set() for token in self._tokens.values())
+        return {
+            "active": active,
+            "cancelled": cancelled,
+            "polls_total": self._polls_total,
+            "remote_stops_total": self._remote_stops_total,
+        }
+
+
+cancellation_registry = CancellationRegistry(poll_interval=settings.CANCELLATION_POLL_INTERVAL)
@@ -0,0 +1,129 @@
+import json
+import logging
+import math
+from collections import OrderedDict
+from dataclasses import dataclass, field
+
+from supabase._async.client import AsyncClient
+
+from crewai_saas import crud
+from crewai_saas.core.config import settings
+from crewai_saas.model import Message
+
+logger = logging.getLogger(__name__)
+
+HEADER = "\n\nConversation History:\n"
+TRUNCATED_NOTE = '{"note": "earlier messages omitted"}'
+
+
+def estimate_tokens(text: str) -> int:
+    # about four characters per token for the supported models; no tokenizer round trip
+    return math.ceil(len(text) / 4)
+
+
+@dataclass
+class _Entry:
+    line: str
+    tokens: int
+
+
+@dataclass
+class _ChatHistory:
+    # finished cycles at or below this id are either cached or fell outside the budget
+    watermark: int = 0
+    cycles: dict[int, list[_Entry]] = field(default_factory=dict)
+    rendered: str = HEADER
+    truncated: bool = False
+
+
+class ConversationHistory:
+    """
+    Builds the conversation history injected into crew tasks.
+
+    Each chat's formatted history is cached; a build only fetches finished cycles that
+    have not been seen yet, with one query for their ids and one for their messages.
+    The rendered history keeps the newest messages that fit in token_budget and drops the
+    oldest ones. Cycles that fell out of the budget are discarded from the cache as well.
+    """
+
+    def __init__(self, *, token_budget: int, max_chats: int):
+        self.token_budget = token_budget
+        self.max_chats = max_chats
+        self._chats: OrderedDict[int, _ChatHistory] = OrderedDict()
+        self._hits = 0
+        self._misses = 0
+
+    async def build(self, session: AsyncClient, chat_id: int) -> str:
+        history = self._chats.get(chat_id)
+        if history is None:
+            history = _ChatHistory()
+            self._misses += 1
+        else:
+            self._chats.move_to_end(chat_id)
+            self._hits += 1
+
+        cycle_ids = await crud.cycle.get_finished_ids_by_chat_id_after(
+            session, chat_id=chat_id, last_cycle_id=history.watermark)
+        new_cycle_ids = [cycle_id for cycle_id in cycle_ids if cycle_id not in history.cycles]
+        if new_cycle_ids:
+            messages = await crud.message.get_all_by_cycle_ids(session, cycle_ids=new_cycle_ids)
+            for cycle_id in new_cycle_ids:
+                history.cycles[cycle_id] = []
+            for message in messages:
+                history.cycles[message.cycle_id].append(self._entry(message))
+            self._render(history)
+
+        self._chats[chat_id] = history
+        if len(self._chats) > self.max_chats:
+            self._chats.popitem(last=False)
+        return history.rendered
+
+    def invalidate(self, chat_id: int) -> None:
+        self._chats.pop(chat_id, None)
+
+    @staticmethod
+    def _entry(message: Message) -> _Entry:
+        line = json.dumps({"role": message.role, "message": message.content}, ensure_ascii=False)
+        return _Entry(line=line, tokens=estimate_tokens(line))
+
+    def _render(self, history: _ChatHistory) -> None:
+        lines = []
+        used = 0
+        kept = {}
+        for cycle_id in sorted(history.cycles, reverse=True):
+            entries = history.cycles[cycle_id]
+            fitting = []
+            for entry in reversed(entries):
+                if used + entry.tokens > self.token_budget:
+                    break
+                used += entry.tokens
+                fitting.append(entry.line)
+            lines.extend(fitting)
+            if len(fitting) < len(entries):
+                history.truncated = True
+                # a partially kept cycle stays cached so the same suffix is rendered next time
+                if fitting:
+                    kept[cycle_id] = entries
+                dropped = [other for other in history.cycles if other <= cycle_id]
+                history.watermark = max(history.watermark, max(dropped))
+                break
+            kept[cycle_id] = entries
+
+        history.cycles = dict(sorted(kept.items()))
+        if history.truncated:
+            lines.append(TRUNCATED_NOTE)
+        history.rendered = HEADER + "\n".join(reversed(lines))
+
+    def stats(self) -> dict:
+        return {
+            "chats": len(self._chats),
+            "hits": self._hits,
+            "misses": self._misses,
+            "token_budget": self.token_budget,
+        }
+
+
+conversation_history = ConversationHistory(
+    token_budget=settings.HISTORY_TOKEN_BUDGET,
+    max_chats=settings.HISTORY_CACHE_CHATS,
+)
@@ -5,19 +5,25 @@ import logging
 import threading
 import inspect
 from textwrap import dedent
-from typing import Dict, List, Any, Optional, Callable, Type
+from typing import Dict, List, Any, Optional, Callable, Type, AsyncContextManager
 from contextlib import asynccontextmanager
 
 from crewai import Agent, Task, Crew
 from crewai_saas import crud
+from crewai_saas.core.chat_event_hub import chat_event_hub
 from crewai_saas.core.enum import CycleStatus, MessageRole, MessageType
-from crewai_saas.model import MessageCreate
+from crewai_saas.model import MessageCreate, Llm
+from crewai_saas.service.conversation_history import conversation_history
+from crewai_saas.service.crew_definition import CrewDefinition, crew_definitions
+from crewai_saas.service.cancellation import cancellation_registry, CycleStoppedError
+from crewai_saas.service.llm_cache import llm_response_cache
+from crewai_saas.service.llm_registry import llm_registry
+from crewai_saas.service.message_sink import message_sink
+from crewai_saas.service.usage import TokenUsage, UsageRecorder, record_crew_usage, run_total
 from crewai_saas.tool import function_map, get_search_tool, UnsupportedFileTypeError
 
 
-from langchain_google_genai import ChatGoogleGenerativeAI
-from langchain_openai import ChatOpenAI
-from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import Executor
 from dotenv import load_dotenv
 load_dotenv()
 
@@ -26,64 +32,81 @@ logging.basicConfig(level=logging.DEBUG, filename='app.log', filemode='a',
 logger = logging.getLogger(__name__)
 
 class CrewAiStartService:
-    def __init__(self, session):
+    def __init__(self, connection: Callable[[], AsyncContextManager], executor: Optional[Executor] = None):
+        """
+        connection opens a short-lived DB session (e.g. SupabaseClientPool.connection); one is
+        held only around each group of DB calls, never while the crew is running.
+        """
         self.cycle_id = None
         self.chat_id = None
         self.api_key = None
         self.llm = None
-        self.session = session
-        self.loop = asyncio.new_event_loop()
-        self.thread = threading.Thread(target=self.start_loop, args=(self.loop,))
-        self.thread.start()
-        self.thread_loop = None
-        self.executor = ThreadPoolExecutor(max_workers=1)
-
-    def start_loop(self, loop: asyncio.AbstractEventLoop):
+        self.llm_row: Optional[Llm] = None
+        self.usage_recorders: Dict[int, UsageRecorder] = {}
+        self.connection = connection
+        self.executor = executor
+
+    def append_message(self, content: str, role: MessageRole, task_id: Optional[int] = None,
+                       agent_id: Optional[int] = None, type: Optional[MessageType] = None,
+                       usage: Optional[TokenUsage] = None):
+        """Called from the crew worker threads; the insert itself is written behind by the message sink."""
         logger.info(f"thread Id : {threading.get_ident()}, method Id : {inspect.currentframe().f_code.co_name}")
-        asyncio.set_event_loop(loop)
-        loop.run_forever()
-        logger.info("Threading loop ended")
-
-    async def append_message(self, content: str, role: MessageRole, task_id: Optional[int] = None,
-                             agent_id: Optional[int] = None, type: Optional[MessageType] = None):
-        logger.info(f"thread Id : {threading.get_ident()}, method Id : {inspect.currentframe().f_code.co_name}")
-        await self.check_cycle_status()
+        self.check_cycle_status()
         logger.info(f"Appending message for cycle: {self.cycle_id} content: {content}")
 
-        message_response = await crud.message.create(
-            self.session,
-            obj_in=MessageCreate(content=content, task_id=task_id, agent_id=agent_id,
-                                 role=role, chat_id=self.chat_id, cycle_id=self.cycle_id, type=type)
-        )
+        message = MessageCreate(content=content, task_id=task_id, agent_id=agent_id,
+                                role=role, chat_id=self.chat_id, cycle_id=self.cycle_id, type=type)
+        if usage is not None:
+            message.input_token = usage.input_token
+            message.output_token = usage.output_token
+            message.cost = usage.cost(self.llm_row)
+        message_sink.enqueue(message)
 
     def create_task_callback(self, task_id: int, task_name: str):
         logger.info(f"thread Id : {threading.get_ident()}, method Id : {inspect.currentframe().f_code.co_name}")
-        async def async_callback(task_output: str):
-            logger.info(f"thread Id : {threading.get_ident()}, method Id : {inspect.currentframe().f_code.co_name}")
-            await self.append_message(f"[task] {task_name} : {task_output}",
-                                      role=MessageRole.ASSISTANT, task_id=task_id, type=MessageType.TASK)
+        def task_callback(task_output: str):
+            self.append_message(f"[task] {task_name} : {task_output}",
+                                role=MessageRole.ASSISTANT, task_id=task_id, type=MessageType.TASK)
 
-        return async_callback
+        return task_callback
 
     def create_agent_callback(self, agent_id: int, agent_name: str):
         logger.info(f"thread Id : {threading.get_ident()}, method Id : {inspect.currentframe().f_code.co_name}")
-        async def async_callback(agent_output: str):
-            logger.info(f"thread Id : {threading.get_ident()}, method Id : {inspect.currentframe().f_code.co_name}")
-            await self.append_message(f"[agent] {agent_name} : {agent_output}",
-                                      role=MessageRole.ASSISTANT, agent_id=agent_id, type=MessageType.AGENT)
+        def step_callback(agent_output: str):
+            # the LLM calls that produced this step, as reported to the agent's usage recorder
+            recorder = self.usage_recorders.get(agent_id)
+            self.append_message(f"[agent] {agent_name} : {agent_output}",
+                                role=MessageRole.ASSISTANT, agent_id=agent_id, type=MessageType.AGENT,
+                                usage=recorder.take_step() if recorder else None)
 
-        return async_callback
-
-    def run_coroutine_in_thread(self, coro: Any):
-        logger.info(f"thread Id : {threading.get_ident()}, method Id : {inspect.currentframe().f_code.co_name}")
-        """Run a coroutine in the thread's event loop and wait for the result."""
-        future = asyncio.run_coroutine_threadsafe(coro, self.loop)
-        return future.result()
+        return step_callback
 
     async def start(self, employed_crew_id: int, chat_id: int, cycle_id: int):
         self.cycle_id = cycle_id
         self.chat_id = chat_id
 
+        # SSE streams of this process rely on push updates while the run is registered
+        chat_event_hub.register_run(chat_id)
+        token = cancellation_registry.register(cycle_id)
+        try:
+            # the cycle may have been stopped while the job was still queued
+            async with self.connection() as session:
+                cycle = await crud.cycle.get(session, id=cycle_id)
+            if cycle and cycle.status == CycleStatus.STOPPED.value:
+                token.set()
+            return await self.run(employed_crew_id)
+        finally:
+            try:
+                # whatever the outcome, the run's queued messages land before the cycle status changes again;
+                # messages lost on a failing path also fail the job, so the scheduler marks the cycle ERROR
+                await asyncio.wrap_future(message_sink.flush(cycle_id))
+            finally:
+                cancellation_registry.unregister(cycle_id)
+                chat_event_hub.unregister_run(chat_id)
+
+    async def run(self, employed_crew_id: int):
+        chat_id = self.chat_id
+
         # Log the current thread and event loop
         current_thread = threading.current_thread()
         current_loop = asyncio.get_event_loop()
@@ -95,20 +118,19 @@ class CrewAiStartService:
         logger.info(
             f"Starting Crew AI Service for employed_crew_id: {employed_crew_id}, chat_id: {self.chat_id}, cycle_id: {self.cycle_id}")
 
-        employed_crew = await self.get_or_raise(crud.employed_crew.get_active, "id", employed_crew_id, "EmployedCrew")
-        crew = await self.get_or_raise(crud.crew.get_active, "id", employed_crew.crew_id, "Crew")
-        published_crew = await self.get_or_raise(crud.published_crew.get_active_by_crew_id_latest, "crew_id", crew.id,
-                                                 "PublishedCrew")
-        is_owner = employed_crew.is_owner
-        running_crew = crew if is_owner else published_crew
-        logger.info(f"Running Crew: {running_crew}")
+        async with self.connection() as session:
+            employed_crew = await self.get_or_raise(session, crud.employed_crew.get_active, "id", employed_crew_id,
+                                                    "EmployedCrew")
+            definition = await crew_definitions.load(session, crew_id=employed_crew.crew_id,
+                                                     is_owner=employed_crew.is_owner)
+            logger.info(f"Running Crew: {definition.running_crew_id}, is_owner: {definition.is_owner}")
 
-        await self.setup_llm(employed_crew.profile_id, running_crew.llm_id, employed_crew.is_owner)
+            self.setup_llm(definition.llm, crew_id=employed_crew.crew_id)
 
-        conversation = await self.get_conversation_history(chat_id)
+            conversation = await self.get_conversation_history(session, chat_id)
 
-        agent_dict = await self.create_agents(is_owner, running_crew)
-        task_dict = await self.create_tasks(is_owner, running_crew, agent_dict, conversation)
+        agent_dict = self.create_agents(definition)
+        task_dict = self.create_tasks(definition, agent_dict, conversation)
         # logger.info(f"Agents: {agent_dict}")
         # logger.info(f"Tasks: {task_dict}")
 
@@ -119,31 +141,38 @@ class CrewAiStartService:
         )
         logger.info(f"CrewAI : {crew_instance}")
 
-        await self.check_cycle_status()
-        result = await crew_instance.kickoff_async()
+        self.check_cycle_status()
+        # kickoff blocks until the crew is done; run it on the scheduler's shared pool when given
+        result = await asyncio.get_running_loop().run_in_executor(self.executor, crew_instance.kickoff)
         metrics = crew_instance.usage_metrics
         logger.info(f"metric: {metrics}")
         logger.info(f"result: {result}")
 
         if result:
-            self.run_coroutine_in_thread(
-                self.append_message("[system] system : metrics: " + str(metrics), role=MessageRole.SYSTEM)
-            )
-            self.run_coroutine_in_thread(
-                crud.cycle.update_status(self.session, cycle_id=self.cycle_id, status=CycleStatus.FINISHED)
-            )
+            self.check_cycle_status()
+            message_sink.enqueue(MessageCreate(content="[system] system : metrics: " + str(metrics),
+                                               role=MessageRole.SYSTEM, chat_id=self.chat_id, cycle_id=self.cycle_id))
+            # raises MessageWriteError if any of the run's messages were lost; the cycle then ends as ERROR
+            await asyncio.wrap_future(message_sink.flush(self.cycle_id))
+            async with self.connection() as session:
+                await crud.cycle.update_status(session, cycle_id=self.cycle_id, status=CycleStatus.FINISHED)
+                try:
+                    await record_crew_usage(session, crew_id=employed_crew.crew_id,
+                                            total_token=run_total(list(self.usage_recorders.values())).total_token)
+                except Exception as e:
+                    logger.error(f"Failed to record crew usage. crew_id: {employed_crew.crew_id}, error: {e}")
 
         return result
 
-    async def get_or_raise(self, getter: Callable, param_name: str, param_value: Any, entity_name: str):
+    async def get_or_raise(self, session, getter: Callable, param_name: str, param_value: Any, entity_name: str):
         logger.info(f"thread Id : {threading.get_ident()}, method Id : {inspect.currentframe().f_code.co_name}")
-        result = await getter(self.session, **{param_name: param_value})
+        result = await getter(session, **{param_name: param_value})
         if not result:
             logger.error(f"{entity_name} not found. {param_name}: {param_value}")
             raise ValueError(f"{entity_name} not found.")
         return result
 
-    async def setup_llm(self, profile_id: int, llm_id: int, is_owner: bool):
+    def setup_llm(self, llm: Llm, crew_id: int, temperature: float = 0):
         logger.info(f"thread Id : {threading.get_ident()}, method Id : {inspect.currentframe().f_code.co_name}")
         # 우선 api key 존재 여부와, 소유자를 체크하지 않음
         # if is_owner:
@@ -152,60 +181,25 @@ class CrewAiStartService:
         #         raise ValueError(f"API key not found for profile_id: {profile_id}, llm_id: {llm_id}")
         #     self.api_key = api_key.value
         # else:
-            # Use default API keys for non-owners
-        openai_api_key = os.getenv("OPENAI_API_KEY")  # Default OpenAI key
-        google_api_key = os.getenv("GOOGLE_API_KEY")  # Default Google API key
-
-        llm = await crud.llm.get(self.session, id=llm_id)
-        if not llm:
-            raise ValueError(f"LLM not found. llm_id: {llm_id}")
-
-        if llm.llm_provider_id == 1:
-            self.llm = ChatOpenAI(model=llm.name, verbose=True, temperature=0, openai_api_key=openai_api_key)
-        elif llm.llm_provider_id == 2:
-            self.llm = ChatGoogleGenerativeAI(model=llm.name, verbose=True, temperature=0,
-                                              google_api_key=google_api_key)
-        else:
-            raise ValueError(f"LLM provider not found. llm_provider_id: {llm.llm_provider_id}")
-
-    async def get_conversation_history(self, chat_id: int) -> str:
-        logger.info(f"thread Id : {threading.get_ident()}, method Id : {inspect.currentframe().f_code.co_name}")
-        conversation = "\n\nConversation History:\n"
-        cycles = await crud.cycle.get_all_finished_by_chat_id(self.session, chat_id=chat_id)
-        for cycle in cycles:
-            messages_in_cycle = await crud.message.get_all_by_cycle_id(self.session, cycle_id=cycle.id)
-            conversation += '\n'.join(
-                f'{{"role": "{message.role}", "message": "{message.content}"}}' for message in messages_in_cycle)
-        return conversation
-
-    async def create_agents(self, is_owner, running_crew) -> Dict[int, Agent]:
+            # Use default API keys for non-owners; the registry falls back to the provider's env key
+        self.llm_row = llm
+        # only deterministic calls may be answered from the response cache
+        cache = llm_response_cache.for_crew(crew_id) if temperature == 0 else None
+        self.llm = llm_registry.for_run(llm, api_key=self.api_key, temperature=temperature, cache=cache)
+
+    async def get_conversation_history(self, session, chat_id: int) -> str:
         logger.info(f"thread Id : {threading.get_ident()}, method Id : {inspect.currentframe().f_code.co_name}")
-        if is_owner:
-            agents = await crud.agent.get_all_active_by_crew_id(self.session, crew_id=running_crew.id)
-        else:
-            agents = await crud.published_agent.get_all_active_by_published_crew_id(self.session,
-                                                                                    published_crew_id=running_crew.id)
-        if not agents:
-            raise Exception(f"Agents not found for running_crew_id: {running_crew.id}")
+        return await conversation_history.build(session, chat_id)
 
+    def create_agents(self, definition: CrewDefinition) -> Dict[int, Agent]:
+        logger.info(f"thread Id : {threading.get_ident()}, method Id : {inspect.currentframe().f_code.co_name}")
         result = {}
-        for agent in agents:
-            logger.info(f"thread Id : {threading.get_ident()}, method Id : create_agent")
-            tools = []
-            if agent.tool_ids:
-                tools_from_db = await crud.tool.get_all_by_ids(self.session, agent.tool_ids)
-                tools = [function_map[tool.key] for tool in tools_from_db]
-
-            if is_owner:
-                rag_knowledges = await crud.knowledge.get_all_active_by_agent_id(self.session, agent_id=agent.id)
-            else:
-                rag_knowledges = await crud.knowledge.get_all_active_by_published_agent_id(self.session,
-                                                                                      published_agent_id=agent.id)
-
-            for rag_knowledge in rag_knowledges:
+        for agent in definition.agents.values():
+            tools = [function_map[tool_key] for tool_key in agent.tool_keys]
+            for knowledge in agent.knowledge_files:
                 try:
-                    rag_tool = get_search_tool(rag_knowledge.file_path)
-                    print(f"[RAG] 파일: {rag_knowledge}")
+                    rag_tool = get_search_tool(knowledge.file_path, knowledge.content_hash)
+                    print(f"[RAG] 파일: {knowledge.file_path}")
                     print(f"[RAG] 도구: {type(rag_tool).__name__}")
                     tools.append(rag_tool)
                 except UnsupportedFileTypeError as e:
@@ -213,14 +207,9 @@ class CrewAiStartService:
 
             logger.info(f"tools = {tools}")
 
-            # 클로저를 사용하여 현재의 agent.id와 agent.name을 캡처
-            def create_step_callback(agent_id, agent_name):
-                def step_callback(agent_output):
-                    return asyncio.run_coroutine_threadsafe(
-                        self.create_agent_callback(agent_id, agent_name)(agent_output), self.loop
-                    ).result()
-
-                return step_callback
+            # each agent gets its own copy of the run's model so its usage can be told apart
+            recorder = UsageRecorder()
+            self.usage_recorders[agent.id] = recorder
 
             result[agent.id] = Agent(
                 role=dedent(agent.role),
@@ -228,75 +217,44 @@ class CrewAiStartService:
                 backstory=dedent(agent.backstory),
                 tools=tools,
                 verbose=True,
-                llm=self.llm,
+                llm=self.llm.copy(update={"callbacks": [recorder]}),
                 max_iter=10,
-                step_callback=create_step_callback(agent.id, agent.name)
+                step_callback=self.create_agent_callback(agent.id, agent.name)
             )
 
         return result
 
 
-    async def create_tasks(self, is_owner, running_crew, agent_dict: Dict[int, Agent], conversation: str) -> Dict[int, Task]:
+    def create_tasks(self, definition: CrewDefinition, agent_dict: Dict[int, Agent], conversation: str) -> Dict[int, Task]:
         logger.info(f"thread Id : {threading.get_ident()}, method Id : {inspect.currentframe().f_code.co_name}")
-
-        if is_owner:
-            tasks = await crud.task.get_all_active_by_crew_id(self.session, crew_id=running_crew.id)
-            task_ids = running_crew.task_ids
-        else:
-            tasks = await crud.published_task.get_all_active_by_published_crew_id(self.session,
-                                                                                  published_crew_id=running_crew.id)
-            task_ids = running_crew.published_task_ids
-
-        if not tasks:
-            raise Exception(f"Tasks not found for running_crew_id: {running_crew.id}")
-
         task_dict = {}
-        for task_id in task_ids:
-            task = await crud.task.get_active(self.session, id=task_id) if is_owner else await crud.published_task.get_active(self.session, id=task_id)
-            if task:
-                context_tasks = [task_dict.get(task_id) for task_id in (task.context_task_ids or [])] if is_owner else [task_dict.get(task_id) for task_id in (task.context_published_task_ids or [])]
-                logger.info(f"task = {task}")
-                logger.info(f"task : {task.id}, agent : {agent_dict[task.published_agent_id]}")
-
-                # 클로저를 사용하여 현재의 task.id와 task.name을 캡처
-                def create_task_callback(task_id, task_name):
-                    def task_callback(task_output):
-                        return asyncio.run_coroutine_threadsafe(
-                            self.create_task_callback(task_id, task_name)(task_output), self.loop
-                        ).result()
-
-                    return task_callback
-
-                task_dict[task_id] = Task(
-                    description=dedent(task.description + conversation),
-                    expected_output=dedent(task.expected_output),
-                    agent=agent_dict[task.published_agent_id],
-                    context=context_tasks,
-                    callback=create_task_callback(task.id, task.name)
-                )
+        for task in definition.tasks:
+            context_tasks = [task_dict.get(task_id) for task_id in task.context_task_ids]
+            logger.info(f"task : {task.id}, agent : {task.agent_id}")
+
+            task_dict[task.id] = Task(
+                description=dedent(task.description + conversation),
+                expected_output=dedent(task.expected_output),
+                agent=agent_dict[task.agent_id],
+                context=context_tasks,
+                callback=self.create_task_callback(task.id, task.name)
+            )
         return task_dict
 
-    async def check_cycle_status(self):
-        # Log the current thread and event loop
-        current_thread = threading.current_thread()
-        current_loop = asyncio.get_event_loop()
-        logging.info(f"Check cycle status - Thread: {current_thread.name}, Loop: {id(current_loop)}")
-
-        try:
-            get_cycle = await crud.cycle.get(self.session, id=self.cycle_id)
-            logger.info(f"Cycle status: {get_cycle.status}")
-            if get_cycle.status == CycleStatus.STOPPED.value:
-                logging.info(f"Cycle stopped. cycle_id: {self.cycle_id}")
-                raise Exception("Cycle stopped!")
-        except Exception as e:
-            logging.error(f"Error checking cycle status: {e}")
-            raise e
-
-    async def stop(self, cycle_id: int) -> Dict[str, Any]:
-        logger.info(f"thread Id : {threading.get_ident()}, method Id : {inspect.currentframe().f_code.co_name}")
-        cycle = await crud.cycle.get(self.session, id=cycle_id)
-        if cycle.status == CycleStatus.STARTED.value:
-            await crud.cycle.update_status(self.session, cycle_id=cycle_id, status=CycleStatus.STOPPED)
-            return {"cycle id": cycle_id, "success": True, "msg": "Cycle status changed to STOPPED."}
-        else:
-            return {"cycle id": cycle_id, "success": False, "msg": "Cycle can only be stopped when status is STARTED."}
+    def check_cycle_status(self):
+        """Raise when the cycle has been stopped; reads the local cancellation flag, not the DB."""
+        if cancellation_registry.is_cancelled(self.cycle_id):
+            logger.info(f"Cycle stopped. cycle_id: {self.cycle_id}")
+            raise CycleStoppedError(self.cycle_id)
+
+
+async def stop_cycle(session, cycle_id: int) -> Dict[str, Any]:
+    logger.info(f"thread Id : {threading.get_ident()}, method Id : {inspect.currentframe().f_code.co_name}")
+    cycle = await crud.cycle.get(session, id=cycle_id)
+    if cycle.status == CycleStatus.STARTED.value:
+        await crud.cycle.update_status(session, cycle_id=cycle_id, status=CycleStatus.STOPPED)
+        # runs on other replicas see the stop on their next status poll
+        cancellation_registry.cancel(cycle_id)
+        return {"cycle id": cycle_id, "success": True, "msg": "Cycle status changed to STOPPED."}
+    else:
+        return {"cycle id": cycle_id, "success": False, "msg": "Cycle can only be stopped when status is STARTED."}
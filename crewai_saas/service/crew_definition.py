@@ -0,0 +1,229 @@
+import asyncio
+import logging
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Optional, Union
+
+from supabase._async.client import AsyncClient
+
+from crewai_saas import crud
+from crewai_saas.core.config import settings
+from crewai_saas.core.enum import KnowledgeIndexStatus
+from crewai_saas.model import Crew, PublishedCrew, Llm
+
+logger = logging.getLogger(__name__)
+
+
+class CrewDefinitionNotFoundError(ValueError):
+    """raised when a crew, its published snapshot or one of their parts cannot be resolved"""
+
+
+@dataclass(frozen=True)
+class KnowledgeFile:
+    file_path: str
+    # sha256 recorded at upload; lets the search tool find an existing index without downloading
+    content_hash: Optional[str]
+
+
+@dataclass(frozen=True)
+class AgentDefinition:
+    id: int
+    name: Optional[str]
+    role: str
+    goal: str
+    backstory: str
+    tool_keys: tuple[str, ...]
+    knowledge_files: tuple[KnowledgeFile, ...]
+
+
+@dataclass(frozen=True)
+class TaskDefinition:
+    id: int
+    name: str
+    description: str
+    expected_output: str
+    agent_id: int
+    context_task_ids: tuple[int, ...]
+
+
+@dataclass(frozen=True)
+class CrewDefinition:
+    """Everything a kick-off needs to build the crewai Agents and Tasks, with no further reads."""
+    running_crew_id: int
+    is_owner: bool
+    llm: Llm
+    agents: dict[int, AgentDefinition]
+    # in execution order; context tasks always come before the tasks that use them
+    tasks: tuple[TaskDefinition, ...]
+
+
+class CrewDefinitionCache:
+    """
+    Compiled crew definitions for kick-off.
+
+    Published crews are immutable snapshots, so their compiled definition is cached by
+    published_crew.id. The crew id -> latest published id lookup is cached for
+    latest_ttl seconds and dropped on publish. The source crew is checked on every
+    kick-off, so a deleted crew stops running even where a snapshot is still cached.
+    Owner runs execute the editable crew and are compiled on every kick-off, with one
+    query per table.
+    """
+
+    def __init__(self, *, size: int, latest_ttl: float):
+        self.size = size
+        self.latest_ttl = latest_ttl
+        self._definitions: OrderedDict[int, CrewDefinition] = OrderedDict()
+        self._latest: dict[int, tuple[int, float]] = {}
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+
+    async def load(self, session: AsyncClient, *, crew_id: int, is_owner: bool) -> CrewDefinition:
+        crew = await crud.crew.get_active(session, id=crew_id)
+        if not crew:
+            raise CrewDefinitionNotFoundError(f"Crew not found. crew_id: {crew_id}")
+        if is_owner:
+            return await self.compile(session, crew, is_owner=True)
+
+        published_crew_id = self._get_latest(crew_id)
+        if published_crew_id is not None:
+            with self._lock:
+                definition = self._definitions.get(published_crew_id)
+                if definition is not None:
+                    self._definitions.move_to_end(published_crew_id)
+                    self._hits += 1
+                    return definition
+
+        with self._lock:
+            self._misses += 1
+        published_crew = await crud.published_crew.get_active_by_crew_id_latest(session, crew_id=crew_id)
+        if not published_crew:
+            raise CrewDefinitionNotFoundError(f"PublishedCrew not found. crew_id: {crew_id}")
+        definition = await self.compile(session, published_crew, is_owner=False)
+        with self._lock:
+            self._latest[crew_id] = (published_crew.id, time.monotonic() + self.latest_ttl)
+            self._definitions[published_crew.id] = definition
+            self._definitions.move_to_end(published_crew.id)
+            while len(self._definitions) > self.size:
+                self._definitions.popitem(last=False)
+        return definition
+
+    def invalidate_crew(self, crew_id: int) -> None:
+        """Forget which snapshot is the latest for crew_id; call after publishing it."""
+        with self._lock:
+            self._latest.pop(crew_id, None)
+
+    def forget_crew(self, crew_id: int) -> None:
+        """Drop everything cached for crew_id; call after deleting it."""
+        with self._lock:
+            latest = self._latest.pop(crew_id, None)
+            if latest is not None:
+                self._definitions.pop(latest[0], None)
+
+    def _get_latest(self, crew_id: int) -> Optional[int]:
+        with self._lock:
+            latest = self._latest.get(crew_id)
+            if latest is None:
+                return None
+            published_crew_id, expires_at = latest
+            if expires_at < time.monotonic():
+                del self._latest[crew_id]
+                return None
+            return published_crew_id
+
+    async def compile(self, session: AsyncClient, running_crew: Union[Crew, PublishedCrew], *, is_owner: bool) -> CrewDefinition:
+        if is_owner:
+            agents, tasks, llm = await asyncio.gather(
+                crud.agent.get_all_active_by_crew_id(session, crew_id=running_crew.id),
+                crud.task.get_all_active_by_crew_id(session, crew_id=running_crew.id),
+                crud.llm.get(session, id=running_crew.llm_id),
+            )
+            task_ids = running_crew.task_ids or []
+        else:
+            agents, tasks, llm = await asyncio.gather(
+                crud.published_agent.get_all_active_by_published_crew_id(session, published_crew_id=running_crew.id),
+                crud.published_task.get_all_active_by_published_crew_id(session, published_crew_id=running_crew.id),
+                crud.llm.get(session, id=running_crew.llm_id),
+            )
+            task_ids = running_crew.published_task_ids or []
+
+        if not agents:
+            raise CrewDefinitionNotFoundError(f"Agents not found for running_crew_id: {running_crew.id}")
+        if not tasks:
+            raise CrewDefinitionNotFoundError(f"Tasks not found for running_crew_id: {running_crew.id}")
+        if not llm:
+            raise CrewDefinitionNotFoundError(f"LLM not found. llm_id: {running_crew.llm_id}")
+
+        agent_ids = [agent.id for agent in agents]
+        tool_ids = sorted({tool_id for agent in agents for tool_id in (agent.tool_ids or [])})
+        knowledge_query = crud.knowledge.get_all_active_by_agent_ids(session, agent_ids=agent_ids) if is_owner \
+            else crud.knowledge.get_all_active_by_published_agent_ids(session, published_agent_ids=agent_ids)
+        tools, knowledges = await asyncio.gather(
+            crud.tool.get_all_by_ids(session, tool_ids) if tool_ids else asyncio.sleep(0, result=[]),
+            knowledge_query,
+        )
+
+        tool_keys = {tool.id: tool.key for tool in tools}
+        knowledge_files: dict[int, list[KnowledgeFile]] = {}
+        for knowledge in knowledges:
+            owner_id = knowledge.agent_id if is_owner else knowledge.published_agent_id
+            # a file that failed to index would only make the search tool error
+            if knowledge.file_path and knowledge.index_status != KnowledgeIndexStatus.FAILED.value:
+                knowledge_files.setdefault(owner_id, []).append(KnowledgeFile(knowledge.file_path, knowledge.content_hash))
+
+        agent_definitions = {
+            agent.id: AgentDefinition(
+                id=agent.id,
+                name=agent.name,
+                role=agent.role or "",
+                goal=agent.goal or "",
+                backstory=agent.backstory or "",
+                tool_keys=tuple(tool_keys[tool_id] for tool_id in (agent.tool_ids or []) if tool_id in tool_keys),
+                knowledge_files=tuple(knowledge_files.get(agent.id, ())),
+            )
+            for agent in agents
+        }
+
+        tasks_by_id = {task.id: task for task in tasks}
+        task_definitions = []
+        for task_id in task_ids:
+            task = tasks_by_id.get(task_id)
+            if task is None:
+                continue
+            agent_id = task.agent_id if is_owner else task.published_agent_id
+            if agent_id not in agent_definitions:
+                raise CrewDefinitionNotFoundError(f"Agent not found for task_id: {task.id}, agent_id: {agent_id}")
+            context_task_ids = task.context_task_ids if is_owner else task.context_published_task_ids
+            task_definitions.append(TaskDefinition(
+                id=task.id,
+                name=task.name,
+                description=task.description or "",
+                expected_output=task.expected_output or "",
+                agent_id=agent_id,
+                context_task_ids=tuple(context_task_ids or ()),
+            ))
+
+        return CrewDefinition(
+            running_crew_id=running_crew.id,
+            is_owner=is_owner,
+            llm=llm,
+            agents=agent_definitions,
+            tasks=tuple(task_definitions),
+        )
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "definitions": len(self._definitions),
+                "latest": len(self._latest),
+                "hits": self._hits,
+                "misses": self._misses,
+            }
+
+
+crew_definitions = CrewDefinitionCache(
+    size=settings.CREW_DEFINITION_CACHE_SIZE,
+    latest_ttl=settings.CREW_DEFINITION_LATEST_TTL,
+)
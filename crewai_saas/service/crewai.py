@@ -1,3 +1,4 @@
+import asyncio
 from textwrap import dedent
 from crewai import Agent, Task, Crew
 from langchain_openai import ChatOpenAI
@@ -5,6 +6,7 @@ import threading
 import inspect
 
 from crewai_saas import crud
+from crewai_saas import model
 from crewai_saas.model import TaskWithContext, AgentWithTool, CrewWithAll, CycleCreate, MessageCreate
 
 import logging
@@ -14,38 +16,55 @@ logging.basicConfig(level=logging.DEBUG, filename='app.log', filemode='a',
 logger = logging.getLogger(__name__)
 
 
+async def load_agent_tools(session, agents: list[model.Agent]) -> list[model.Tool]:
+    """Every tool referenced by the agents, in one query."""
+    tool_ids = sorted({tool_id for agent in agents for tool_id in (agent.tool_ids or [])})
+    if not tool_ids:
+        return []
+    return await crud.tool.get_all_by_ids(session, tool_ids)
+
+
+def attach_tools(agents: list[model.Agent], tools: list[model.Tool]) -> list[AgentWithTool]:
+    tools_by_id = {tool.id: tool for tool in tools}
+    return [
+        AgentWithTool(**agent.dict(), tools=[tools_by_id[tool_id] for tool_id in (agent.tool_ids or []) if tool_id in tools_by_id])
+        for agent in agents
+    ]
+
+
 async def make_response(session, crew_id):
     logger.info(f"thread Id : {threading.get_ident()}, method Id : {inspect.currentframe().f_code.co_name}")
-    crew = await crud.crew.get_active(session, id=crew_id)
+    crew, tasks, agents = await asyncio.gather(
+        crud.crew.get_active(session, id=crew_id),
+        crud.task.get_all_active_by_crew_id(session, crew_id),
+        crud.agent.get_all_active_by_crew_id(session, crew_id),
+    )
     if not crew:
         logger.error(f"Crew not found. crew_id: {crew_id}")
         return Exception("Crew not found.")
-
-    tasks = await crud.task.get_all_active_by_crew_id(session, crew.id)
     if not tasks:
         logger.error(f"Task not found. crew_id: {crew.id}")
-        sorted_tasks = []
-    elif crew.task_ids is not None:
-        sorted_tasks = [task for task_id in crew.task_ids for task in tasks if task.id == task_id]
-        if len(crew.task_ids) != len(tasks):
-            logger.error(f"Task count is not matched. crew_id: {crew.id}, tasks : {tasks}, task_ids : {crew.task_ids}")
-            sorted_task_table = sorted(tasks, key=lambda task: task.id, reverse=True)
-            sorted_tasks += [task for task in sorted_task_table if task.id not in sorted_tasks]
-    else:
-        sorted_tasks = sorted(tasks, key=lambda task: task.id, reverse=True)
-
-    agents = await crud.agent.get_all_active_by_crew_id(session, crew.id)
     if not agents:
         logger.error(f"Agent not found. crew_id: {crew.id}")
-        agent_with_tools = []
+
+    tools = await load_agent_tools(session, agents)
+    return assemble_crew_response(crew, tasks, agents, tools)
+
+
+def assemble_crew_response(crew: model.Crew, tasks: list[model.Task], agents: list[model.Agent],
+                           tools: list[model.Tool]) -> dict:
+    """make_response's shape, built from rows the caller already has in memory."""
+    if crew.task_ids is not None:
+        tasks_by_id = {task.id: task for task in tasks}
+        sorted_tasks = [tasks_by_id[task_id] for task_id in crew.task_ids if task_id in tasks_by_id]
+        if len(sorted_tasks) != len(tasks):
+            logger.error(f"Task count is not matched. crew_id: {crew.id}, tasks : {tasks}, task_ids : {crew.task_ids}")
+            ordered_ids = set(crew.task_ids)
+            sorted_tasks += sorted((task for task in tasks if task.id not in ordered_ids), key=lambda task: task.id, reverse=True)
     else:
-        agent_with_tools = [
-            AgentWithTool(**agent.dict(), tools=await crud.tool.get_all_by_ids(session, agent.tool_ids))
-            for agent in agents
-        ]
+        sorted_tasks = sorted(tasks, key=lambda task: task.id, reverse=True)
 
     crew_dict = crew.dict()
     crew_dict['tasks'] = sorted_tasks
-    crew_dict['agents'] = agent_with_tools
-    crew_with_task = CrewWithAll(**crew_dict)
-    return {"crew": crew_with_task}
+    crew_dict['agents'] = attach_tools(agents, tools)
+    return {"crew": CrewWithAll(**crew_dict)}
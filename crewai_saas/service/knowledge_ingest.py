@@ -0,0 +1,136 @@
+import asyncio
+import hashlib
+import logging
+import os
+import tempfile
+from dataclasses import dataclass
+from typing import Optional
+
+from fastapi import UploadFile
+
+from crewai_saas import crud
+from crewai_saas.core.config import settings
+from crewai_saas.core.enum import KnowledgeIndexStatus
+from crewai_saas.core.supabase_pool import SupabaseClientPool
+from crewai_saas.tool.knowledge_index import KnowledgeIndexStore, file_kind, knowledge_index_store
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class StagedUpload:
+    local_path: str
+    file_name: str
+    content_hash: str
+    size: int
+    kind: Optional[str]
+
+    def discard(self) -> None:
+        if os.path.exists(self.local_path):
+            os.remove(self.local_path)
+
+
+class KnowledgeIngest:
+    """
+    Builds knowledge indexes when a file is uploaded instead of on the first crew run.
+
+    stage() streams the upload to a temp file in chunk_size blocks while hashing it, so the
+    request never holds the whole file in memory. submit() then parses, chunks, embeds and
+    persists the index in the background, at most `concurrency` files at a time, and keeps
+    knowledge.index_status (PENDING -> INDEXING -> READY / FAILED) up to date for every row
+    pointing at the file.
+    """
+
+    def __init__(self, store: KnowledgeIndexStore, *, concurrency: int, chunk_size: int):
+        self.store = store
+        self.concurrency = concurrency
+        self.chunk_size = chunk_size
+
+        self._pool: Optional[SupabaseClientPool] = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._tasks: set[asyncio.Task] = set()
+        self._ready_total = 0
+        self._failed_total = 0
+        self._reused_total = 0
+
+    async def start(self, pool: SupabaseClientPool) -> None:
+        self._pool = pool
+        self._semaphore = asyncio.Semaphore(self.concurrency)
+
+    async def stop(self) -> None:
+        # rows of cancelled ingests stay INDEXING; the search tool still builds those lazily
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        logger.info(f"Knowledge ingest stopped. stats: {self.stats()}")
+
+    async def stage(self, file: UploadFile) -> StagedUpload:
+        digest = hashlib.sha256()
+        size = 0
+        head = b""
+        fd, local_path = tempfile.mkstemp(dir=self.store.root, suffix=".upload")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                while block := await file.read(self.chunk_size):
+                    if not head:
+                        head = block[:512]
+                    digest.update(block)
+                    f.write(block)
+                    size += len(block)
+        except Exception:
+            os.remove(local_path)
+            raise
+        file_name = file.filename or ""
+        return StagedUpload(local_path=local_path, file_name=file_name, content_hash=digest.hexdigest(), size=size,
+                            kind=file_kind(file_name, head, local_path))
+
+    def submit(self, staged: StagedUpload, file_path: str) -> None:
+        # kick-offs that find the path wait for this build instead of downloading the file
+        self.store.remember(file_path, staged.content_hash)
+        task = asyncio.create_task(self._ingest(staged, file_path), name=f"knowledge-ingest-{staged.content_hash[:12]}")
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _ingest(self, staged: StagedUpload, file_path: str) -> None:
+        try:
+            async with self._semaphore:
+                if self.store.has(staged.content_hash):
+                    self._reused_total += 1
+                else:
+                    await self._set_status(file_path, KnowledgeIndexStatus.INDEXING)
+                    # the uploaded name still has its extension, the storage path does not
+                    await asyncio.to_thread(self.store.build, staged.local_path, staged.content_hash,
+                                            file_path=staged.file_name or file_path)
+            await self._set_status(file_path, KnowledgeIndexStatus.READY, staged.content_hash)
+            self._ready_total += 1
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            self._failed_total += 1
+            logger.error(f"Knowledge ingest failed. file_path: {file_path}, error: {e}", exc_info=True)
+            await self._set_status(file_path, KnowledgeIndexStatus.FAILED)
+        finally:
+            staged.discard()
+
+    async def _set_status(self, file_path: str, status: KnowledgeIndexStatus, content_hash: Optional[str] = None) -> None:
+        try:
+            async with self._pool.connection() as session:
+                await crud.knowledge.update_index_status_by_file_path(session, file_path=file_path,
+                                                                      index_status=status, content_hash=content_hash)
+        except Exception as e:
+            logger.error(f"Failed to update knowledge index status. file_path: {file_path}, status: {status}, error: {e}")
+
+    def stats(self) -> dict:
+        return {
+            "in_flight": len(self._tasks),
+            "ready_total": self._ready_total,
+            "failed_total": self._failed_total,
+            "reused_total": self._reused_total,
+        }
+
+
+knowledge_ingest = KnowledgeIngest(
+    knowledge_index_store,
+    concurrency=settings.KNOWLEDGE_INGEST_CONCURRENCY,
+    chunk_size=settings.KNOWLEDGE_UPLOAD_CHUNK_SIZE,
+)
@@ -0,0 +1,224 @@
+import hashlib
+import logging
+import sqlite3
+import threading
+import time
+from collections import defaultdict
+from typing import Any, Optional, Protocol
+
+from langchain_core.caches import RETURN_VAL_TYPE, BaseCache
+from langchain_core.load import dumps, loads
+
+from crewai_saas.core.cache import TTLCache
+from crewai_saas.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# set in generation_info of cache hits so usage accounting can skip them
+CACHED_GENERATION_KEY = "cached"
+
+
+class LlmCacheBackend(Protocol):
+    def open(self) -> None: ...
+
+    def close(self) -> None: ...
+
+    def get(self, crew_id: int, key: str) -> Optional[RETURN_VAL_TYPE]: ...
+
+    def set(self, crew_id: int, key: str, value: RETURN_VAL_TYPE, ttl: float) -> None: ...
+
+    def clear(self, crew_id: int) -> None: ...
+
+    def stats(self) -> dict[str, Any]: ...
+
+
+class MemoryLlmCacheBackend:
+    """process-local LRU; entries are lost on restart"""
+
+    def __init__(self, *, maxsize: int, ttl: float):
+        self.entries: TTLCache[RETURN_VAL_TYPE] = TTLCache(maxsize=maxsize, ttl=ttl)
+
+    def open(self) -> None:
+        pass
+
+    def close(self) -> None:
+        pass
+
+    def get(self, crew_id: int, key: str) -> Optional[RETURN_VAL_TYPE]:
+        return self.entries.get((crew_id, key))
+
+    def set(self, crew_id: int, key: str, value: RETURN_VAL_TYPE, ttl: float) -> None:
+        self.entries.set((crew_id, key), value, ttl=ttl)
+
+    def clear(self, crew_id: int) -> None:
+        self.entries.discard(lambda key: key[0] == crew_id)
+
+    def stats(self) -> dict[str, Any]:
+        return {"backend": "memory", **self.entries.stats()}
+
+
+class SqliteLlmCacheBackend:
+    """
+    Generations serialized with langchain's dumps() into a local SQLite file, so the cache
+    survives restarts. The file is opened by open() at startup; until then every lookup
+    misses. Expired rows are skipped on read and pruned every prune_every writes.
+    """
+
+    def __init__(self, path: str, *, prune_every: int = 500):
+        self.path = path
+        self.prune_every = prune_every
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+        self._writes = 0
+
+    def open(self) -> None:
+        conn = sqlite3.connect(self.path, check_same_thread=False)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("CREATE TABLE IF NOT EXISTS llm_responses (crew_id INTEGER NOT NULL, key TEXT NOT NULL, "
+                     "value TEXT NOT NULL, expires_at REAL NOT NULL, PRIMARY KEY (crew_id, key))")
+        conn.commit()
+        with self._lock:
+            self._conn = conn
+        logger.info(f"LLM response cache opened. path: {self.path}")
+
+    def close(self) -> None:
+        with self._lock:
+            conn, self._conn = self._conn, None
+        if conn is not None:
+            conn.close()
+
+    def get(self, crew_id: int, key: str) -> Optional[RETURN_VAL_TYPE]:
+        with self._lock:
+            if self._conn is None:
+                return None
+            row = self._conn.execute("SELECT value, expires_at FROM llm_responses WHERE crew_id = ? AND key = ?",
+                                     (crew_id, key)).fetchone()
+        if row is None or row[1] <= time.time():
+            return None
+        try:
+            return loads(row[0])
+        except Exception as e:
+            logger.warning(f"Dropping unreadable llm cache entry. crew_id: {crew_id}, key: {key}, error: {e}")
+            with self._lock:
+                if self._conn is not None:
+                    self._conn.execute("DELETE FROM llm_responses WHERE crew_id = ? AND key = ?", (crew_id, key))
+                    self._conn.commit()
+            return None
+
+    def set(self, crew_id: int, key: str, value: RETURN_VAL_TYPE, ttl: float) -> None:
+        payload = dumps(list(value))
+        with self._lock:
+            if self._conn is None:
+                return
+            self._conn.execute("INSERT OR REPLACE INTO llm_responses (crew_id, key, value, expires_at) VALUES (?, ?, ?, ?)",
+                               (crew_id, key, payload, time.time() + ttl))
+            self._writes += 1
+            if self._writes % self.prune_every == 0:
+                self._conn.execute("DELETE FROM llm_responses WHERE expires_at <= ?", (time.time(),))
+            self._conn.commit()
+
+    def clear(self, crew_id: int) -> None:
+        with self._lock:
+            if self._conn is None:
+                return
+            self._conn.execute("DELETE FROM llm_responses WHERE crew_id = ?", (crew_id,))
+            self._conn.commit()
+
+    def stats(self) -> dict[str, Any]:
+        with self._lock:
+            size = self._conn.execute("SELECT COUNT(*) FROM llm_responses").fetchone()[0] if self._conn else None
+        return {"backend": "sqlite", "path": self.path, "open": size is not None, "size": size}
+
+
+class CrewLlmCache(BaseCache):
+    """
+    langchain cache handed to one crew's chat model.
+
+    Keys are the model's llm_string (model name, temperature, stop words, ...) plus the
+    prompt with whitespace collapsed. Entries are stored under the crew id, so TTLs, hit
+    counts and clear() stay per crew.
+    """
+
+    def __init__(self, owner: "LlmResponseCache", crew_id: int, ttl: float):
+        self.owner = owner
+        self.crew_id = crew_id
+        self.ttl = ttl
+
+    def _key(self, prompt: str, llm_string: str) -> str:
+        normalized = " ".join(prompt.split())
+        return hashlib.sha256(f"{llm_string}\n{normalized}".encode()).hexdigest()
+
+    def lookup(self, prompt: str, llm_string: str) -> Optional[RETURN_VAL_TYPE]:
+        value = self.owner.backend.get(self.crew_id, self._key(prompt, llm_string))
+        if value is None:
+            self.owner.record(self.crew_id, "misses")
+            return None
+        self.owner.record(self.crew_id, "hits")
+        return [generation.copy(update={
+            "generation_info": {**(generation.generation_info or {}), CACHED_GENERATION_KEY: True}})
+            for generation in value]
+
+    def update(self, prompt: str, llm_string: str, return_val: RETURN_VAL_TYPE) -> None:
+        self.owner.backend.set(self.crew_id, self._key(prompt, llm_string), return_val, self.ttl)
+        self.owner.record(self.crew_id, "writes")
+
+    def clear(self, **kwargs: Any) -> None:
+        self.owner.backend.clear(self.crew_id)
+
+
+class LlmResponseCache:
+    """
+    Opt-in response cache for deterministic (temperature=0) runs.
+
+    crew_ttls maps crew ids to the TTL of their cached responses; crews not listed are not
+    cached. The backend is shared, the per-crew counters show where the cache pays off.
+    """
+
+    def __init__(self, backend: Optional[LlmCacheBackend], crew_ttls: dict[int, float]):
+        self.backend = backend
+        self.crew_ttls = dict(crew_ttls)
+        self._counters: dict[int, dict[str, int]] = defaultdict(lambda: {"hits": 0, "misses": 0, "writes": 0})
+        self._lock = threading.Lock()
+
+    def for_crew(self, crew_id: int) -> Optional[CrewLlmCache]:
+        ttl = self.crew_ttls.get(crew_id)
+        if self.backend is None or ttl is None:
+            return None
+        return CrewLlmCache(self, crew_id, ttl)
+
+    def open(self) -> None:
+        if self.backend is not None:
+            self.backend.open()
+
+    def close(self) -> None:
+        if self.backend is not None:
+            self.backend.close()
+
+    def record(self, crew_id: int, counter: str) -> None:
+        with self._lock:
+            self._counters[crew_id][counter] += 1
+
+    def stats(self) -> dict[str, Any]:
+        with self._lock:
+            crews = {}
+            for crew_id, counters in self._counters.items():
+                lookups = counters["hits"] + counters["misses"]
+                crews[crew_id] = {**counters, "hit_ratio": round(counters["hits"] / lookups, 4) if lookups else 0.0}
+        return {
+            "backend": self.backend.stats() if self.backend else None,
+            "crew_ttls": dict(self.crew_ttls),
+            "crews": crews,
+        }
+
+
+def _make_backend() -> Optional[LlmCacheBackend]:
+    if settings.LLM_CACHE_BACKEND == "memory":
+        return MemoryLlmCacheBackend(maxsize=settings.LLM_CACHE_SIZE, ttl=settings.LLM_CACHE_TTL)
+    if settings.LLM_CACHE_BACKEND == "sqlite":
+        return SqliteLlmCacheBackend(settings.LLM_CACHE_SQLITE_PATH)
+    if settings.LLM_CACHE_BACKEND != "none":
+        logger.warning(f"Unknown LLM_CACHE_BACKEND: {settings.LLM_CACHE_BACKEND}, llm response cache disabled")
+    return None
+
+
+llm_response_cache = LlmResponseCache(_make_backend(), settings.LLM_CACHE_CREW_TTLS)
@@ -0,0 +1,99 @@
+import hashlib
+import logging
+import os
+import threading
+from dataclasses import dataclass
+from typing import Callable, Optional
+
+from langchain_core.caches import BaseCache
+from langchain_core.language_models import BaseChatModel
+from langchain_google_genai import ChatGoogleGenerativeAI
+from langchain_openai import ChatOpenAI
+
+from crewai_saas.core.cache import TTLCache
+from crewai_saas.core.config import settings
+from crewai_saas.model import Llm
+
+logger = logging.getLogger(__name__)
+
+LlmFactory = Callable[[str, Optional[str], float], BaseChatModel]
+
+
+@dataclass(frozen=True)
+class LlmProviderEntry:
+    factory: LlmFactory
+    api_key_env: str
+
+
+class LlmRegistry:
+    """
+    Chat model clients by (provider, model, api key fingerprint, temperature).
+
+    Providers register a factory under their llm_provider id. A client is built once per
+    key and every run gets a shallow copy of it: the copy shares the underlying SDK client
+    and its HTTP connection pool, while run-specific state such as the callbacks crewai
+    attaches stays on the copy. Clients are kept in a bounded LRU, so keys of users who
+    stopped running crews do not pin clients forever.
+    """
+
+    def __init__(self, *, maxsize: int, ttl: float):
+        self._providers: dict[int, LlmProviderEntry] = {}
+        self._clients: TTLCache[BaseChatModel] = TTLCache(maxsize=maxsize, ttl=ttl)
+        self._lock = threading.Lock()
+        self._created_total = 0
+        self._reused_total = 0
+
+    def provider(self, llm_provider_id: int, *, api_key_env: str) -> Callable[[LlmFactory], LlmFactory]:
+        def register(factory: LlmFactory) -> LlmFactory:
+            self._providers[llm_provider_id] = LlmProviderEntry(factory=factory, api_key_env=api_key_env)
+            return factory
+        return register
+
+    def get(self, llm: Llm, *, api_key: Optional[str] = None, temperature: float = 0) -> BaseChatModel:
+        entry = self._providers.get(llm.llm_provider_id)
+        if entry is None:
+            raise ValueError(f"LLM provider not found. llm_provider_id: {llm.llm_provider_id}")
+        api_key = api_key or os.getenv(entry.api_key_env)
+        key = (llm.llm_provider_id, llm.name, self._fingerprint(api_key), temperature)
+        with self._lock:
+            client = self._clients.get(key)
+            if client is None:
+                client = entry.factory(llm.name, api_key, temperature)
+                self._clients.set(key, client)
+                self._created_total += 1
+                logger.info(f"LLM client created. provider: {llm.llm_provider_id}, model: {llm.name}")
+            else:
+                self._reused_total += 1
+            return client
+
+    def for_run(self, llm: Llm, *, api_key: Optional[str] = None, temperature: float = 0,
+                cache: Optional[BaseCache] = None) -> BaseChatModel:
+        client = self.get(llm, api_key=api_key, temperature=temperature)
+        # cache=None would fall back to langchain's global cache; False turns caching off
+        return client.copy(update={"callbacks": None, "cache": cache if cache is not None else False})
+
+    @staticmethod
+    def _fingerprint(api_key: Optional[str]) -> str:
+        return hashlib.sha256(api_key.encode()).hexdigest()[:16] if api_key else ""
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "providers": sorted(self._providers),
+                "clients": self._clients.stats(),
+                "created_total": self._created_total,
+                "reused_total": self._reused_total,
+            }
+
+
+llm_registry = LlmRegistry(maxsize=settings.LLM_CLIENT_CACHE_SIZE, ttl=settings.LLM_CLIENT_TTL)
+
+
+@llm_registry.provider(1, api_key_env="OPENAI_API_KEY")
+def _openai(model: str, api_key: Optional[str], temperature: float) -> BaseChatModel:
+    return ChatOpenAI(model=model, verbose=True, temperature=temperature, openai_api_key=api_key)
+
+
+@llm_registry.provider(2, api_key_env="GOOGLE_API_KEY")
+def _google(model: str, api_key: Optional[str], temperature: float) -> BaseChatModel:
+    return ChatGoogleGenerativeAI(model=model, verbose=True, temperature=temperature, google_api_key=api_key)
@@ -0,0 +1,171 @@
+import asyncio
+import logging
+import time
+from concurrent.futures import Future
+from typing import Optional, Union
+
+from crewai_saas import crud
+from crewai_saas.core.config import settings
+from crewai_saas.model import MessageCreate
+from crewai_saas.service.callback_loop import CallbackLoop, callback_loop
+
+logger = logging.getLogger(__name__)
+
+
+class MessageWriteError(Exception):
+    """raised by flush() when messages of the cycle could not be written"""
+
+
+class MessageSink:
+    """
+    Write-behind buffer for messages produced by crew callbacks.
+
+    enqueue() never blocks the caller. A single flusher task on the callback loop inserts
+    queued messages in batches, in the order they were enqueued, and refreshes the chat /
+    employed_crew updated_at at most once per touch_interval per chat. flush() resolves
+    once everything enqueued before it has been written.
+
+    A failed batch insert is retried with exponential backoff, then written row by row so
+    one bad row cannot drop its neighbours. Rows that still fail are counted per cycle and
+    reported by that cycle's next flush().
+    """
+
+    def __init__(self, owner_loop: CallbackLoop, *, batch_size: int, flush_interval: float, touch_interval: float,
+                 retries: int, retry_backoff: float):
+        self.owner_loop = owner_loop
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.touch_interval = touch_interval
+        self.retries = retries
+        self.retry_backoff = retry_backoff
+
+        self._queue: Optional[asyncio.Queue[Union[MessageCreate, asyncio.Future]]] = None
+        self._flusher: Optional[asyncio.Task] = None
+        self._touched_at: dict[int, float] = {}
+        self._dropped: dict[int, int] = {}
+        self._written_total = 0
+        self._batches_total = 0
+        self._failed_total = 0
+        self._retried_total = 0
+
+    def start(self) -> None:
+        self.owner_loop.run(self._start())
+
+    def stop(self) -> None:
+        if self._flusher is not None:
+            self.owner_loop.run(self._stop())
+
+    async def _start(self) -> None:
+        self._queue = asyncio.Queue()
+        self._flusher = asyncio.create_task(self._run(), name="message-sink-flusher")
+
+    async def _stop(self) -> None:
+        await self._flush()
+        self._flusher.cancel()
+        await asyncio.gather(self._flusher, return_exceptions=True)
+        self._flusher = None
+        logger.info(f"Message sink stopped. stats: {self.stats()}")
+
+    def enqueue(self, message: MessageCreate) -> None:
+        """Queue a message for insertion; safe to call from any thread."""
+        self.owner_loop.loop.call_soon_threadsafe(self._queue.put_nowait, message)
+
+    def flush(self, cycle_id: Optional[int] = None) -> Future:
+        """
+        Future that resolves once every message enqueued so far is written. With cycle_id it
+        fails with MessageWriteError if any message of that cycle was dropped since the last
+        flush for it.
+        """
+        return self.owner_loop.submit(self._flush(cycle_id))
+
+    async def _flush(self, cycle_id: Optional[int] = None) -> None:
+        barrier = asyncio.get_running_loop().create_future()
+        self._queue.put_nowait(barrier)
+        await barrier
+        dropped = self._dropped.pop(cycle_id, 0) if cycle_id is not None else 0
+        if dropped:
+            raise MessageWriteError(f"{dropped} messages could not be written. cycle_id: {cycle_id}")
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self._queue.get()]
+            deadline = loop.time() + self.flush_interval
+            while len(batch) < self.batch_size and not isinstance(batch[-1], asyncio.Future):
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), timeout=timeout))
+                except asyncio.TimeoutError:
+                    break
+
+            messages = [item for item in batch if isinstance(item, MessageCreate)]
+            barriers = [item for item in batch if isinstance(item, asyncio.Future)]
+            await self._write(messages, force_touch=bool(barriers))
+            for barrier in barriers:
+                if not barrier.done():
+                    barrier.set_result(None)
+
+    async def _write(self, messages: list[MessageCreate], force_touch: bool) -> None:
+        session = self.owner_loop.session
+        if messages and not await self._insert_batch(session, messages):
+            # keep the order; a row that still fails is dropped and reported to its cycle's flush
+            for message in messages:
+                try:
+                    await crud.message.create_many(session, objs_in=[message])
+                    self._written_total += 1
+                except Exception as e:
+                    self._failed_total += 1
+                    self._dropped[message.cycle_id] = self._dropped.get(message.cycle_id, 0) + 1
+                    logger.error(f"Failed to write message. cycle_id: {message.cycle_id}, error: {e}", exc_info=True)
+
+        now = time.monotonic()
+        chat_ids = {message.chat_id for message in messages}
+        if force_touch:
+            chat_ids.update(self._touched_at)
+        for chat_id in chat_ids:
+            touched_at = self._touched_at.get(chat_id)
+            if not force_touch and touched_at is not None and now - touched_at < self.touch_interval:
+                continue
+            try:
+                await crud.message.touch(session, chat_id=chat_id)
+            except Exception as e:
+                logger.error(f"Failed to touch chat. chat_id: {chat_id}, error: {e}")
+            if force_touch:
+                self._touched_at.pop(chat_id, None)
+            else:
+                self._touched_at[chat_id] = now
+
+    async def _insert_batch(self, session, messages: list[MessageCreate]) -> bool:
+        for attempt in range(self.retries + 1):
+            if attempt:
+                self._retried_total += 1
+                await asyncio.sleep(self.retry_backoff * 2 ** (attempt - 1))
+            try:
+                await crud.message.create_many(session, objs_in=messages)
+                self._written_total += len(messages)
+                self._batches_total += 1
+                return True
+            except Exception as e:
+                logger.warning(f"Failed to write message batch. size: {len(messages)}, attempt: {attempt + 1}, error: {e}")
+        return False
+
+    def stats(self) -> dict:
+        return {
+            "queued": self._queue.qsize() if self._queue else 0,
+            "written_total": self._written_total,
+            "batches_total": self._batches_total,
+            "retried_total": self._retried_total,
+            "failed_total": self._failed_total,
+        }
+
+
+message_sink = MessageSink(
+    callback_loop,
+    batch_size=settings.MESSAGE_SINK_BATCH_SIZE,
+    flush_interval=settings.MESSAGE_SINK_FLUSH_INTERVAL,
+    touch_interval=settings.MESSAGE_SINK_TOUCH_INTERVAL,
+    retries=settings.MESSAGE_SINK_RETRIES,
+    retry_backoff=settings.MESSAGE_SINK_RETRY_BACKOFF,
+)
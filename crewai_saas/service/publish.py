@@ -0,0 +1,113 @@
+import asyncio
+import logging
+from typing import Optional
+
+from supabase._async.client import AsyncClient
+
+from crewai_saas import crud
+from crewai_saas.model import Crew, KnowledgeCreate, PublishedAgentCreate, PublishedCrew, PublishedCrewCreate, \
+    PublishedTaskCreate
+from crewai_saas.service.crew_definition import crew_definitions
+from crewai_saas.service.crewai import assemble_crew_response, load_agent_tools
+
+logger = logging.getLogger(__name__)
+
+
+class PublishError(Exception):
+    """raised when a crew cannot be snapshotted; nothing of the snapshot is left visible"""
+
+
+async def publish_crew(session: AsyncClient, *, crew_id: int) -> dict:
+    """
+    Snapshot a crew into published_crew / published_agent / published_task / knowledge.
+
+    The snapshot is written with one bulk insert per table while the published_crew row
+    is still hidden (is_deleted=True); the crew is flagged has_published and a single
+    update then makes the snapshot visible together with its task order. If any step
+    fails the rows written so far are deleted again and the flag is restored.
+    Returns the same payload as crewai.make_response, built from the rows read up front.
+    """
+    crew = await crud.crew.get_active(session, id=crew_id)
+    if not crew:
+        raise PublishError(f"Crew not found. crew_id: {crew_id}")
+
+    agents, tasks = await asyncio.gather(
+        crud.agent.get_all_active_by_crew_id(session, crew_id=crew_id),
+        crud.task.get_all_active_by_crew_id(session, crew_id=crew_id),
+    )
+    knowledges, tools = await asyncio.gather(
+        crud.knowledge.get_all_active_by_agent_ids(session, agent_ids=[agent.id for agent in agents]),
+        load_agent_tools(session, agents),
+    )
+
+    tasks_by_id = {task.id: task for task in tasks}
+    ordered_tasks = [tasks_by_id[task_id] for task_id in (crew.task_ids or []) if task_id in tasks_by_id]
+
+    hidden: Optional[PublishedCrew] = None
+    published: Optional[Crew] = None
+    published_agent_ids: list[int] = []
+    try:
+        hidden = await crud.published_crew.create(
+            session, obj_in=PublishedCrewCreate(**{**crew.dict(), "crew_id": crew_id, "is_deleted": True}))
+
+        # PostgREST returns inserted rows in insertion order
+        published_agents = await crud.published_agent.create_many(session, objs_in=[
+            PublishedAgentCreate(**agent.dict(), published_crew_id=hidden.id) for agent in agents])
+        published_agent_ids = [published_agent.id for published_agent in published_agents]
+        published_agent_by_agent_id = {agent.id: published_agent.id
+                                       for agent, published_agent in zip(agents, published_agents)}
+
+        published_tasks = await crud.published_task.create_many(session, objs_in=[
+            PublishedTaskCreate(**task.dict(), published_agent_id=published_agent_by_agent_id[task.agent_id],
+                                published_crew_id=hidden.id, context_published_task_ids=[])
+            for task in ordered_tasks])
+        published_task_by_task_id = {task.id: published_task
+                                     for task, published_task in zip(ordered_tasks, published_tasks)}
+
+        with_context = [
+            published_task_by_task_id[task.id].copy(update={
+                "context_published_task_ids": [published_task_by_task_id[context_task_id].id
+                                               for context_task_id in task.context_task_ids]})
+            for task in ordered_tasks if task.context_task_ids
+        ]
+        await asyncio.gather(
+            crud.knowledge.create_many(session, objs_in=[
+                KnowledgeCreate(published_agent_id=published_agent_by_agent_id[knowledge.agent_id],
+                                file_path=knowledge.file_path, index_status=knowledge.index_status,
+                                content_hash=knowledge.content_hash)
+                for knowledge in knowledges]),
+            crud.published_task.upsert_many(session, objs=with_context),
+        )
+
+        # flag the crew before the snapshot becomes visible, so a visible snapshot always has it set
+        published = await crud.crew.update_has_published(session, crew_id=crew_id, has_published=True)
+        await crud.published_crew.publish(session, published_crew_id=hidden.id,
+                                          published_task_ids=[published_task.id for published_task in published_tasks])
+    except Exception as e:
+        logger.error(f"Publishing crew failed. crew_id: {crew_id}, error: {e}", exc_info=True)
+        if published is not None and not crew.has_published:
+            await _restore_has_published(session, crew_id)
+        if hidden is not None:
+            await _discard(session, hidden.id, published_agent_ids)
+        raise PublishError(f"Publishing crew failed. crew_id: {crew_id}") from e
+
+    crew_definitions.invalidate_crew(crew_id)
+    return assemble_crew_response(published, tasks, agents, tools)
+
+
+async def _restore_has_published(session: AsyncClient, crew_id: int) -> None:
+    try:
+        await crud.crew.update_has_published(session, crew_id=crew_id, has_published=False)
+    except Exception as e:
+        logger.error(f"Failed to restore has_published. crew_id: {crew_id}, error: {e}")
+
+
+async def _discard(session: AsyncClient, published_crew_id: int, published_agent_ids: list[int]) -> None:
+    try:
+        await crud.knowledge.delete_all_by_published_agent_ids(session, published_agent_ids=published_agent_ids)
+        await crud.published_task.delete_all_by_published_crew_id(session, published_crew_id=published_crew_id)
+        await crud.published_agent.delete_all_by_published_crew_id(session, published_crew_id=published_crew_id)
+        await crud.published_crew.delete(session, id=published_crew_id)
+    except Exception as e:
+        # the snapshot stays hidden (is_deleted=True), so readers never see the leftovers
+        logger.error(f"Failed to discard partial snapshot. published_crew_id: {published_crew_id}, error: {e}")
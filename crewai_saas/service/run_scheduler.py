@@ -0,0 +1,157 @@
+import asyncio
+import logging
+import time
+from collections import defaultdict, deque
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Optional
+
+from crewai_saas import crud
+from crewai_saas.core.config import settings
+from crewai_saas.core.enum import CycleStatus
+from crewai_saas.core.supabase_pool import SupabaseClientPool
+from crewai_saas.service.cancellation import CycleStoppedError
+from crewai_saas.service.crewAiService import CrewAiStartService
+
+logger = logging.getLogger(__name__)
+
+
+class RunQueueFullError(Exception):
+    """raised when a kick-off is submitted while the run queue is at capacity"""
+
+
+@dataclass
+class RunJob:
+    employed_crew_id: int
+    chat_id: int
+    cycle_id: int
+    tenant_id: int
+    enqueued_at: float = field(default_factory=time.monotonic)
+
+
+class RunScheduler:
+    """
+    Runs crew kick-offs in the background.
+
+    A fixed number of worker tasks drain one job queue; each tenant (profile) may have at
+    most per_tenant_limit runs executing at once, extra jobs wait in a per-tenant backlog.
+    The blocking crew kickoff executes on a bounded thread pool shared by all runs.
+    """
+
+    def __init__(self, *, workers: int, per_tenant_limit: int, queue_size: int):
+        self.workers = workers
+        self.per_tenant_limit = per_tenant_limit
+        self.queue_size = queue_size
+
+        self.executor: Optional[ThreadPoolExecutor] = None
+        self._pool: Optional[SupabaseClientPool] = None
+        self._queue: asyncio.Queue[RunJob] = asyncio.Queue()
+        self._deferred: dict[int, deque[RunJob]] = defaultdict(deque)
+        self._running: dict[int, int] = defaultdict(int)
+        self._worker_tasks: list[asyncio.Task] = []
+        self._completed_total = 0
+        self._failed_total = 0
+        self._stopped_total = 0
+
+    async def start(self, pool: SupabaseClientPool) -> None:
+        self._pool = pool
+        self.executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="crew-run")
+        self._worker_tasks = [
+            asyncio.create_task(self._worker(), name=f"crew-run-worker-{i}") for i in range(self.workers)
+        ]
+        logger.info(f"Run scheduler started. workers: {self.workers}, per_tenant_limit: {self.per_tenant_limit}")
+
+    async def stop(self) -> None:
+        for task in self._worker_tasks:
+            task.cancel()
+        await asyncio.gather(*self._worker_tasks, return_exceptions=True)
+        self._worker_tasks = []
+        if self.executor:
+            self.executor.shutdown(wait=False, cancel_futures=True)
+            self.executor = None
+        logger.info(f"Run scheduler stopped. stats: {self.stats()}")
+
+    def pending(self) -> int:
+        return self._queue.qsize() + sum(len(jobs) for jobs in self._deferred.values())
+
+    def submit(self, job: RunJob) -> None:
+        if not self._worker_tasks:
+            raise RunQueueFullError("Run scheduler is not running")
+        if self.pending() >= self.queue_size:
+            raise RunQueueFullError(f"Run queue is full. size: {self.queue_size}")
+        self._queue.put_nowait(job)
+
+    async def _worker(self) -> None:
+        while True:
+            job = await self._queue.get()
+            # keep the tenant's jobs in submission order behind any already waiting
+            if self._running[job.tenant_id] >= self.per_tenant_limit or self._deferred.get(job.tenant_id):
+                self._deferred[job.tenant_id].append(job)
+                continue
+
+            tenant_id = job.tenant_id
+            while job is not None:
+                self._running[tenant_id] += 1
+                try:
+                    await self._run(job)
+                finally:
+                    self._running[tenant_id] -= 1
+                    if not self._running[tenant_id]:
+                        del self._running[tenant_id]
+                # the slot just freed goes to the tenant's oldest waiting job
+                job = self._next_deferred(tenant_id)
+
+    def _next_deferred(self, tenant_id: int) -> Optional[RunJob]:
+        deferred = self._deferred.get(tenant_id)
+        if not deferred:
+            return None
+        job = deferred.popleft()
+        if not deferred:
+            del self._deferred[tenant_id]
+        return job
+
+    async def _run(self, job: RunJob) -> None:
+        logger.info(f"Running crew job: {job}, waited: {time.monotonic() - job.enqueued_at:.2f}s")
+        try:
+            # the run takes a pooled client only around its DB calls, not for the whole kickoff
+            await CrewAiStartService(self._pool.connection, executor=self.executor).start(
+                employed_crew_id=job.employed_crew_id, chat_id=job.chat_id, cycle_id=job.cycle_id)
+            self._completed_total += 1
+        except asyncio.CancelledError:
+            raise
+        except CycleStoppedError:
+            self._stopped_total += 1
+            logger.info(f"Crew job stopped: {job}")
+        except Exception as e:
+            self._failed_total += 1
+            logger.error(f"Crew job failed: {job}, error: {e}", exc_info=True)
+            await self._mark_error(job.cycle_id)
+
+    async def _mark_error(self, cycle_id: int) -> None:
+        try:
+            async with self._pool.connection() as session:
+                cycle = await crud.cycle.get(session, id=cycle_id)
+                # a stop request already moved the cycle out of STARTED; keep that status
+                if cycle and cycle.status == CycleStatus.STARTED.value:
+                    await crud.cycle.update_status(session, cycle_id=cycle_id, status=CycleStatus.ERROR)
+        except Exception as e:
+            logger.error(f"Failed to mark cycle as errored. cycle_id: {cycle_id}, error: {e}")
+
+    def stats(self) -> dict:
+        return {
+            "workers": self.workers,
+            "queued": self._queue.qsize(),
+            "deferred": sum(len(jobs) for jobs in self._deferred.values()),
+            "running": sum(self._running.values()),
+            "running_tenants": len(self._running),
+            "completed_total": self._completed_total,
+            "failed_total": self._failed_total,
+            "stopped_total": self._stopped_total,
+        }
+
+
+run_scheduler = RunScheduler(
+    workers=settings.RUN_WORKERS,
+    per_tenant_limit=settings.RUN_PER_TENANT_LIMIT,
+    queue_size=settings.RUN_QUEUE_SIZE,
+)
@@ -0,0 +1,125 @@
+import logging
+import threading
+from dataclasses import dataclass
+from typing import Any, Optional
+
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.outputs import LLMResult
+from supabase._async.client import AsyncClient
+
+from crewai_saas import crud
+from crewai_saas.core.config import settings
+from crewai_saas.model import Llm
+from crewai_saas.service.llm_cache import CACHED_GENERATION_KEY
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class TokenUsage:
+    input_token: int = 0
+    output_token: int = 0
+
+    @property
+    def total_token(self) -> int:
+        return self.input_token + self.output_token
+
+    def cost(self, llm: Llm) -> float:
+        """llm prices are per million tokens"""
+        return (self.input_token * (llm.input_price or 0) + self.output_token * (llm.output_price or 0)) / 1_000_000
+
+    def __iadd__(self, other: "TokenUsage") -> "TokenUsage":
+        self.input_token += other.input_token
+        self.output_token += other.output_token
+        return self
+
+
+def usage_from_result(response: LLMResult) -> TokenUsage:
+    """
+    Provider-reported usage of one LLM call: OpenAI style llm_output["token_usage"] when
+    present, otherwise the usage_metadata of the returned messages. Generations served
+    from the response cache are marked and count as zero.
+    """
+    token_usage = (response.llm_output or {}).get("token_usage")
+    if token_usage:
+        return TokenUsage(input_token=token_usage.get("prompt_tokens", 0) or 0,
+                          output_token=token_usage.get("completion_tokens", 0) or 0)
+
+    usage = TokenUsage()
+    for generations in response.generations:
+        for generation in generations:
+            if (generation.generation_info or {}).get(CACHED_GENERATION_KEY):
+                continue
+            usage_metadata = getattr(getattr(generation, "message", None), "usage_metadata", None)
+            if usage_metadata:
+                usage += TokenUsage(input_token=usage_metadata.get("input_tokens", 0),
+                                    output_token=usage_metadata.get("output_tokens", 0))
+    return usage
+
+
+class UsageRecorder(BaseCallbackHandler):
+    """
+    Callback handler attached to one agent's chat model.
+
+    LLM calls accumulate into a pending step until the agent's step callback takes it with
+    take_step(); the run total keeps growing. Both are guarded since crewai may call back
+    from several threads.
+    """
+
+    def __init__(self):
+        self._step = TokenUsage()
+        self._total = TokenUsage()
+        self._lock = threading.Lock()
+
+    def on_llm_end(self, response: LLMResult, **kwargs: Any) -> None:
+        usage = usage_from_result(response)
+        with self._lock:
+            self._step += usage
+            self._total += usage
+
+    def take_step(self) -> TokenUsage:
+        with self._lock:
+            step, self._step = self._step, TokenUsage()
+        return step
+
+    @property
+    def total(self) -> TokenUsage:
+        with self._lock:
+            return TokenUsage(self._total.input_token, self._total.output_token)
+
+
+def run_total(recorders: list[UsageRecorder]) -> TokenUsage:
+    total = TokenUsage()
+    for recorder in recorders:
+        total += recorder.total
+    return total
+
+
+def next_average(average: Optional[int], total_token: int, alpha: float) -> int:
+    """exponential moving average; the first recorded run seeds it"""
+    if not average:
+        return total_token
+    return round(average + alpha * (total_token - average))
+
+
+USAGE_UPDATE_ATTEMPTS = 3
+
+
+async def record_crew_usage(session: AsyncClient, *, crew_id: int, total_token: int) -> None:
+    """
+    Fold one run into the crew's average. Concurrent runs of the same crew would lose each
+    other's update with a plain read-then-write, so the write only applies if the average
+    is unchanged since the read, and is retried on a fresh read otherwise.
+    """
+    if total_token <= 0:
+        return
+    for _ in range(USAGE_UPDATE_ATTEMPTS):
+        crew = await crud.crew.get(session, id=crew_id)
+        if crew is None:
+            return
+        average = next_average(crew.average_token_usage, total_token, settings.USAGE_AVERAGE_ALPHA)
+        if await crud.crew.compare_and_set_average_token_usage(session, crew_id=crew_id, expected=crew.average_token_usage,
+                                                               average_token_usage=average):
+            logger.info(f"Crew usage recorded. crew_id: {crew_id}, total_token: {total_token}, average: {average}")
+            return
+    logger.warning(f"Crew usage not recorded after concurrent updates. crew_id: {crew_id}, total_token: {total_token}")
@@ -6,9 +6,12 @@ from .stock_info import StockInfoTools
 from .stock_news import stock_news
 
 import os
-from typing import Union
-from urllib.parse import urljoin
-from crewai_tools import DOCXSearchTool, PDFSearchTool, TXTSearchTool, CSVSearchTool, XMLSearchTool
+from typing import Optional
+from urllib.parse import urljoin, urlparse
+
+from langchain_core.tools import BaseTool
+
+from .knowledge_index import EXTENSION_KINDS, knowledge_search_tool
 
 function_map = {
     "calculate": CalculatorTools.calculate,
@@ -41,34 +44,23 @@ def get_full_file_path(file_name: str) -> str:
     Supabase URL과 파일명을 조합하여 완전한 파일 경로를 생성합니다.
     SUPABASE_URL 환경 변수를 사용합니다.
     """
-    print(os.getenv("SUPABASE_URL", ""), "/storage/v1/object/public/", file_name)
     return urljoin(urljoin(os.getenv("SUPABASE_URL", ""), "/storage/v1/object/public/"), file_name)
 
 
-def get_search_tool(file_name: str) -> Union[
-    DOCXSearchTool, PDFSearchTool, TXTSearchTool, CSVSearchTool, XMLSearchTool]:
+def get_search_tool(file_name: str, content_hash: Optional[str] = None) -> BaseTool:
     """
-    파일명을 받아 적절한 검색 도구를 반환합니다.
+    파일명을 받아 해당 파일의 지식 인덱스 검색 도구를 반환합니다.
+    인덱스는 파일 내용 해시와 임베딩 모델 기준으로 로컬 디스크에 한 번만 만들어지고 공유됩니다.
 
     :param file_name: Supabase에 저장된 파일명
-    :return: 해당 파일 유형에 맞는 검색 도구
+    :param content_hash: 업로드 시 기록된 파일 내용 해시, 알려져 있으면 인덱스를 찾을 때 파일을 내려받지 않습니다
+    :return: 첫 검색 시점에 인덱스를 여는 검색 도구
     :raises UnsupportedFileTypeError: 지원되지 않는 파일 형식일 경우
     """
     full_file_path = get_full_file_path(file_name)
-    extension = os.path.splitext(file_name)[1].lower()
+    extension = os.path.splitext(urlparse(full_file_path).path)[1].lower()
 
-    if extension == '.docx':
-        return DOCXSearchTool(docx=full_file_path)
-    elif extension == '.pdf':
-        return PDFSearchTool(pdf=full_file_path)
-    elif extension == '.txt':
-        return TXTSearchTool(txt=full_file_path)
-    elif extension == '.csv':
-        return CSVSearchTool(csv=full_file_path)
-    elif extension == '.xml':
-        return XMLSearchTool(xml=full_file_path)
-    else:
+    # 저장소 파일명에는 확장자가 없으므로, 이 경우 형식은 인덱스를 만들 때 파일 내용으로 판별합니다
+    if extension and extension not in EXTENSION_KINDS:
         raise UnsupportedFileTypeError(f"지원되지 않는 파일 형식입니다: {extension}")
-
-
-
+    return knowledge_search_tool(full_file_path, content_hash)
@@ -0,0 +1,120 @@
+import json
+import logging
+import threading
+from concurrent.futures import Future
+from typing import Any, Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from crewai_saas.core.cache import TTLCache
+from crewai_saas.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class ToolHttpClient:
+    """
+    One pooled requests.Session shared by the crew tools, so repeated calls to the same
+    host reuse connections. Every request gets a default timeout, and connection errors,
+    429 and 5xx responses are retried a bounded number of times with backoff.
+
+    fetch_json() additionally caches successful JSON results for a short TTL and coalesces
+    concurrent identical requests, so agents asking the same thing at the same time share
+    one upstream call.
+    """
+
+    def __init__(self, *, timeout: float, pool_size: int, retries: int, backoff: float,
+                 cache_size: int, cache_ttl: float):
+        self.timeout = timeout
+        self.session = requests.Session()
+        # the tools only POST read-only search queries, so POST is safe to retry as well
+        retry = Retry(total=retries, backoff_factor=backoff, status_forcelist=(429, 500, 502, 503, 504),
+                      allowed_methods=frozenset({"GET", "HEAD", "POST"}), raise_on_status=False)
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+        self.results: TTLCache[Any] = TTLCache(maxsize=cache_size, ttl=cache_ttl)
+        self._in_flight: dict[tuple, Future] = {}
+        self._lock = threading.Lock()
+        self._upstream_total = 0
+        self._coalesced_total = 0
+
+    def request(self, method: str, url: str, **kwargs) -> requests.Response:
+        kwargs.setdefault("timeout", self.timeout)
+        return self.session.request(method, url, **kwargs)
+
+    def get(self, url: str, **kwargs) -> requests.Response:
+        return self.request("GET", url, **kwargs)
+
+    def post(self, url: str, **kwargs) -> requests.Response:
+        return self.request("POST", url, **kwargs)
+
+    def fetch_json(self, method: str, url: str, *, ttl: Optional[float] = None, **kwargs) -> Any:
+        """
+        JSON body of a successful response, from the result cache when possible. The cache
+        key covers method, url, params and body but not headers, which carry the API keys.
+        """
+        key = (method.upper(), url, self._canonical(kwargs.get("params")),
+               self._canonical(kwargs.get("json")), self._canonical(kwargs.get("data")))
+        result = self.results.get(key)
+        if result is not None:
+            return result
+
+        with self._lock:
+            future = self._in_flight.get(key)
+            leader = future is None
+            if leader:
+                future = Future()
+                self._in_flight[key] = future
+                self._upstream_total += 1
+            else:
+                self._coalesced_total += 1
+        if not leader:
+            return future.result()
+
+        try:
+            response = self.request(method, url, **kwargs)
+            response.raise_for_status()
+            result = response.json()
+            self.results.set(key, result, ttl=ttl)
+            future.set_result(result)
+            return result
+        except Exception as e:
+            future.set_exception(e)
+            raise
+        finally:
+            with self._lock:
+                self._in_flight.pop(key, None)
+
+    @staticmethod
+    def _canonical(value: Any) -> Optional[str]:
+        if value is None:
+            return None
+        if isinstance(value, (str, bytes)):
+            # bodies the tools pass pre-serialized, e.g. json.dumps({"q": query})
+            try:
+                value = json.loads(value)
+            except ValueError:
+                return value.decode() if isinstance(value, bytes) else value
+        return json.dumps(value, sort_keys=True, default=str)
+
+    def stats(self) -> dict:
+        return {
+            "results": self.results.stats(),
+            "in_flight": len(self._in_flight),
+            "upstream_total": self._upstream_total,
+            "coalesced_total": self._coalesced_total,
+        }
+
+
+http_client = ToolHttpClient(
+    timeout=settings.TOOL_HTTP_TIMEOUT,
+    pool_size=settings.TOOL_HTTP_POOL_SIZE,
+    retries=settings.TOOL_HTTP_RETRIES,
+    backoff=settings.TOOL_HTTP_BACKOFF,
+    cache_size=settings.TOOL_RESULT_CACHE_SIZE,
+    cache_ttl=settings.TOOL_RESULT_CACHE_TTL,
+)
@@ -0,0 +1,300 @@
+import codecs
+import hashlib
+import json
+import logging
+import os
+import shutil
+import tempfile
+import threading
+import time
+import zipfile
+from typing import Optional
+from urllib.parse import urlparse
+
+import numpy as np
+import requests
+from langchain.text_splitter import RecursiveCharacterTextSplitter
+from langchain_community.document_loaders import CSVLoader, Docx2txtLoader, PyPDFLoader, UnstructuredXMLLoader
+from langchain_community.embeddings import OpenAIEmbeddings
+from langchain_core.tools import BaseTool, StructuredTool
+
+from crewai_saas.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+EXTENSION_KINDS = {".pdf": "pdf", ".docx": "docx", ".txt": "txt", ".csv": "csv", ".xml": "xml"}
+
+
+class KnowledgeIndexError(Exception):
+    """raised when a knowledge file cannot be downloaded, parsed or embedded"""
+
+
+def file_kind(file_path: str, head: bytes = b"", local_path: Optional[str] = None) -> Optional[str]:
+    """
+    Kind of a knowledge file from its extension; storage names carry none, so fall back
+    to the leading bytes, and for ZIP archives to their entries (local_path), since xlsx
+    and pptx are ZIPs too. None when the file is not supported.
+    """
+    extension = os.path.splitext(urlparse(file_path).path)[1].lower()
+    if extension:
+        return EXTENSION_KINDS.get(extension)
+    if head.startswith(b"%PDF"):
+        return "pdf"
+    if head.startswith(b"PK\x03\x04"):
+        return "docx" if local_path is not None and _is_docx(local_path) else None
+    if head.lstrip().startswith(b"<?xml"):
+        return "xml"
+    try:
+        # the head may end in the middle of a multi-byte character
+        codecs.getincrementaldecoder("utf-8")().decode(head, final=False)
+    except UnicodeDecodeError:
+        return None
+    return "txt"
+
+
+def _is_docx(local_path: str) -> bool:
+    try:
+        with zipfile.ZipFile(local_path) as archive:
+            return any(name.startswith("word/") for name in archive.namelist())
+    except zipfile.BadZipFile:
+        return False
+
+
+def extract_text(local_path: str, kind: str) -> str:
+    if kind == "txt":
+        with open(local_path, encoding="utf-8", errors="replace") as f:
+            return f.read()
+    loaders = {"pdf": PyPDFLoader, "docx": Docx2txtLoader, "csv": CSVLoader, "xml": UnstructuredXMLLoader}
+    if kind not in loaders:
+        raise KnowledgeIndexError(f"Unsupported knowledge file kind: {kind}")
+    return "\n".join(document.page_content for document in loaders[kind](local_path).load())
+
+
+class KnowledgeIndex:
+    """
+    One built index: chunks.json, vectors.npy (unit-length float32 rows) and manifest.json
+    in its own directory. Files are opened on the first search; vectors are memory-mapped
+    so every agent searching the same file shares the page cache.
+    """
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        self._chunks: Optional[list[str]] = None
+        self._vectors: Optional[np.ndarray] = None
+        self._lock = threading.Lock()
+
+    def _load(self) -> None:
+        with self._lock:
+            if self._vectors is not None:
+                return
+            with open(os.path.join(self.directory, "chunks.json"), encoding="utf-8") as f:
+                self._chunks = json.load(f)
+            self._vectors = np.load(os.path.join(self.directory, "vectors.npy"), mmap_mode="r")
+
+    def search(self, query_vector: np.ndarray, top_k: int) -> list[str]:
+        self._load()
+        if not self._chunks:
+            return []
+        scores = self._vectors @ query_vector
+        top_k = min(top_k, len(scores))
+        best = np.argpartition(-scores, top_k - 1)[:top_k]
+        return [self._chunks[i] for i in best[np.argsort(-scores[best])]]
+
+
+class KnowledgeIndexStore:
+    """
+    Content-addressed store of knowledge indexes on local disk.
+
+    An index lives under <root>/<sha256 of the file>-<embedding model>, so agents and
+    published copies pointing at the same bytes share one index, and changing the
+    embedding model builds a new one. The file_path -> content hash mapping is kept under
+    <root>/paths so a known file is never downloaded again. Builds are single-flight per
+    content hash and written to a temp directory that is renamed into place.
+    """
+
+    def __init__(self, root: str, *, embedding_model: str, chunk_size: int, chunk_overlap: int, top_k: int):
+        self.root = root
+        self.embedding_model = embedding_model
+        self.chunk_size = chunk_size
+        self.chunk_overlap = chunk_overlap
+        self.top_k = top_k
+        os.makedirs(os.path.join(root, "paths"), exist_ok=True)
+
+        self._embeddings: Optional[OpenAIEmbeddings] = None
+        self._indexes: dict[str, KnowledgeIndex] = {}
+        self._build_locks: dict[str, threading.Lock] = {}
+        self._lock = threading.Lock()
+        self._opened_total = 0
+        self._built_total = 0
+        self._downloaded_total = 0
+
+    @property
+    def embeddings(self) -> OpenAIEmbeddings:
+        if self._embeddings is None:
+            self._embeddings = OpenAIEmbeddings(model=self.embedding_model)
+        return self._embeddings
+
+    def index_dir(self, content_hash: str) -> str:
+        return os.path.join(self.root, f"{content_hash}-{self.embedding_model.replace('/', '_')}")
+
+    def has(self, content_hash: str) -> bool:
+        return os.path.exists(os.path.join(self.index_dir(content_hash), "manifest.json"))
+
+    def content_hash_of(self, file_path: str) -> Optional[str]:
+        try:
+            with open(self._path_entry(file_path), encoding="utf-8") as f:
+                return f.read().strip() or None
+        except FileNotFoundError:
+            return None
+
+    def remember(self, file_path: str, content_hash: str) -> None:
+        self._write_atomic(self._path_entry(file_path), content_hash.encode())
+
+    def open(self, content_hash: str) -> KnowledgeIndex:
+        with self._lock:
+            index = self._indexes.get(content_hash)
+            if index is None:
+                index = KnowledgeIndex(self.index_dir(content_hash))
+                self._indexes[content_hash] = index
+                self._opened_total += 1
+            return index
+
+    def resolve(self, file_path: str, content_hash: Optional[str] = None) -> KnowledgeIndex:
+        """
+        Index for a stored file, downloading and building it only if no one has yet. With the
+        content hash recorded at upload, an index built here for the same bytes is found
+        without the local file_path mapping; the file is downloaded only when this replica has
+        no index for it.
+        """
+        content_hash = content_hash or self.content_hash_of(file_path)
+        if content_hash is not None and not self.has(content_hash):
+            # an ingest may be building it right now; wait for that rather than building twice
+            self.wait_for_build(content_hash)
+        if content_hash is not None and self.has(content_hash):
+            if self.content_hash_of(file_path) != content_hash:
+                self.remember(file_path, content_hash)
+        else:
+            fd, local_path = tempfile.mkstemp(dir=self.root, suffix=".download")
+            os.close(fd)
+            try:
+                content_hash = self._download(file_path, local_path)
+                self.build(local_path, content_hash, file_path=file_path)
+            finally:
+                if os.path.exists(local_path):
+                    os.remove(local_path)
+            self.remember(file_path, content_hash)
+        return self.open(content_hash)
+
+    def wait_for_build(self, content_hash: str) -> None:
+        with self._build_lock(content_hash):
+            pass
+
+    def build(self, local_path: str, content_hash: str, *, file_path: str) -> None:
+        with self._build_lock(content_hash):
+            if self.has(content_hash):
+                return
+            with open(local_path, "rb") as f:
+                kind = file_kind(file_path, f.read(512), local_path)
+            if kind is None:
+                raise KnowledgeIndexError(f"Unsupported knowledge file: {file_path}")
+
+            text = extract_text(local_path, kind)
+            chunks = RecursiveCharacterTextSplitter(
+                chunk_size=self.chunk_size, chunk_overlap=self.chunk_overlap).split_text(text)
+            vectors = np.asarray(self.embeddings.embed_documents(chunks) if chunks else [], dtype=np.float32)
+            if len(vectors):
+                vectors /= np.linalg.norm(vectors, axis=1, keepdims=True).clip(min=1e-12)
+
+            staging = tempfile.mkdtemp(dir=self.root, suffix=".building")
+            try:
+                with open(os.path.join(staging, "chunks.json"), "w", encoding="utf-8") as f:
+                    json.dump(chunks, f, ensure_ascii=False)
+                np.save(os.path.join(staging, "vectors.npy"), vectors)
+                with open(os.path.join(staging, "manifest.json"), "w", encoding="utf-8") as f:
+                    json.dump({
+                        "content_hash": content_hash,
+                        "embedding_model": self.embedding_model,
+                        "kind": kind,
+                        "chunks": len(chunks),
+                        "dimensions": int(vectors.shape[1]) if len(vectors) else 0,
+                        "chunk_size": self.chunk_size,
+                        "chunk_overlap": self.chunk_overlap,
+                        "created_at": time.time(),
+                    }, f)
+                os.replace(staging, self.index_dir(content_hash))
+            except OSError:
+                # another process renamed the same index into place first
+                if not self.has(content_hash):
+                    raise
+            finally:
+                shutil.rmtree(staging, ignore_errors=True)
+            self._built_total += 1
+            logger.info(f"Knowledge index built. content_hash: {content_hash}, kind: {kind}, chunks: {len(chunks)}")
+
+    def search(self, file_path: str, query: str, content_hash: Optional[str] = None) -> str:
+        index = self.resolve(file_path, content_hash)
+        query_vector = np.asarray(self.embeddings.embed_query(query), dtype=np.float32)
+        query_vector /= max(float(np.linalg.norm(query_vector)), 1e-12)
+        return "\n\n".join(index.search(query_vector, self.top_k))
+
+    def _download(self, file_path: str, local_path: str) -> str:
+        digest = hashlib.sha256()
+        with requests.get(file_path, stream=True, timeout=30) as response:
+            if response.status_code != 200:
+                raise KnowledgeIndexError(f"Failed to download knowledge file: {file_path}, status: {response.status_code}")
+            with open(local_path, "wb") as f:
+                for block in response.iter_content(chunk_size=1 << 16):
+                    digest.update(block)
+                    f.write(block)
+        self._downloaded_total += 1
+        return digest.hexdigest()
+
+    def _build_lock(self, content_hash: str) -> threading.Lock:
+        with self._lock:
+            return self._build_locks.setdefault(content_hash, threading.Lock())
+
+    def _path_entry(self, file_path: str) -> str:
+        return os.path.join(self.root, "paths", hashlib.sha256(file_path.encode()).hexdigest())
+
+    def _write_atomic(self, path: str, content: bytes) -> None:
+        fd, staging = tempfile.mkstemp(dir=os.path.dirname(path))
+        with os.fdopen(fd, "wb") as f:
+            f.write(content)
+        os.replace(staging, path)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "open_indexes": len(self._indexes),
+                "opened_total": self._opened_total,
+                "built_total": self._built_total,
+                "downloaded_total": self._downloaded_total,
+            }
+
+
+knowledge_index_store = KnowledgeIndexStore(
+    settings.KNOWLEDGE_INDEX_DIR,
+    embedding_model=settings.KNOWLEDGE_EMBEDDING_MODEL,
+    chunk_size=settings.KNOWLEDGE_CHUNK_SIZE,
+    chunk_overlap=settings.KNOWLEDGE_CHUNK_OVERLAP,
+    top_k=settings.KNOWLEDGE_TOP_K,
+)
+
+
+def knowledge_search_tool(file_path: str, content_hash: Optional[str] = None) -> BaseTool:
+    """Search tool over one knowledge file; nothing is downloaded or opened until the first query."""
+    name = os.path.basename(urlparse(file_path).path)
+
+    def search_knowledge(search_query: str) -> str:
+        try:
+            return knowledge_index_store.search(file_path, search_query, content_hash)
+        except KnowledgeIndexError as e:
+            logger.error(f"Knowledge search failed. file_path: {file_path}, error: {e}")
+            return f"The knowledge file could not be searched: {e}"
+
+    return StructuredTool.from_function(
+        func=search_knowledge,
+        name=f"Search knowledge file {name}",
+        description=f"A tool that can be used to semantic search a query from the knowledge file {name}. "
+                    f"The input is the search query.",
+    )
@@ -1,9 +1,10 @@
 import json
 import os
 
-import requests
 from langchain.tools import tool
 
+from crewai_saas.tool.http_client import http_client
+
 
 class SearchTools():
   @tool("Search the internet")
@@ -43,8 +44,7 @@ class SearchTools():
         'X-API-KEY': os.environ['SERPER_API_KEY'],
         'content-type': 'application/json'
     }
-    response = requests.request("POST", url, headers=headers, data=payload)
-    results = response.json()['organic']
+    results = http_client.fetch_json("POST", url, headers=headers, data=payload)['organic']
     string = []
     for result in results[:top_result_to_return]:
       try:
@@ -93,8 +93,7 @@ class SearchTools():
         'X-API-KEY': os.environ['SERPER_API_KEY'],
         'content-type': 'application/json'
     }
-    response = requests.request("POST", url, headers=headers, data=payload)
-    results = response.json()['news']
+    results = http_client.fetch_json("POST", url, headers=headers, data=payload)['news']
     string = []
     for result in results[:top_result_to_return]:
       try:
@@ -0,0 +1,187 @@
+import json
+import logging
+import os
+import shutil
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional
+
+from langchain.text_splitter import CharacterTextSplitter
+from langchain_community.embeddings import OpenAIEmbeddings
+from langchain_community.vectorstores import FAISS
+from sec_api import QueryApi
+from unstructured.partition.html import partition_html
+
+from crewai_saas.core.cache import TTLCache
+from crewai_saas.core.config import settings
+from crewai_saas.tool.http_client import http_client
+
+logger = logging.getLogger(__name__)
+
+FILING_HEADERS = {
+    'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/avif,image/webp,image/apng,*/*;q=0.8,application/signed-exchange;v=b3;q=0.7',
+    'Accept-Encoding': 'gzip, deflate, br',
+    'Accept-Language': 'en-US,en;q=0.9,pt-BR;q=0.8,pt;q=0.7',
+    'Cache-Control': 'max-age=0',
+    'Dnt': '1',
+    'Sec-Ch-Ua': '"Not_A Brand";v="8", "Chromium";v="120"',
+    'Sec-Ch-Ua-Mobile': '?0',
+    'Sec-Ch-Ua-Platform': '"macOS"',
+    'Sec-Fetch-Dest': 'document',
+    'Sec-Fetch-Mode': 'navigate',
+    'Sec-Fetch-Site': 'none',
+    'Sec-Fetch-User': '?1',
+    'Upgrade-Insecure-Requests': '1',
+    'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36'
+}
+
+
+class SecFilingCache:
+    """
+    Parsed and embedded SEC filings, keyed by accession number.
+
+    A filing is downloaded, partitioned, chunked and embedded once; its text, manifest and
+    FAISS index (chunks included) are saved under <root>/<accession number>-<embedding
+    model>. Later questions about the same filing load that index, kept open in a small
+    LRU, and cost one query embedding plus a vector search. The ticker -> latest filing
+    lookup is cached for lookup_ttl seconds. Builds are single-flight per filing.
+    """
+
+    def __init__(self, root: str, *, embedding_model: str, batch_size: int, workers: int,
+                 lookup_ttl: float, open_filings: int):
+        self.root = root
+        self.embedding_model = embedding_model
+        self.batch_size = batch_size
+        self.workers = workers
+        os.makedirs(root, exist_ok=True)
+
+        self._query_api: Optional[QueryApi] = None
+        self._embeddings: Optional[OpenAIEmbeddings] = None
+        self.latest_filings: TTLCache[Optional[dict]] = TTLCache(maxsize=1024, ttl=lookup_ttl)
+        self.open_filings: TTLCache[FAISS] = TTLCache(maxsize=open_filings, ttl=24 * 3600)
+        self._build_locks: dict[str, threading.Lock] = {}
+        self._lock = threading.Lock()
+        self._built_total = 0
+
+    @property
+    def query_api(self) -> QueryApi:
+        if self._query_api is None:
+            self._query_api = QueryApi(api_key=os.environ['SEC_API_API_KEY'])
+        return self._query_api
+
+    @property
+    def embeddings(self) -> OpenAIEmbeddings:
+        if self._embeddings is None:
+            self._embeddings = OpenAIEmbeddings(model=self.embedding_model, chunk_size=self.batch_size)
+        return self._embeddings
+
+    def latest_filing(self, ticker: str, form_type: str) -> Optional[dict]:
+        key = (ticker.strip().upper(), form_type)
+        filing = self.latest_filings.get(key)
+        if filing is not None:
+            return filing
+        query = {
+            "query": {
+                "query_string": {
+                    "query": f"ticker:{key[0]} AND formType:\"{form_type}\""
+                }
+            },
+            "from": "0",
+            "size": "1",
+            "sort": [{"filedAt": {"order": "desc"}}]
+        }
+        filings = self.query_api.get_filings(query)['filings']
+        if not filings:
+            return None
+        self.latest_filings.set(key, filings[0])
+        return filings[0]
+
+    def search(self, filing: dict, ask: str, k: int = 4) -> str:
+        answers = self.open(filing).similarity_search(ask, k=k)
+        return "\n\n".join(answer.page_content for answer in answers)
+
+    def open(self, filing: dict) -> FAISS:
+        accession_no = filing['accessionNo']
+        store = self.open_filings.get(accession_no)
+        if store is not None:
+            return store
+        with self._build_lock(accession_no):
+            store = self.open_filings.get(accession_no)
+            if store is None:
+                directory = self.filing_dir(accession_no)
+                if not os.path.exists(os.path.join(directory, "manifest.json")):
+                    self._build(filing, directory)
+                store = FAISS.load_local(directory, self.embeddings, allow_dangerous_deserialization=True)
+                self.open_filings.set(accession_no, store)
+        return store
+
+    def filing_dir(self, accession_no: str) -> str:
+        return os.path.join(self.root, f"{accession_no}-{self.embedding_model.replace('/', '_')}")
+
+    def _build(self, filing: dict, directory: str) -> None:
+        url = filing['linkToFilingDetails']
+        response = http_client.get(url, headers=FILING_HEADERS)
+        response.raise_for_status()
+        content = "\n".join(str(element) for element in partition_html(text=response.text))
+        chunks = CharacterTextSplitter(
+            separator="\n",
+            chunk_size=1000,
+            chunk_overlap=150,
+            length_function=len,
+            is_separator_regex=False,
+        ).split_text(content)
+
+        # embed batches concurrently; the embedding client reuses its connections
+        batches = [chunks[i:i + self.batch_size] for i in range(0, len(chunks), self.batch_size)]
+        with ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="sec-embed") as executor:
+            vectors = [vector for batch in executor.map(self.embeddings.embed_documents, batches) for vector in batch]
+        store = FAISS.from_embeddings(list(zip(chunks, vectors)), self.embeddings)
+
+        staging = tempfile.mkdtemp(dir=self.root, suffix=".building")
+        try:
+            store.save_local(staging)
+            with open(os.path.join(staging, "content.txt"), "w", encoding="utf-8") as f:
+                f.write(content)
+            with open(os.path.join(staging, "manifest.json"), "w", encoding="utf-8") as f:
+                json.dump({
+                    "accession_no": filing['accessionNo'],
+                    "ticker": filing.get('ticker'),
+                    "form_type": filing.get('formType'),
+                    "filed_at": filing.get('filedAt'),
+                    "url": url,
+                    "embedding_model": self.embedding_model,
+                    "chunks": len(chunks),
+                    "created_at": time.time(),
+                }, f)
+            os.replace(staging, directory)
+        except OSError:
+            # another process renamed the same filing into place first
+            if not os.path.exists(os.path.join(directory, "manifest.json")):
+                raise
+        finally:
+            shutil.rmtree(staging, ignore_errors=True)
+        self._built_total += 1
+        logger.info(f"SEC filing cached. accession_no: {filing['accessionNo']}, chunks: {len(chunks)}")
+
+    def _build_lock(self, accession_no: str) -> threading.Lock:
+        with self._lock:
+            return self._build_locks.setdefault(accession_no, threading.Lock())
+
+    def stats(self) -> dict:
+        return {
+            "latest_filings": self.latest_filings.stats(),
+            "open_filings": self.open_filings.stats(),
+            "built_total": self._built_total,
+        }
+
+
+sec_filing_cache = SecFilingCache(
+    settings.SEC_FILING_CACHE_DIR,
+    embedding_model=settings.SEC_EMBEDDING_MODEL,
+    batch_size=settings.SEC_EMBEDDING_BATCH_SIZE,
+    workers=settings.SEC_EMBEDDING_WORKERS,
+    lookup_ttl=settings.SEC_FILING_LOOKUP_TTL,
+    open_filings=settings.SEC_OPEN_FILINGS,
+)
@@ -0,0 +1,212 @@
+import json
+import logging
+import os
+import threading
+from typing import Any, Protocol
+
+import pandas as pd
+
+from crewai_saas.core.cache import TTLCache
+from crewai_saas.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+HISTORY = "history"
+FINANCIALS = "financials"
+BALANCE_SHEET = "balance_sheet"
+INSIDER_TRANSACTIONS = "insider_transactions"
+NEWS = "news"
+
+
+class StockDataBackend(Protocol):
+    def fetch(self, ticker: str, dataset: str) -> Any: ...
+
+
+class YFinanceBackend:
+    """live data from Yahoo Finance"""
+
+    def fetch(self, ticker: str, dataset: str) -> Any:
+        # imported here so the fixture backend works where yfinance is not installed
+        import yfinance as yf
+
+        ticker_info = yf.Ticker(ticker)
+        if dataset == HISTORY:
+            return ticker_info.history(period="1mo")
+        return getattr(ticker_info, dataset)
+
+
+class FixtureBackend:
+    """
+    Recorded data under <root>/<TICKER>/: one CSV per DataFrame dataset and news.json, so
+    the stock tools can run offline and deterministically.
+    """
+
+    def __init__(self, root: str):
+        self.root = root
+
+    def path(self, ticker: str, dataset: str) -> str:
+        return os.path.join(self.root, ticker, f"{dataset}.json" if dataset == NEWS else f"{dataset}.csv")
+
+    def fetch(self, ticker: str, dataset: str) -> Any:
+        path = self.path(ticker, dataset)
+        if not os.path.exists(path):
+            return [] if dataset == NEWS else pd.DataFrame()
+        if dataset == NEWS:
+            with open(path, encoding="utf-8") as f:
+                return json.load(f)
+        frame = pd.read_csv(path, index_col=0)
+        if dataset == HISTORY:
+            # offsets change with daylight saving, so parse through UTC; the date stays the same
+            frame.index = pd.to_datetime(frame.index, utc=True)
+        return frame
+
+    def save(self, ticker: str, dataset: str, data: Any) -> None:
+        path = self.path(ticker, dataset)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        if dataset == NEWS:
+            with open(path, "w", encoding="utf-8") as f:
+                json.dump(data or [], f, ensure_ascii=False, indent=2, default=str)
+        elif data is not None:
+            data.to_csv(path)
+
+
+class RecordingBackend:
+    """fetches live data and writes it as fixtures for FixtureBackend"""
+
+    def __init__(self, live: StockDataBackend, fixtures: FixtureBackend):
+        self.live = live
+        self.fixtures = fixtures
+
+    def fetch(self, ticker: str, dataset: str) -> Any:
+        data = self.live.fetch(ticker, dataset)
+        self.fixtures.save(ticker, dataset, data)
+        return data
+
+
+class StockDataCache:
+    """
+    Per-ticker cache in front of a stock data backend.
+
+    Each dataset has its own TTL: prices go stale in minutes, financial statements in days.
+    Concurrent misses for the same ticker and dataset share one backend fetch.
+    """
+
+    def __init__(self, backend: StockDataBackend, *, ttls: dict[str, float], maxsize: int):
+        self.backend = backend
+        self.ttls = ttls
+        self.entries: TTLCache[Any] = TTLCache(maxsize=maxsize, ttl=max(ttls.values()))
+        self._fetch_locks: dict[tuple[str, str], threading.Lock] = {}
+        self._lock = threading.Lock()
+
+    def get(self, ticker: str, dataset: str) -> Any:
+        key = (ticker.strip().upper(), dataset)
+        data = self.entries.get(key)
+        if data is not None:
+            return data
+        with self._lock:
+            fetch_lock = self._fetch_locks.setdefault(key, threading.Lock())
+        with fetch_lock:
+            data = self.entries.get(key)
+            if data is None:
+                data = self.backend.fetch(key[0], dataset)
+                if data is not None:
+                    self.entries.set(key, data, ttl=self.ttls[dataset])
+        return data
+
+    def stats(self) -> dict:
+        return {"backend": type(self.backend).__name__, **self.entries.stats()}
+
+
+def _make_backend() -> StockDataBackend:
+    if settings.STOCK_DATA_BACKEND == "fixtures":
+        return FixtureBackend(settings.STOCK_FIXTURES_DIR)
+    if settings.STOCK_DATA_BACKEND == "record":
+        return RecordingBackend(YFinanceBackend(), FixtureBackend(settings.STOCK_FIXTURES_DIR))
+    if settings.STOCK_DATA_BACKEND != "yfinance":
+        logger.warning(f"Unknown STOCK_DATA_BACKEND: {settings.STOCK_DATA_BACKEND}, using yfinance")
+    return YFinanceBackend()
+
+
+stock_data = StockDataCache(
+    _make_backend(),
+    ttls={
+        HISTORY: settings.STOCK_PRICE_TTL,
+        FINANCIALS: settings.STOCK_STATEMENT_TTL,
+        BALANCE_SHEET: settings.STOCK_STATEMENT_TTL,
+        INSIDER_TRANSACTIONS: settings.STOCK_INSIDER_TTL,
+        NEWS: settings.STOCK_NEWS_TTL,
+    },
+    maxsize=settings.STOCK_DATA_CACHE_SIZE,
+)
+
+
+def format_table(frame: pd.DataFrame, columns: dict[str, tuple[str, ...]], index_label: str) -> str:
+    """
+    Pipe-separated table of the selected columns, rendered in one to_csv call. Each output
+    column takes the first source column that exists, since yfinance has renamed several
+    of them over time; missing ones are left empty.
+    """
+    selected = pd.DataFrame(
+        {label: next((frame[name].to_numpy() for name in names if name in frame.columns), [None] * len(frame))
+         for label, names in columns.items()},
+        index=frame.index,
+    )
+    return selected.to_csv(sep="|", index_label=index_label, lineterminator="\n").rstrip("\n")
+
+
+def dates(values: Any) -> pd.Index:
+    """calendar dates of a datetime-like index or column, for the index of format_table"""
+    return pd.Index(pd.DatetimeIndex(pd.to_datetime(values)).date)
+
+
+def price_summary(ticker: str) -> str:
+    history = stock_data.get(ticker, HISTORY)
+    if history is None or history.empty:
+        return f"No price data found for {ticker}"
+
+    return format_table(history.set_axis(dates(history.index)), {
+        "Open": ("Open",), "High": ("High",), "Low": ("Low",), "Close": ("Close",), "Volume": ("Volume",),
+    }, index_label="Date")
+
+
+def income_statement_summary(ticker: str) -> str:
+    financials = stock_data.get(ticker, FINANCIALS)
+    if financials is None or financials.empty:
+        return f"No income statement found for {ticker}"
+
+    financials = financials.T
+    return format_table(financials.set_axis(dates(financials.index)), {
+        "Revenue": ("Total Revenue",),
+        "Gross Profit": ("Gross Profit",),
+        "Operating Income": ("Operating Income",),
+        "Net Income": ("Net Income",),
+    }, index_label="Period")
+
+
+def balance_sheet_summary(ticker: str) -> str:
+    balance_sheet = stock_data.get(ticker, BALANCE_SHEET)
+    if balance_sheet is None or balance_sheet.empty:
+        return f"No balance sheet found for {ticker}"
+
+    balance_sheet = balance_sheet.T
+    return format_table(balance_sheet.set_axis(dates(balance_sheet.index)), {
+        "Total Assets": ("Total Assets",),
+        "Total Liabilities": ("Total Liabilities Net Minority Interest", "Total Liab"),
+        "Shareholders' Equity": ("Stockholders Equity", "Total Stockholder Equity"),
+    }, index_label="Period")
+
+
+def insider_transactions_summary(ticker: str) -> str:
+    insider = stock_data.get(ticker, INSIDER_TRANSACTIONS)
+    if insider is None or insider.empty:
+        return f"No insider transactions found for {ticker}"
+
+    date_column = next((name for name in ("Start Date", "Date") if name in insider.columns), None)
+    if date_column is not None:
+        insider = insider.set_axis(dates(insider[date_column]))
+    return format_table(insider, {
+        "Insider Name": ("Insider", "Insider Name"),
+        "Shares Traded": ("Shares",),
+        "Transaction Type": ("Transaction", "Text"),
+        "Price": ("Value", "Value ($)"),
+    }, index_label="Date")
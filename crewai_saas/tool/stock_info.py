@@ -1,5 +1,7 @@
 from crewai_tools import tool
-import yfinance as yf
+
+from crewai_saas.tool.stock_data import price_summary, income_statement_summary, balance_sheet_summary, \
+    insider_transactions_summary
 
 class StockInfoTools:
 
@@ -13,15 +15,7 @@ class StockInfoTools:
         Returns:
         - A summary of the stock's daily price history, including date, open, high, low, close, and volume.
         """
-        ticker_info = yf.Ticker(ticker)
-        history = ticker_info.history(period="1mo")
-
-        result = "Date | Open | High | Low | Close | Volume\n"
-        result += "\n".join(
-            f"{index.date()} | {row['Open']} | {row['High']} | {row['Low']} | {row['Close']} | {row['Volume']}"
-            for index, row in history.iterrows()
-        )
-        return result
+        return price_summary(ticker)
 
     @tool("Income Statement")
     def income_stmt(ticker: str) -> str:
@@ -33,15 +27,7 @@ class StockInfoTools:
         Returns:
         - A summary of the company's income statement, including revenue, gross profit, operating income, and net income.
         """
-        ticker_info = yf.Ticker(ticker)
-        financials = ticker_info.financials.T
-
-        result = "Period | Revenue | Gross Profit | Operating Income | Net Income\n"
-        result += "\n".join(
-            f"{index} | {row['Total Revenue']} | {row['Gross Profit']} | {row['Operating Income']} | {row['Net Income']}"
-            for index, row in financials.iterrows()
-        )
-        return result
+        return income_statement_summary(ticker)
 
     @tool("Balance Sheet")
     def balance_sheet(ticker: str) -> str:
@@ -53,18 +39,10 @@ class StockInfoTools:
         Returns:
         - A summary of the company's balance sheet, including total assets, liabilities, and shareholders' equity.
         """
-        ticker_info = yf.Ticker(ticker)
-        balance_sheet = ticker_info.balance_sheet.T
-
-        result = "Period | Total Assets | Total Liabilities | Shareholders' Equity\n"
-        result += "\n".join(
-            f"{index} | {row['Total Assets']} | {row['Total Liab']} | {row['Total Stockholder Equity']}"
-            for index, row in balance_sheet.iterrows()
-        )
-        return result
+        return balance_sheet_summary(ticker)
 
     @tool("Insider Transactions")
-    def insider_transactions(self, ticker: str) -> str:
+    def insider_transactions(ticker: str) -> str:
         """Get insider transaction data for a given stock ticker.
 
         Parameters:
@@ -73,12 +51,4 @@ class StockInfoTools:
         Returns:
         - A summary of insider transactions, including date, insider name, shares traded, transaction type, and price.
         """
-        ticker_info = yf.Ticker(ticker)
-        insider = ticker_info.insider_transactions
-
-        result = "Date | Insider Name | Shares Traded | Transaction Type | Price\n"
-        result += "\n".join(
-            f"{row['Date'].date()} | {row['Insider Name']} | {row['Shares']} | {row['Transaction']} | {row['Value ($)']}"
-            for index, row in insider.iterrows()
-        )
-        return result
+        return insider_transactions_summary(ticker)
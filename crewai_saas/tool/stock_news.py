@@ -1,5 +1,6 @@
 from crewai_tools import tool
-import yfinance as yf
+
+from crewai_saas.tool.stock_data import stock_data, NEWS
 
 @tool("Stock News")
 def stock_news(ticker):
@@ -32,5 +33,4 @@ def stock_news(ticker):
 
     -----------------
     """
-    ticker = yf.Ticker(ticker)
-    return ticker.news
\ No newline at end of file
+    return stock_data.get(ticker, NEWS)
\ No newline at end of file
@@ -0,0 +1,10 @@
+import os
+
+# core.config reads these at import time; the tests never reach Supabase
+os.environ.setdefault("SUPABASE_URL", "https://example.supabase.co")
+os.environ.setdefault("SUPABASE_KEY", "test-key")
+os.environ.setdefault("API_ENCRYPTION_KEY", "-n7D-9XU2TkUAFbMuNQ46bT1wQhUZcx1fb8m3SsfulY=")
+
+# the stock tools read recorded fixtures instead of Yahoo Finance
+os.environ.setdefault("STOCK_DATA_BACKEND", "fixtures")
+os.environ.setdefault("STOCK_FIXTURES_DIR", os.path.join(os.path.dirname(__file__), "fixtures", "stock"))
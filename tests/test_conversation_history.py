@@ -0,0 +1,58 @@
+import asyncio
+import json
+
+from crewai_saas import crud
+from crewai_saas.core.enum import MessageRole
+from crewai_saas.model import Message
+from crewai_saas.service.conversation_history import HEADER, ConversationHistory
+
+
+def make_message(id: int, cycle_id: int, role: MessageRole, content: str) -> Message:
+    # rows as PostgREST returns them; the model stores the enum value
+    return Message(**{
+        "id": id, "created_at": "2024-01-01T00:00:00", "cost": 0, "input_token": None, "output_token": None,
+        "content": content, "task_id": None, "cycle_id": cycle_id, "role": role.value, "chat_id": 1,
+        "agent_id": None, "type": None,
+    })
+
+
+def patch_crud(monkeypatch, cycle_ids, messages):
+    async def get_finished_ids_by_chat_id_after(db, *, chat_id, last_cycle_id):
+        return [cycle_id for cycle_id in cycle_ids if cycle_id > last_cycle_id]
+
+    async def get_all_by_cycle_ids(db, *, cycle_ids):
+        return [message for message in messages if message.cycle_id in cycle_ids]
+
+    monkeypatch.setattr(crud.cycle, "get_finished_ids_by_chat_id_after", get_finished_ids_by_chat_id_after)
+    monkeypatch.setattr(crud.message, "get_all_by_cycle_ids", get_all_by_cycle_ids)
+
+
+def test_build_from_message_rows(monkeypatch):
+    messages = [
+        make_message(1, 10, MessageRole.USER, "hello"),
+        make_message(2, 10, MessageRole.ASSISTANT, "hi there"),
+    ]
+    patch_crud(monkeypatch, [10], messages)
+
+    rendered = asyncio.run(ConversationHistory(token_budget=1000, max_chats=8).build(None, chat_id=1))
+
+    assert rendered.startswith(HEADER)
+    lines = [json.loads(line) for line in rendered[len(HEADER):].splitlines()]
+    assert sorted(lines, key=lambda line: line["message"]) == [
+        {"role": "user", "message": "hello"},
+        {"role": "assistant", "message": "hi there"},
+    ]
+
+
+def test_only_new_cycles_are_fetched(monkeypatch):
+    messages = [make_message(1, 10, MessageRole.USER, "first")]
+    patch_crud(monkeypatch, [10], messages)
+    history = ConversationHistory(token_budget=1000, max_chats=8)
+    asyncio.run(history.build(None, chat_id=1))
+
+    messages.append(make_message(2, 11, MessageRole.USER, "second"))
+    patch_crud(monkeypatch, [10, 11], messages)
+    rendered = asyncio.run(history.build(None, chat_id=1))
+
+    assert "first" in rendered and "second" in rendered
+    assert history.stats()["hits"] == 1
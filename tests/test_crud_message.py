@@ -0,0 +1,63 @@
+import asyncio
+
+from crewai_saas import crud
+from crewai_saas.core.config import settings
+from crewai_saas.core.enum import MessageRole
+
+
+class FakeQuery:
+    """records the requested range and returns that slice of rows, like PostgREST"""
+
+    def __init__(self, rows, ranges):
+        self.rows = rows
+        self.ranges = ranges
+        self.bounds = (0, len(rows) - 1)
+
+    def range(self, start, end):
+        self.bounds = (start, end)
+        self.ranges.append(self.bounds)
+        return self
+
+    def __getattr__(self, name):
+        return lambda *args, **kwargs: self
+
+    async def execute(self):
+        start, end = self.bounds
+        return ("data", self.rows[start:end + 1]), ("count", None)
+
+
+class FakeClient:
+    def __init__(self, rows):
+        self.rows = rows
+        self.ranges = []
+
+    def table(self, name):
+        return FakeQuery(self.rows, self.ranges)
+
+
+def rows(count):
+    return [{
+        "id": i, "created_at": "2024-01-01T00:00:00", "cost": 0, "input_token": None, "output_token": None,
+        "content": f"message {i}", "task_id": None, "cycle_id": 1, "role": MessageRole.USER.value, "chat_id": 1,
+        "agent_id": None, "type": None,
+    } for i in range(count)]
+
+
+def test_get_all_by_cycle_ids_reads_past_max_rows(monkeypatch):
+    monkeypatch.setattr(settings, "SUPABASE_PAGE_SIZE", 3)
+    db = FakeClient(rows(7))
+
+    messages = asyncio.run(crud.message.get_all_by_cycle_ids(db, cycle_ids=[1]))
+
+    assert [message.id for message in messages] == list(range(7))
+    assert db.ranges == [(0, 2), (3, 5), (6, 8)]
+
+
+def test_get_all_by_cycle_ids_stops_after_an_empty_page(monkeypatch):
+    monkeypatch.setattr(settings, "SUPABASE_PAGE_SIZE", 3)
+    db = FakeClient(rows(6))
+
+    messages = asyncio.run(crud.message.get_all_by_cycle_ids(db, cycle_ids=[1]))
+
+    assert len(messages) == 6
+    assert db.ranges == [(0, 2), (3, 5), (6, 8)]
@@ -0,0 +1,111 @@
+import asyncio
+import json
+from contextlib import asynccontextmanager
+from types import SimpleNamespace
+
+import pytest
+
+pytest.importorskip("crewai_tools")
+
+from crewai_saas import crud
+from crewai_saas.api import deps
+from crewai_saas.api.api_v1.endpoints import employed_crews
+from crewai_saas.core.chat_event_hub import ChatEventHub
+from crewai_saas.core.enum import CycleStatus, MessageRole
+from crewai_saas.model import Cycle, Message
+
+CHAT_ID = 1
+
+
+def make_cycle(id: int, status: CycleStatus) -> Cycle:
+    return Cycle(id=id, created_at="2024-01-01T00:00:00", status=status.value, execution_id=None, cost=None,
+                 price=None, total_token=None, chat_id=CHAT_ID)
+
+
+def make_message(id: int, cycle_id: int, content: str) -> Message:
+    return Message(**{
+        "id": id, "created_at": "2024-01-01T00:00:00", "cost": 0, "input_token": None, "output_token": None,
+        "content": content, "task_id": None, "cycle_id": cycle_id, "role": MessageRole.ASSISTANT.value,
+        "chat_id": CHAT_ID, "agent_id": None, "type": None,
+    })
+
+
+class FakePool:
+    @asynccontextmanager
+    async def connection(self):
+        yield None
+
+
+@pytest.fixture
+def chat(monkeypatch):
+    """a chat whose rows live in `rows`; polls record the cursors they were asked for"""
+    hub = ChatEventHub()
+    rows = SimpleNamespace(cycles=[], messages=[], polls=[])
+
+    async def get_active(db, *, id):
+        return SimpleNamespace(is_owner=False)
+
+    async def cycles_by_chat(db, *, chat_id):
+        return [cycle for cycle in rows.cycles if cycle.status in employed_crews.NON_OWNER_VISIBLE_CYCLE_STATUSES]
+
+    async def cycles_after(db, *, chat_id, last_cycle_id):
+        return [cycle for cycle in await cycles_by_chat(db, chat_id=chat_id) if cycle.id > last_cycle_id]
+
+    async def cycles_by_ids(db, *, cycle_ids):
+        return [cycle for cycle in rows.cycles if cycle.id in cycle_ids]
+
+    async def messages_after(db, *, chat_id, last_message_id):
+        rows.polls.append(last_message_id)
+        return [message for message in rows.messages if message.id > last_message_id]
+
+    async def last_message_id(db, *, chat_id):
+        return max((message.id for message in rows.messages), default=0)
+
+    monkeypatch.setattr(employed_crews, "chat_event_hub", hub)
+    monkeypatch.setattr(employed_crews, "SSE_POLL_IDLE_MIN_SECONDS", 0.01)
+    monkeypatch.setattr(deps, "db_pool", FakePool())
+    monkeypatch.setattr(crud.employed_crew, "get_active", get_active)
+    monkeypatch.setattr(crud.cycle, "get_all_finished_and_started_by_chat_id", cycles_by_chat)
+    monkeypatch.setattr(crud.cycle, "get_all_finished_and_started_by_chat_id_after", cycles_after)
+    monkeypatch.setattr(crud.cycle, "get_all_by_ids", cycles_by_ids)
+    monkeypatch.setattr(crud.message, "get_all_by_chat_id_after", messages_after)
+    monkeypatch.setattr(crud.message, "get_last_id_by_chat_id", last_message_id)
+    return SimpleNamespace(hub=hub, rows=rows)
+
+
+async def collect_until_first_poll(chat, last_event_id):
+    """events sent by a resumed stream up to and including its first poll"""
+    sent = []
+    events = employed_crews.generate_events(1, CHAT_ID, last_event_id)
+    try:
+        while not chat.rows.polls:
+            try:
+                sent.append(await asyncio.wait_for(events.__anext__(), timeout=0.05))
+            except asyncio.TimeoutError:
+                pass
+        return [json.loads(event.split("data: ", 1)[1]) for event in sent]
+    finally:
+        await events.aclose()
+
+
+def test_resume_sends_missed_events_once(chat):
+    # the client saw cycle 5 start and its first message, then disconnected
+    started = make_cycle(5, CycleStatus.STARTED)
+    chat.rows.cycles = [make_cycle(4, CycleStatus.FINISHED), started]
+    chat.rows.messages = [make_message(10, 4, "old"), make_message(11, 5, "first")]
+    chat.hub.publish_cycle(started)
+    last_event_id = chat.hub.publish(CHAT_ID, ChatEventHub.MESSAGE, chat.rows.messages[1].dict()).id
+
+    # while it was away the run wrote another message and finished
+    missed = make_message(12, 5, "second")
+    finished = make_cycle(5, CycleStatus.FINISHED)
+    chat.rows.messages.append(missed)
+    chat.rows.cycles[1] = finished
+    chat.hub.publish_message(missed)
+    chat.hub.publish_cycle(finished)
+
+    sent = asyncio.run(collect_until_first_poll(chat, last_event_id))
+
+    assert [payload.get("content", payload.get("status")) for payload in sent] == ["second", CycleStatus.FINISHED.value]
+    # polling continues after the newest message instead of re-sending the chat
+    assert set(chat.rows.polls) == {12}
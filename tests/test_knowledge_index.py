@@ -0,0 +1,63 @@
+import os
+import zipfile
+
+import pytest
+
+pytest.importorskip("langchain")
+
+from crewai_saas.tool.knowledge_index import KnowledgeIndexStore, file_kind
+
+STORAGE_PATH = "https://example.supabase.co/storage/v1/object/public/knowledge/3f2a9c"
+
+
+def zip_with(path, name):
+    with zipfile.ZipFile(path, "w") as archive:
+        archive.writestr(name, "<xml/>")
+    return path
+
+
+def test_extension_wins():
+    assert file_kind("notes.TXT") == "txt"
+    assert file_kind("sheet.xlsx") is None
+
+
+def test_head_cut_inside_a_multibyte_character_is_still_text():
+    head = ("가나다라" * 200).encode()[:512]
+
+    assert file_kind(STORAGE_PATH, head) == "txt"
+
+
+def test_binary_head_is_unsupported():
+    assert file_kind(STORAGE_PATH, b"\xff\xfe\x00\x81" * 16) is None
+
+
+def test_pdf_and_xml_heads():
+    assert file_kind(STORAGE_PATH, b"%PDF-1.7\n") == "pdf"
+    assert file_kind(STORAGE_PATH, b"  <?xml version='1.0'?>") == "xml"
+
+
+def test_zip_is_docx_only_with_word_entries(tmp_path):
+    docx = zip_with(tmp_path / "a", "word/document.xml")
+    xlsx = zip_with(tmp_path / "b", "xl/workbook.xml")
+    head = docx.read_bytes()[:512]
+
+    assert file_kind(STORAGE_PATH, head, str(docx)) == "docx"
+    assert file_kind(STORAGE_PATH, xlsx.read_bytes()[:512], str(xlsx)) is None
+    # without the file the archive's entries cannot be checked
+    assert file_kind(STORAGE_PATH, head) is None
+
+
+def test_known_content_hash_skips_download(tmp_path, monkeypatch):
+    store = KnowledgeIndexStore(str(tmp_path), embedding_model="text-embedding-3-small",
+                                chunk_size=1000, chunk_overlap=100, top_k=3)
+    os.makedirs(store.index_dir("abc"))
+    (tmp_path / os.path.basename(store.index_dir("abc")) / "manifest.json").write_text("{}")
+
+    def no_download(*args):
+        raise AssertionError("downloaded a file whose index already exists")
+
+    monkeypatch.setattr(store, "_download", no_download)
+    monkeypatch.setattr(store, "open", lambda content_hash: content_hash)
+
+    assert store.resolve(STORAGE_PATH, "abc") == "abc"
+    assert store.content_hash_of(STORAGE_PATH) == "abc"
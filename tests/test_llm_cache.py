@@ -0,0 +1,38 @@
+import pytest
+
+pytest.importorskip("langchain_core")
+
+from langchain_core.outputs import Generation
+
+from crewai_saas.service.llm_cache import LlmResponseCache, MemoryLlmCacheBackend, SqliteLlmCacheBackend
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def backend(request, tmp_path):
+    if request.param == "memory":
+        backend = MemoryLlmCacheBackend(maxsize=16, ttl=60)
+    else:
+        backend = SqliteLlmCacheBackend(str(tmp_path / "llm_cache.sqlite3"))
+    backend.open()
+    yield backend
+    backend.close()
+
+
+def test_clear_only_drops_the_crews_own_entries(backend):
+    cache = LlmResponseCache(backend, {1: 60, 2: 60})
+    first, second = cache.for_crew(1), cache.for_crew(2)
+    first.update("prompt", "llm", [Generation(text="one")])
+    second.update("prompt", "llm", [Generation(text="two")])
+
+    first.clear()
+
+    assert first.lookup("prompt", "llm") is None
+    assert [generation.text for generation in second.lookup("prompt", "llm")] == ["two"]
+
+
+def test_sqlite_backend_misses_until_opened(tmp_path):
+    backend = SqliteLlmCacheBackend(str(tmp_path / "llm_cache.sqlite3"))
+    backend.set(1, "key", [Generation(text="one")], ttl=60)
+
+    assert backend.get(1, "key") is None
+    assert not (tmp_path / "llm_cache.sqlite3").exists()
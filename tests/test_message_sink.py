@@ -0,0 +1,78 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from crewai_saas import crud
+from crewai_saas.core.enum import MessageRole
+from crewai_saas.model import MessageCreate
+from crewai_saas.service.message_sink import MessageSink, MessageWriteError
+
+
+def make_message(cycle_id: int, content: str) -> MessageCreate:
+    return MessageCreate(content=content, role=MessageRole.ASSISTANT, chat_id=1, cycle_id=cycle_id)
+
+
+def patch_crud(monkeypatch, fail):
+    """fail(objs_in, attempt) decides whether an insert raises; returns the written contents"""
+    written = []
+    attempts = []
+
+    async def create_many(db, *, objs_in):
+        attempts.append([obj_in.content for obj_in in objs_in])
+        if fail(objs_in, len(attempts)):
+            raise RuntimeError("insert failed")
+        written.extend(obj_in.content for obj_in in objs_in)
+        return []
+
+    async def touch(db, *, chat_id):
+        return None
+
+    monkeypatch.setattr(crud.message, "create_many", create_many)
+    monkeypatch.setattr(crud.message, "touch", touch)
+    return written, attempts
+
+
+async def run_sink(messages, cycle_id):
+    sink = MessageSink(SimpleNamespace(session=None), batch_size=10, flush_interval=0.01, touch_interval=5.0,
+                       retries=2, retry_backoff=0)
+    await sink._start()
+    for message in messages:
+        sink._queue.put_nowait(message)
+    try:
+        await sink._flush(cycle_id)
+    finally:
+        sink._flusher.cancel()
+        await asyncio.gather(sink._flusher, return_exceptions=True)
+    return sink
+
+
+def test_failed_batch_is_retried(monkeypatch):
+    written, attempts = patch_crud(monkeypatch, lambda objs_in, attempt: attempt == 1)
+
+    sink = asyncio.run(run_sink([make_message(7, "a"), make_message(7, "b")], cycle_id=7))
+
+    assert written == ["a", "b"]
+    assert len(attempts) == 2
+    assert sink.stats()["retried_total"] == 1
+    assert sink.stats()["failed_total"] == 0
+
+
+def test_bad_row_is_dropped_and_reported_to_its_cycle(monkeypatch):
+    # the batch keeps failing because of one row; the others are written one by one, in order
+    written, attempts = patch_crud(monkeypatch, lambda objs_in, attempt: any(obj_in.content == "bad" for obj_in in objs_in))
+
+    with pytest.raises(MessageWriteError):
+        asyncio.run(run_sink([make_message(7, "a"), make_message(7, "bad"), make_message(7, "c")], cycle_id=7))
+
+    assert written == ["a", "c"]
+    assert len(attempts) == 3 + 3
+
+
+def test_drops_of_other_cycles_are_not_reported(monkeypatch):
+    written, _ = patch_crud(monkeypatch, lambda objs_in, attempt: any(obj_in.content == "bad" for obj_in in objs_in))
+
+    sink = asyncio.run(run_sink([make_message(8, "bad"), make_message(7, "a")], cycle_id=7))
+
+    assert written == ["a"]
+    assert sink._dropped == {8: 1}
@@ -0,0 +1,109 @@
+import pytest
+
+pytest.importorskip("crewai_tools")
+pytest.importorskip("pandas")
+
+from crewai_saas.core import cache
+from crewai_saas.tool import stock_data as stock_data_module
+from crewai_saas.tool.stock_data import FixtureBackend, StockDataCache, balance_sheet_summary, \
+    income_statement_summary, insider_transactions_summary, price_summary, stock_data
+
+
+@pytest.fixture(autouse=True)
+def fresh_cache():
+    stock_data.entries.clear()
+    yield
+    stock_data.entries.clear()
+
+
+def test_fixture_backend_is_selected():
+    assert isinstance(stock_data.backend, FixtureBackend)
+
+
+def test_price_summary():
+    assert price_summary("aapl") == (
+        "Date|Open|High|Low|Close|Volume\n"
+        "2024-03-08|169.0|173.7|168.9|170.7|76114600\n"
+        "2024-03-11|172.9|174.4|172.1|172.8|60139500"
+    )
+
+
+def test_income_statement_summary():
+    assert income_statement_summary("AAPL") == (
+        "Period|Revenue|Gross Profit|Operating Income|Net Income\n"
+        "2023-09-30|383285000000.0|169148000000.0|114301000000.0|96995000000.0\n"
+        "2022-09-30|394328000000.0|170782000000.0|119437000000.0|99803000000.0"
+    )
+
+
+def test_income_statement_missing_column_is_left_empty():
+    assert income_statement_summary("PARTIAL") == (
+        "Period|Revenue|Gross Profit|Operating Income|Net Income\n"
+        "2023-12-31|1000.0|||100.0"
+    )
+
+
+def test_balance_sheet_summary():
+    assert balance_sheet_summary("AAPL") == (
+        "Period|Total Assets|Total Liabilities|Shareholders' Equity\n"
+        "2023-09-30|352583000000.0|290437000000.0|62146000000.0\n"
+        "2022-09-30|352755000000.0|302083000000.0|50672000000.0"
+    )
+
+
+def test_balance_sheet_falls_back_to_legacy_columns():
+    assert balance_sheet_summary("LEGACY") == (
+        "Period|Total Assets|Total Liabilities|Shareholders' Equity\n"
+        "2021-09-30|351002000000.0|287912000000.0|63090000000.0"
+    )
+
+
+def test_insider_transactions_summary():
+    # Transaction is empty in current yfinance data, so the Text column is not used as a fallback
+    assert insider_transactions_summary("AAPL") == (
+        "Date|Insider Name|Shares Traded|Transaction Type|Price\n"
+        "2024-03-01|COOK TIMOTHY D|100000||17000000.0\n"
+        "2024-03-01|LEVINSON ARTHUR D|5000||"
+    )
+
+
+def test_insider_transactions_falls_back_to_legacy_columns():
+    assert insider_transactions_summary("LEGACY") == (
+        "Date|Insider Name|Shares Traded|Transaction Type|Price\n"
+        "2021-10-01|MAESTRI LUCA|25000|Sale|3750000.0"
+    )
+
+
+def test_missing_fixture_reports_no_data():
+    assert price_summary("NOPE") == "No price data found for NOPE"
+
+
+class CountingBackend:
+    def __init__(self):
+        self.calls = []
+
+    def fetch(self, ticker, dataset):
+        self.calls.append((ticker, dataset))
+        return f"{dataset}-{len(self.calls)}"
+
+
+def test_each_dataset_expires_after_its_own_ttl(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(cache.time, "monotonic", lambda: now[0])
+    backend = CountingBackend()
+    data = StockDataCache(backend, ttls={stock_data_module.HISTORY: 60, stock_data_module.FINANCIALS: 3600},
+                          maxsize=16)
+
+    assert data.get("aapl", stock_data_module.HISTORY) == "history-1"
+    assert data.get("aapl", stock_data_module.FINANCIALS) == "financials-2"
+
+    now[0] += 30
+    assert data.get("AAPL", stock_data_module.HISTORY) == "history-1"
+
+    now[0] += 31
+    assert data.get("AAPL", stock_data_module.HISTORY) == "history-3"
+    assert data.get("AAPL", stock_data_module.FINANCIALS) == "financials-2"
+
+    now[0] += 3600
+    assert data.get("AAPL", stock_data_module.FINANCIALS) == "financials-4"
+    assert backend.calls == [("AAPL", "history"), ("AAPL", "financials"), ("AAPL", "history"), ("AAPL", "financials")]
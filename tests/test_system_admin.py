@@ -0,0 +1,50 @@
+import asyncio
+
+import pytest
+from fastapi import HTTPException
+
+from crewai_saas.api import deps
+from crewai_saas.core.config import settings
+from crewai_saas.core.google_auth_utils import GoogleAuthUtils
+
+ADMIN = "admin@example.com"
+
+
+@pytest.fixture(autouse=True)
+def admins(monkeypatch):
+    monkeypatch.setattr(settings, "SYSTEM_ADMIN_EMAILS", [ADMIN])
+
+
+def verify_as(monkeypatch, claims):
+    def decode_google_id_token(token):
+        if claims is None:
+            raise HTTPException(status_code=403, detail="Invalid token")
+        return claims
+
+    monkeypatch.setattr(GoogleAuthUtils, "decode_google_id_token", staticmethod(decode_google_id_token))
+
+
+def test_verified_admin_is_allowed(monkeypatch):
+    verify_as(monkeypatch, {"email": ADMIN, "email_verified": True})
+
+    assert asyncio.run(deps.get_system_admin("Bearer token")) == ADMIN
+
+
+@pytest.mark.parametrize("claims", [
+    None,  # the signature did not verify
+    {"email": ADMIN, "email_verified": False},
+    {"email": "user@example.com", "email_verified": True},
+])
+def test_other_callers_are_rejected(monkeypatch, claims):
+    verify_as(monkeypatch, claims)
+
+    with pytest.raises(HTTPException) as error:
+        asyncio.run(deps.get_system_admin("Bearer token"))
+    assert error.value.status_code == 403
+
+
+def test_missing_token_is_rejected(monkeypatch):
+    verify_as(monkeypatch, {"email": ADMIN, "email_verified": True})
+
+    with pytest.raises(HTTPException):
+        asyncio.run(deps.get_system_admin(None))
@@ -0,0 +1,73 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+pytest.importorskip("langchain_core")
+
+from langchain_core.messages import AIMessage
+from langchain_core.outputs import ChatGeneration, LLMResult
+
+from crewai_saas import crud
+from crewai_saas.core.config import settings
+from crewai_saas.service.llm_cache import CACHED_GENERATION_KEY
+from crewai_saas.service.usage import TokenUsage, next_average, record_crew_usage, usage_from_result
+
+
+def generation(input_tokens: int, output_tokens: int, cached: bool = False) -> ChatGeneration:
+    message = AIMessage(content="answer", usage_metadata={
+        "input_tokens": input_tokens, "output_tokens": output_tokens, "total_tokens": input_tokens + output_tokens})
+    return ChatGeneration(message=message, generation_info={CACHED_GENERATION_KEY: True} if cached else None)
+
+
+def test_usage_from_openai_token_usage():
+    result = LLMResult(generations=[[generation(1, 1)]],
+                       llm_output={"token_usage": {"prompt_tokens": 120, "completion_tokens": 30}})
+
+    assert usage_from_result(result) == TokenUsage(input_token=120, output_token=30)
+
+
+def test_usage_from_message_metadata():
+    result = LLMResult(generations=[[generation(10, 5)], [generation(7, 3)]])
+
+    assert usage_from_result(result) == TokenUsage(input_token=17, output_token=8)
+
+
+def test_cached_generations_count_as_zero():
+    result = LLMResult(generations=[[generation(10, 5, cached=True)], [generation(7, 3)]])
+
+    assert usage_from_result(result) == TokenUsage(input_token=7, output_token=3)
+
+
+def test_next_average():
+    assert next_average(None, 500, 0.2) == 500
+    assert next_average(0, 500, 0.2) == 500
+    assert next_average(1000, 500, 0.2) == 900
+    assert next_average(1000, 2000, 0.5) == 1500
+
+
+def test_record_crew_usage_retries_after_a_concurrent_update(monkeypatch):
+    monkeypatch.setattr(settings, "USAGE_AVERAGE_ALPHA", 0.5)
+    stored = {"average": 1000}
+    writes = []
+
+    async def get(db, *, id):
+        return SimpleNamespace(average_token_usage=stored["average"])
+
+    async def compare_and_set_average_token_usage(db, *, crew_id, expected, average_token_usage):
+        if not writes:
+            # another run of the crew wrote between our read and write
+            stored["average"] = 3000
+            writes.append(None)
+            return False
+        assert expected == stored["average"]
+        stored["average"] = average_token_usage
+        writes.append(average_token_usage)
+        return True
+
+    monkeypatch.setattr(crud.crew, "get", get)
+    monkeypatch.setattr(crud.crew, "compare_and_set_average_token_usage", compare_and_set_average_token_usage)
+
+    asyncio.run(record_crew_usage(None, crew_id=1, total_token=2000))
+
+    assert stored["average"] == 2500